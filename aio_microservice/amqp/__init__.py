@@ -1,6 +1,9 @@
 from faststream import BaseMiddleware, context
 from faststream.rabbit import RabbitBroker, RabbitExchange, RabbitQueue
 
+from aio_microservice.amqp.batching import AmqpBatchError
+from aio_microservice.amqp.codecs import AmqpCodec, AmqpCompression, AmqpSerializer
+from aio_microservice.amqp.dedupe import DedupeStore, InMemoryDedupeStore, SqliteDedupeStore
 from aio_microservice.amqp.extension import (
     AmqpExtension,
     AmqpExtensionSettings,
@@ -8,16 +11,33 @@ from aio_microservice.amqp.extension import (
     publisher,
     subscriber,
 )
+from aio_microservice.amqp.retries import AmqpRetryPolicy
+from aio_microservice.amqp.streams import (
+    InMemoryStreamOffsetStore,
+    SqliteStreamOffsetStore,
+    StreamOffsetStore,
+)
 from aio_microservice.amqp.testing import TestAmqpBroker
 
 __all__ = [
+    "AmqpBatchError",
+    "AmqpCodec",
+    "AmqpCompression",
     "AmqpExtension",
     "AmqpExtensionSettings",
+    "AmqpRetryPolicy",
+    "AmqpSerializer",
     "AmqpSettings",
     "BaseMiddleware",
+    "DedupeStore",
+    "InMemoryDedupeStore",
+    "InMemoryStreamOffsetStore",
     "RabbitBroker",
     "RabbitExchange",
     "RabbitQueue",
+    "SqliteDedupeStore",
+    "SqliteStreamOffsetStore",
+    "StreamOffsetStore",
     "TestAmqpBroker",
     "context",
     "publisher",
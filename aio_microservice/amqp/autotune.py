@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from aio_microservice.amqp.backpressure import BackpressureLevel
+
+if TYPE_CHECKING:
+    from faststream.broker.message import StreamMessage
+    from faststream.broker.subscriber.proto import SubscriberProto
+    from faststream.types import AsyncFuncAny
+
+    from aio_microservice.amqp.backpressure import BackpressureController
+    from aio_microservice.amqp.broker import AmqpRabbitBroker
+
+
+class PrefetchSampler:
+    def __init__(self) -> None:
+        self.completed = 0
+        self.latency = 0.0
+
+    async def __call__(self, call_next: AsyncFuncAny, message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        start = time.perf_counter()
+        try:
+            return await call_next(message)
+        finally:
+            # failed messages free their slot of the prefetch window as well
+            self.completed += 1
+            self.latency += time.perf_counter() - start
+
+
+@dataclass
+class PrefetchWindow:
+    subscriber: SubscriberProto[Any]
+    queue: str
+    prefetch_count: int
+    samplers: list[PrefetchSampler] = field(default_factory=list)
+    baseline_latency: float | None = None
+    completed: int = 0
+    latency: float = 0.0
+
+
+class PrefetchTuner:
+    def __init__(
+        self,
+        broker: AmqpRabbitBroker,
+        min_prefetch_count: int,
+        max_prefetch_count: int,
+        initial_prefetch_count: int | None,
+        interval: float,
+        tolerance: float = 0.2,
+        backpressure: BackpressureController | None = None,
+    ) -> None:
+        if not 1 <= min_prefetch_count <= max_prefetch_count:
+            msg = "The prefetch count bounds must be at least 1 and ordered"
+            raise ValueError(msg)
+        self.broker = broker
+        self.min_prefetch_count = min_prefetch_count
+        self.max_prefetch_count = max_prefetch_count
+        self.initial_prefetch_count = self._clamp(initial_prefetch_count or min_prefetch_count)
+        self.interval = interval
+        self.tolerance = tolerance
+        self.backpressure = backpressure
+        self.windows: dict[SubscriberProto[Any], PrefetchWindow] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def add_sampler(
+        self,
+        subscriber: SubscriberProto[Any],
+        queue: str,
+        sampler: PrefetchSampler,
+    ) -> int:
+        # handlers of the same queue share a consumer and thereby its prefetch window
+        window = self.windows.get(subscriber)
+        if window is None:
+            window = PrefetchWindow(
+                subscriber=subscriber,
+                queue=queue,
+                prefetch_count=self.initial_prefetch_count,
+            )
+            self.windows[subscriber] = window
+        window.samplers.append(sampler)
+        return window.prefetch_count
+
+    def decide(self, window: PrefetchWindow, completed: int, latency: float) -> int:
+        prefetch_count = window.prefetch_count
+        baseline_latency = window.baseline_latency or latency
+        if latency > baseline_latency * (1 + self.tolerance):
+            # the latency grows with the window, so the handler is saturated
+            return self._clamp(math.floor(prefetch_count * max(baseline_latency / latency, 0.5)))
+        if completed >= prefetch_count:
+            # the window turned over at least once, so a larger one keeps the handler busy
+            return self._clamp(prefetch_count + math.ceil(math.sqrt(prefetch_count)))
+        return prefetch_count
+
+    async def update(self, elapsed: float) -> None:
+        for window in self.windows.values():
+            completed = sum(sampler.completed for sampler in window.samplers)
+            latency = sum(sampler.latency for sampler in window.samplers)
+            interval_completed = completed - window.completed
+            interval_latency = latency - window.latency
+            window.completed, window.latency = completed, latency
+            if interval_completed == 0:
+                continue
+
+            mean_latency = interval_latency / interval_completed
+            prefetch_count = self.decide(window, interval_completed, mean_latency)
+            window.baseline_latency = min(window.baseline_latency or mean_latency, mean_latency)
+            if prefetch_count == window.prefetch_count or self._throttled:
+                continue
+            logger.info(
+                "Tuning prefetch count of {} from {} to {} (ack rate {:.1f}/s, latency {:.3f}s)",
+                window.queue,
+                window.prefetch_count,
+                prefetch_count,
+                interval_completed / elapsed,
+                mean_latency,
+            )
+            # the broker serializes the changes of a subscriber, so a backpressure level applied
+            # meanwhile takes effect after this update instead of being undone by it
+            await self.broker.update_subscriber_prefetch_count(window.subscriber, prefetch_count)
+            window.prefetch_count = prefetch_count
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    @property
+    def _throttled(self) -> bool:
+        # the backpressure restores the tuned prefetch counts once the load is gone
+        return self.backpressure is not None and self.backpressure.level != BackpressureLevel.NORMAL
+
+    async def _run(self) -> None:
+        updated_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            elapsed, updated_at = now - updated_at, now
+            try:
+                await self.update(elapsed)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to tune the prefetch counts")
+
+    def _clamp(self, prefetch_count: int) -> int:
+        return min(max(prefetch_count, self.min_prefetch_count), self.max_prefetch_count)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from faststream.broker.subscriber.proto import SubscriberProto
+
+    from aio_microservice.amqp.broker import AmqpRabbitBroker
+    from aio_microservice.core.load import LoadMonitor
+
+
+class BackpressureLevel(str, Enum):
+    NORMAL = "normal"
+    THROTTLED = "throttled"
+    PAUSED = "paused"
+
+
+LEVELS = list(BackpressureLevel)
+
+
+class BackpressureController:
+    def __init__(
+        self,
+        broker: AmqpRabbitBroker,
+        monitor: LoadMonitor,
+        interval: float,
+        throttle_loop_lag: float,
+        pause_loop_lag: float,
+        throttle_http_requests: int,
+        pause_http_requests: int,
+        throttle_prefetch_count: int,
+        cooldown: float,
+    ) -> None:
+        if throttle_loop_lag > pause_loop_lag or throttle_http_requests > pause_http_requests:
+            msg = "Throttle thresholds must not be larger than pause thresholds"
+            raise ValueError(msg)
+        if throttle_prefetch_count < 1:
+            msg = "throttle_prefetch_count must be at least 1"
+            raise ValueError(msg)
+        self.broker = broker
+        self.monitor = monitor
+        self.interval = interval
+        self.throttle_loop_lag = throttle_loop_lag
+        self.pause_loop_lag = pause_loop_lag
+        self.throttle_http_requests = throttle_http_requests
+        self.pause_http_requests = pause_http_requests
+        self.throttle_prefetch_count = throttle_prefetch_count
+        self.cooldown = cooldown
+        self.level = BackpressureLevel.NORMAL
+        self._relieved_at: float | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def measure(self) -> BackpressureLevel:
+        loop_lag = self.monitor.loop_lag
+        in_flight_requests = self.monitor.in_flight_requests
+        if loop_lag >= self.pause_loop_lag or in_flight_requests >= self.pause_http_requests:
+            return BackpressureLevel.PAUSED
+        if loop_lag >= self.throttle_loop_lag or in_flight_requests >= self.throttle_http_requests:
+            return BackpressureLevel.THROTTLED
+        return BackpressureLevel.NORMAL
+
+    async def update(self, now: float) -> None:
+        level = self.measure()
+        if LEVELS.index(level) >= LEVELS.index(self.level):
+            self._relieved_at = None
+            if level is not self.level:
+                await self._apply(level)
+            return
+        # consumption only recovers once the load has stayed lower for the cooldown
+        if self._relieved_at is None:
+            self._relieved_at = now
+        if now - self._relieved_at >= self.cooldown:
+            self._relieved_at = None
+            await self._apply(level)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.monitor.measure_loop_lag(self.interval)
+            try:
+                await self.update(time.monotonic())
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to apply the backpressure level {}", self.measure())
+
+    async def _apply(self, level: BackpressureLevel) -> None:
+        logger.info(
+            "Changing backpressure from {} to {} (loop lag {:.3f}s, {} http requests in flight)",
+            self.level.value,
+            level.value,
+            self.monitor.loop_lag,
+            self.monitor.in_flight_requests,
+        )
+        # the level applies before the subscribers are changed, so that the prefetch tuner
+        # stops changing them at once
+        previous_level, self.level = self.level, level
+        try:
+            for subscriber, prefetch_count in self.broker.subscriber_prefetch_counts.items():
+                if level is BackpressureLevel.PAUSED:
+                    await self.broker.pause_subscriber(subscriber)
+                    continue
+                await self._update_prefetch_count(subscriber, prefetch_count, level)
+                await self.broker.resume_subscriber(subscriber)
+        except BaseException:
+            # failed levels are applied again with the next measurement
+            self.level = previous_level
+            raise
+
+    async def _update_prefetch_count(
+        self,
+        subscriber: SubscriberProto[Any],
+        prefetch_count: int,
+        level: BackpressureLevel,
+    ) -> None:
+        if level is BackpressureLevel.THROTTLED:
+            # a prefetch count of zero is unlimited
+            prefetch_count = (
+                min(prefetch_count, self.throttle_prefetch_count)
+                if prefetch_count
+                else self.throttle_prefetch_count
+            )
+        await self.broker.update_subscriber_prefetch_count(
+            subscriber,
+            prefetch_count,
+            persistent=False,
+        )
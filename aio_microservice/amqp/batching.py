@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import typing
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Mapping
+
+
+class AmqpBatchError(Exception):
+    def __init__(self, errors: Mapping[int, BaseException]) -> None:
+        super().__init__(f"Failed to process {len(errors)} message(s) of batch")
+        self.errors = errors
+
+
+class MessageBatcher:
+    def __init__(
+        self,
+        handler: Callable[[list[Any]], Awaitable[Any]],
+        batch_size: int,
+        batch_timeout: float,
+    ) -> None:
+        if batch_size < 1:
+            msg = "batch_size must be at least 1"
+            raise ValueError(msg)
+        self._handler = handler
+        self._batch_size = batch_size
+        self._batch_timeout = batch_timeout
+        self._pending: list[tuple[Any, asyncio.Future[None]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._closed = False
+
+    def make_collector(self) -> Callable[[Any], Awaitable[None]]:
+        async def collect(message: Any) -> None:  # noqa: ANN401
+            await self.put(message)
+
+        handler = self._handler
+        collect.__name__ = getattr(handler, "__name__", collect.__name__)
+        collect.__qualname__ = getattr(handler, "__qualname__", collect.__qualname__)
+        collect.__doc__ = handler.__doc__
+        collect.__signature__ = inspect.Signature(  # type: ignore[attr-defined]
+            parameters=[
+                inspect.Parameter(
+                    name="message",
+                    kind=inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                    annotation=_batch_item_annotation(handler),
+                ),
+            ],
+        )
+        return collect
+
+    async def put(self, message: Any) -> None:  # noqa: ANN401
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        self._pending.append((message, future))
+
+        if self._closed or len(self._pending) >= self._batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._batch_timeout, self.flush)
+
+        await future
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, []
+        task = asyncio.create_task(self._process(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        # pending messages are handled at once instead of waiting for the timeout
+        self._closed = True
+        if self._pending:
+            self.flush()
+        await asyncio.gather(*self._tasks)
+
+    async def _process(self, pending: list[tuple[Any, asyncio.Future[None]]]) -> None:
+        try:
+            await self._handler([message for message, _ in pending])
+        except AmqpBatchError as error:
+            for index, (_, future) in enumerate(pending):
+                _resolve(future, error.errors.get(index))
+        except Exception as error:  # noqa: BLE001
+            for _, future in pending:
+                _resolve(future, error)
+        else:
+            for _, future in pending:
+                _resolve(future, None)
+        finally:
+            # cancelling the batch must not leave its messages waiting forever
+            for _, future in pending:
+                if not future.done():
+                    future.cancel()
+
+
+def _batch_item_annotation(handler: Callable[..., Any]) -> Any:  # noqa: ANN401
+    parameters = list(inspect.signature(handler).parameters.values())
+    if not parameters:
+        msg = f"Batch handler {handler!r} must accept a list of messages"
+        raise ValueError(msg)
+
+    annotation = typing.get_type_hints(handler).get(parameters[0].name, Any)
+    item_annotations = typing.get_args(annotation)
+    return item_annotations[0] if item_annotations else Any
+
+
+def _resolve(future: asyncio.Future[None], error: BaseException | None) -> None:
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import zlib
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from aio_pika import connect_robust
+from aio_pika.exceptions import CONNECTION_EXCEPTIONS
+from faststream.rabbit import RabbitBroker
+from faststream.rabbit.publisher.producer import AioPikaFastProducer
+from loguru import logger
+from yarl import URL
+
+from aio_microservice.amqp.topology import AmqpDeclarer, AmqpTopology
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+    from types import TracebackType
+
+    from aio_pika import Connection, RobustChannel, RobustConnection
+    from faststream.broker.subscriber.proto import SubscriberProto
+    from faststream.rabbit import RabbitQueue
+    from faststream.types import AsyncFunc
+
+# the declarations of the topology are spread over a few channels to run concurrently
+TOPOLOGY_CHANNEL_POOL_SIZE = 4
+
+
+class PooledProducer:
+    def __init__(self, producers: Sequence[AioPikaFastProducer]) -> None:
+        self.producers = producers
+        self._next_producer = itertools.cycle(producers)
+
+    async def publish(self, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return await next(self._next_producer).publish(*args, **kwargs)
+
+
+def failover_urls(url: str, hosts: Sequence[str]) -> list[str]:
+    base = URL(url)
+    urls = [base]
+    for host in hosts:
+        # hosts without a port use the port of the broker
+        address = URL(f"//{host}")
+        port = address.port if address.port is not None else base.port
+        urls.append(base.with_host(address.host or host).with_port(port))
+    return [str(url) for url in urls]
+
+
+class Failover:
+    def __init__(self, urls: Sequence[str], start: int = 0) -> None:
+        self.urls = [*urls[start:], *urls[:start]]
+        self._next_urls = itertools.cycle(self.urls)
+
+    async def connect(
+        self,
+        connect: Callable[[str], Awaitable[RobustConnection]],
+    ) -> RobustConnection:
+        for index, url in enumerate(self.urls):
+            try:
+                connection = await connect(url)
+            except CONNECTION_EXCEPTIONS:
+                if index == len(self.urls) - 1:
+                    raise
+                logger.warning("Failed to connect to {}, failing over", URL(url).host)
+                continue
+            self._next_urls = itertools.cycle([*self.urls[index + 1 :], *self.urls[: index + 1]])
+            connection.close_callbacks.add(self.rotate)
+            return connection
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def rotate(self, connection: Connection, _: BaseException | None) -> None:
+        if connection.is_closed:
+            return
+        # the robust connection reconnects to its url, which also moves on after failed attempts
+        url = URL(next(self._next_urls))
+        logger.warning("Lost connection to {}, failing over to {}", connection.url.host, url.host)
+        connection.url = url
+
+
+class AmqpRabbitBroker(RabbitBroker):
+    def __init__(
+        self,
+        *args: Any,  # noqa: ANN401
+        publish_connection: bool = False,
+        publish_channel_pool_size: int = 1,
+        declare_topology: bool = True,
+        failover_hosts: Sequence[str] = (),
+        spread_consumers: bool = False,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        if publish_channel_pool_size < 1:
+            msg = "publish_channel_pool_size must be at least 1"
+            raise ValueError(msg)
+        super().__init__(*args, **kwargs)
+        self._publish_connection_enabled = publish_connection
+        self._publish_channel_pool_size = publish_channel_pool_size
+        self._publish_connection: RobustConnection | None = None
+        self._publish_channels: list[RobustChannel] = []
+        self._subscriber_prefetch_counts: dict[SubscriberProto[Any], int] = {}
+        self._subscriber_declarers: dict[SubscriberProto[Any], AmqpDeclarer] = {}
+        self._subscriber_channels: dict[SubscriberProto[Any], RobustChannel] = {}
+        self._subscriber_locks: dict[SubscriberProto[Any], asyncio.Lock] = {}
+        self._declared_queues: list[RabbitQueue] = []
+        self._declare_topology = declare_topology
+        self._topology_channels: list[RobustChannel] = []
+        self.topology = AmqpTopology()
+        self._failover_hosts = failover_hosts
+        self._spread_consumers = spread_consumers
+        self._consumer_connections: list[RobustConnection] = []
+
+    @property
+    def connections(self) -> list[RobustConnection]:
+        connections = [self._connection, *self._consumer_connections, self._publish_connection]
+        return [connection for connection in connections if connection is not None]
+
+    def set_subscriber_prefetch_count(
+        self,
+        subscriber: SubscriberProto[Any],
+        prefetch_count: int,
+    ) -> None:
+        # subscribers sharing a queue share a consumer, so the largest window wins
+        current = self._subscriber_prefetch_counts.get(subscriber, 0)
+        self._subscriber_prefetch_counts[subscriber] = max(current, prefetch_count)
+
+    @property
+    def subscriber_prefetch_counts(self) -> dict[SubscriberProto[Any], int]:
+        return dict(self._subscriber_prefetch_counts)
+
+    async def update_subscriber_prefetch_count(
+        self,
+        subscriber: SubscriberProto[Any],
+        prefetch_count: int,
+        *,
+        persistent: bool = True,
+    ) -> None:
+        if subscriber not in self._subscriber_prefetch_counts:
+            msg = "Only subscribers with a prefetch count can be updated"
+            raise ValueError(msg)
+        if persistent:
+            # persistent prefetch counts are restored after reconnecting
+            self._subscriber_prefetch_counts[subscriber] = prefetch_count
+        async with self._subscriber_lock(subscriber):
+            channel = self._subscriber_channels.get(subscriber)
+            if channel is None:
+                # the channels of the subscribers are opened once connected
+                return
+            await channel.set_qos(prefetch_count=prefetch_count)
+            if subscriber._consumer_tag is not None:  # type: ignore[attr-defined]
+                # the prefetch count only applies to consumers started afterwards
+                await self._pause_subscriber(subscriber)
+                await self._resume_subscriber(subscriber)
+
+    async def pause_subscriber(self, subscriber: SubscriberProto[Any]) -> None:
+        async with self._subscriber_lock(subscriber):
+            await self._pause_subscriber(subscriber)
+
+    async def resume_subscriber(self, subscriber: SubscriberProto[Any]) -> None:
+        async with self._subscriber_lock(subscriber):
+            await self._resume_subscriber(subscriber)
+
+    def _subscriber_lock(self, subscriber: SubscriberProto[Any]) -> asyncio.Lock:
+        # e.g. resuming after a prefetch update must not undo a pause of the backpressure
+        return self._subscriber_locks.setdefault(subscriber, asyncio.Lock())
+
+    async def _pause_subscriber(self, subscriber: SubscriberProto[Any]) -> None:
+        queue = subscriber._queue_obj  # type: ignore[attr-defined]
+        consumer_tag = subscriber._consumer_tag  # type: ignore[attr-defined]
+        if queue is None or consumer_tag is None:
+            return
+        # messages already delivered to the consumer are still handled and acknowledged
+        await queue.cancel(consumer_tag)
+        subscriber._consumer_tag = None  # type: ignore[attr-defined]
+
+    async def _resume_subscriber(self, subscriber: SubscriberProto[Any]) -> None:
+        queue = subscriber._queue_obj  # type: ignore[attr-defined]
+        if queue is None or subscriber._consumer_tag is not None:  # type: ignore[attr-defined]
+            return
+        subscriber._consumer_tag = await queue.consume(  # type: ignore[attr-defined]
+            subscriber.consume,
+            arguments=subscriber.consume_args,  # type: ignore[attr-defined]
+        )
+
+    async def open_channel(self) -> RobustChannel:
+        if self._connection is None:
+            msg = "The broker is not connected"
+            raise RuntimeError(msg)
+        return await self._connection.channel()  # type: ignore[return-value]
+
+    async def publish_with_middlewares(
+        self,
+        publish: AsyncFunc,
+        message: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        # messages published besides the producer pass the publish middlewares like faststream's
+        for middleware in self._middlewares:
+            publish = partial(middleware(None).publish_scope, publish)
+        return await publish(message, **kwargs)
+
+    def declare_on_connect(self, queue: RabbitQueue) -> None:
+        self.topology.add_queue(queue)
+
+    async def start(self) -> None:
+        await super(RabbitBroker, self).start()
+        # the topology is declared already, so the subscribers only start consuming
+        await asyncio.gather(
+            *(self._start_subscriber(subscriber) for subscriber in self._subscribers.values()),
+        )
+
+    async def _start_subscriber(self, subscriber: SubscriberProto[Any]) -> None:
+        self._log(
+            f"`{subscriber.call_name}` waiting for messages",
+            extra=subscriber.get_log_context(None),
+        )
+        await subscriber.start()
+
+    def node_index(self, queue: str) -> int:
+        # the assignment is stable, so that all instances consume a queue from the same node
+        return zlib.crc32(queue.encode()) % (len(self._consumer_connections) + 1)
+
+    async def _connect(self, url: str, **kwargs: Any) -> RobustConnection:  # type: ignore[override]  # noqa: ANN401
+        urls = failover_urls(url, self._failover_hosts)
+        connection = await Failover(urls).connect(partial(super()._connect, **kwargs))
+        if self._spread_consumers:
+            # queues are declared over the connection to their node, which makes it their leader
+            self._consumer_connections = [
+                await Failover(urls, start).connect(partial(self._connect_robust, **kwargs))
+                for start in range(1, len(urls))
+            ]
+        nodes = [connection, *self._consumer_connections]
+
+        self.topology.collect(self._subscribers.values(), self._publishers.values())
+        self.declarer = AmqpDeclarer(self._channel, self.topology)  # type: ignore[arg-type]
+        self._producer.declarer = self.declarer  # type: ignore[union-attr]
+        if self._declare_topology:
+            # the channels stay open, so that the topology is restored after reconnecting
+            self._topology_channels = [
+                await connection.channel()  # type: ignore[misc]
+                for _ in range(TOPOLOGY_CHANNEL_POOL_SIZE)
+            ]
+            node_channels: list[RobustChannel] = [
+                await node.channel()  # type: ignore[misc]
+                for node in self._consumer_connections
+            ]
+            await self.topology.declare(
+                self._topology_channels,
+                {
+                    name: node_channels[index - 1]
+                    for name in self.topology.queues
+                    if (index := self.node_index(name))
+                },
+            )
+            self._topology_channels.extend(node_channels)
+
+        for subscriber in self._subscribers.values():
+            node = nodes[self.node_index(subscriber.queue.name)]
+            prefetch_count = self._subscriber_prefetch_counts.get(subscriber)
+            if prefetch_count is None:
+                if node is connection:
+                    continue
+                prefetch_count = self._max_consumers or 0
+            channel: RobustChannel = await node.channel()  # type: ignore[assignment]
+            await channel.set_qos(prefetch_count=prefetch_count)
+            self._subscriber_channels[subscriber] = channel
+            self._subscriber_declarers[subscriber] = AmqpDeclarer(channel, self.topology)
+
+        if self._publish_connection_enabled:
+            await self._connect_publisher(urls, **kwargs)
+
+        return connection
+
+    async def _connect_robust(
+        self,
+        url: str,
+        *,
+        timeout: Any,  # noqa: ANN401
+        ssl_context: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> RobustConnection:
+        return await connect_robust(url, timeout=timeout, ssl_context=ssl_context)  # type: ignore[return-value]
+
+    async def _connect_publisher(
+        self,
+        urls: Sequence[str],
+        *,
+        publisher_confirms: bool,
+        on_return_raises: bool,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        # publishing on its own connection keeps flow-control from throttling the consumers
+        self._publish_connection = publish_connection = await Failover(urls).connect(
+            partial(self._connect_robust, **kwargs),
+        )
+        producers = []
+        for _ in range(self._publish_channel_pool_size):
+            channel: RobustChannel = await publish_connection.channel(  # type: ignore[assignment]
+                publisher_confirms=publisher_confirms,
+                on_return_raises=on_return_raises,
+            )
+            self._publish_channels.append(channel)
+            producers.append(
+                AioPikaFastProducer(
+                    declarer=AmqpDeclarer(channel, self.topology),
+                    decoder=self._decoder,
+                    parser=self._parser,
+                ),
+            )
+        self._producer = PooledProducer(producers)  # type: ignore[assignment]
+
+    def setup_subscriber(self, subscriber: SubscriberProto[Any], **kwargs: Any) -> None:  # noqa: ANN401
+        if (declarer := self._subscriber_declarers.get(subscriber)) is not None:
+            kwargs["declarer"] = declarer
+        super().setup_subscriber(subscriber, **kwargs)
+
+    async def _close(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_val: BaseException | None = None,
+        exc_tb: TracebackType | None = None,
+    ) -> None:
+        for channel in self._subscriber_channels.values():
+            if not channel.is_closed:
+                await channel.close()
+        self._subscriber_channels.clear()
+        self._subscriber_declarers.clear()
+
+        for channel in self._topology_channels:
+            if not channel.is_closed:
+                await channel.close()
+        self._topology_channels.clear()
+
+        for channel in self._publish_channels:
+            if not channel.is_closed:
+                await channel.close()
+        self._publish_channels.clear()
+        if self._publish_connection is not None:
+            await self._publish_connection.close()
+            self._publish_connection = None
+
+        for connection in self._consumer_connections:
+            await connection.close()
+        self._consumer_connections.clear()
+
+        await super()._close(exc_type, exc_val, exc_tb)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import io
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable
+
+from faststream import BaseMiddleware
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from aio_pika import IncomingMessage
+    from faststream.broker.message import StreamMessage
+    from faststream.types import AsyncFunc
+
+    from aio_microservice.amqp.codecs import AmqpCodec
+    from aio_microservice.s3.extension import S3Extension
+
+CLAIM_CHECK_BUCKET_HEADER = "x-claim-check-bucket"
+CLAIM_CHECK_KEY_HEADER = "x-claim-check-key"
+
+
+class PayloadCache:
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._size = 0
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    def get(self, bucket: str, key: str) -> bytes | None:
+        payload = self._entries.get((bucket, key))
+        if payload is not None:
+            self._entries.move_to_end((bucket, key))
+        return payload
+
+    def put(self, bucket: str, key: str, payload: bytes) -> None:
+        if len(payload) > self._max_size:
+            return
+        self.pop(bucket, key)
+        self._entries[(bucket, key)] = payload
+        self._size += len(payload)
+        while self._size > self._max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def pop(self, bucket: str, key: str) -> None:
+        payload = self._entries.pop((bucket, key), None)
+        if payload is not None:
+            self._size -= len(payload)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ClaimCheck:
+    def __init__(
+        self,
+        service: S3Extension,
+        codec: AmqpCodec,
+        bucket: str,
+        threshold: int,
+        prefix: str,
+        delete_consumed: bool,
+        cache_size: int,
+    ) -> None:
+        self._service = service
+        self._codec = codec
+        self.bucket = bucket
+        self.threshold = threshold
+        self.prefix = prefix
+        self.delete_consumed = delete_consumed
+        self.cache = PayloadCache(max_size=cache_size)
+
+    async def publish_scope(
+        self,
+        call_next: AsyncFunc,
+        message: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        if isinstance(message, bytes):
+            body = message
+        else:
+            body, kwargs["content_type"], kwargs["content_encoding"] = self._codec.encode(message)
+        if len(body) < self.threshold:
+            return await call_next(body, *args, **kwargs)
+
+        key = f"{self.prefix}{uuid.uuid4().hex}"
+        await self._run_s3(
+            "upload_fileobj",
+            Fileobj=io.BytesIO(body),
+            Bucket=self.bucket,
+            Key=key,
+        )
+        # content-type and content-encoding stay those of the offloaded payload
+        kwargs["headers"] = {
+            **(kwargs.get("headers") or {}),
+            CLAIM_CHECK_BUCKET_HEADER: self.bucket,
+            CLAIM_CHECK_KEY_HEADER: key,
+        }
+        return await call_next(b"", *args, **kwargs)
+
+    async def parse(
+        self,
+        message: IncomingMessage,
+        original_parser: Callable[[IncomingMessage], Awaitable[StreamMessage[Any]]],
+    ) -> StreamMessage[Any]:
+        stream_message = await original_parser(message)
+        reference = _get_reference(stream_message.headers)
+        if reference is not None:
+            stream_message.body = await self.fetch(*reference)
+        return stream_message
+
+    async def fetch(self, bucket: str, key: str) -> bytes:
+        payload = self.cache.get(bucket, key)
+        if payload is None:
+            buffer = io.BytesIO()
+            # managed transfers download large objects with parallel ranged requests
+            await self._run_s3("download_fileobj", Bucket=bucket, Key=key, Fileobj=buffer)
+            payload = buffer.getvalue()
+            self.cache.put(bucket, key, payload)
+        return payload
+
+    async def consumed(self, message: StreamMessage[Any]) -> None:
+        reference = _get_reference(message.headers)
+        if reference is None or not self.delete_consumed:
+            return
+        bucket, key = reference
+        self.cache.pop(bucket, key)
+        await self._run_s3("delete_object", Bucket=bucket, Key=key)
+
+    async def _run_s3(self, method: str, **kwargs: Any) -> None:  # noqa: ANN401
+        s3 = self._service.s3
+        await s3.run_in_executor(getattr(s3.client, method), **kwargs)
+
+
+class ClaimCheckMiddleware(BaseMiddleware):
+    def __init__(self, msg: Any | None = None, *, claim_check: ClaimCheck) -> None:  # noqa: ANN401
+        super().__init__(msg)
+        self.claim_check = claim_check
+
+    async def publish_scope(
+        self,
+        call_next: AsyncFunc,
+        msg: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        return await self.claim_check.publish_scope(call_next, msg, *args, **kwargs)
+
+    async def consume_scope(
+        self,
+        call_next: AsyncFunc,
+        msg: StreamMessage[Any],
+    ) -> Any:  # noqa: ANN401
+        result = await call_next(msg)
+        # failed messages keep their payload, as they might be redelivered
+        await self.claim_check.consumed(msg)
+        return result
+
+
+def _get_reference(headers: dict[str, Any]) -> tuple[str, str] | None:
+    key = headers.get(CLAIM_CHECK_KEY_HEADER)
+    if key is None:
+        return None
+    return str(headers[CLAIM_CHECK_BUCKET_HEADER]), str(key)
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import copy
+import functools
+import gzip
+import json
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable
+
+from faststream import BaseMiddleware
+from faststream.broker.message import encode_message
+from pydantic_core import to_jsonable_python
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from faststream.broker.message import StreamMessage
+    from faststream.types import AsyncFunc
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+
+class AmqpSerializer(str, Enum):
+    JSON = "json"
+    ORJSON = "orjson"
+    MSGSPEC = "msgspec"
+    MSGPACK = "msgpack"
+
+
+class AmqpCompression(str, Enum):
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
+class Serializer:
+    def __init__(
+        self,
+        content_type: str,
+        dumps: Callable[[Any], bytes],
+        loads: Callable[[bytes], Any],
+    ) -> None:
+        self.content_type = content_type
+        self.dumps = dumps
+        self.loads = loads
+
+
+class Compression:
+    def __init__(
+        self,
+        content_encoding: str,
+        compress: Callable[[bytes], bytes],
+        decompress: Callable[[bytes], bytes],
+    ) -> None:
+        self.content_encoding = content_encoding
+        self.compress = compress
+        self.decompress = decompress
+
+
+@functools.cache
+def get_serializer(name: AmqpSerializer) -> Serializer:
+    # third-party codecs are optional, so they are only imported when requested
+    if name == AmqpSerializer.ORJSON:
+        import orjson  # noqa: PLC0415
+
+        return Serializer(
+            content_type=JSON_CONTENT_TYPE,
+            dumps=functools.partial(orjson.dumps, default=to_jsonable_python),
+            loads=orjson.loads,
+        )
+    if name == AmqpSerializer.MSGSPEC:
+        import msgspec  # noqa: PLC0415
+
+        return Serializer(
+            content_type=JSON_CONTENT_TYPE,
+            dumps=msgspec.json.Encoder(enc_hook=to_jsonable_python).encode,
+            loads=msgspec.json.Decoder().decode,
+        )
+    if name == AmqpSerializer.MSGPACK:
+        import msgpack  # noqa: PLC0415
+
+        return Serializer(
+            content_type=MSGPACK_CONTENT_TYPE,
+            dumps=functools.partial(msgpack.packb, default=to_jsonable_python),
+            loads=msgpack.unpackb,
+        )
+    return Serializer(
+        content_type=JSON_CONTENT_TYPE,
+        dumps=_dump_json,
+        loads=json.loads,
+    )
+
+
+@functools.cache
+def get_compression(name: AmqpCompression) -> Compression:
+    if name == AmqpCompression.ZSTD:
+        import zstandard  # noqa: PLC0415
+
+        return Compression(
+            content_encoding="zstd",
+            compress=zstandard.ZstdCompressor().compress,
+            decompress=zstandard.ZstdDecompressor().decompress,
+        )
+    return Compression(
+        content_encoding="gzip",
+        compress=functools.partial(gzip.compress, compresslevel=6),
+        decompress=gzip.decompress,
+    )
+
+
+def _dump_json(obj: Any) -> bytes:  # noqa: ANN401
+    return json.dumps(to_jsonable_python(obj), separators=(",", ":")).encode()
+
+
+class AmqpCodec:
+    def __init__(
+        self,
+        serializer: AmqpSerializer = AmqpSerializer.JSON,
+        compression: AmqpCompression | None = None,
+        compression_min_size: int = 1024,
+    ) -> None:
+        self.serializer = get_serializer(serializer)
+        self.is_stdlib_json = serializer == AmqpSerializer.JSON
+        self.compression = None if compression is None else get_compression(compression)
+        self.compression_min_size = compression_min_size
+        # plain json without compression is what faststream does already
+        self.is_passthrough = self.is_stdlib_json and compression is None
+
+    def encode(self, message: Any) -> tuple[bytes, str | None, str | None]:  # noqa: ANN401
+        if message is None or isinstance(message, (bytes, str)):
+            body, content_type = encode_message(message)
+        else:
+            body, content_type = self.serializer.dumps(message), self.serializer.content_type
+
+        if self.compression is None or len(body) < self.compression_min_size:
+            return body, content_type, None
+        return self.compression.compress(body), content_type, self.compression.content_encoding
+
+    async def decode(
+        self,
+        message: StreamMessage[Any],
+        original_decoder: Callable[[StreamMessage[Any]], Awaitable[Any]],
+    ) -> Any:  # noqa: ANN401
+        content_encoding = getattr(message.raw_message, "content_encoding", None)
+        if content_encoding:
+            compression = _get_compression_by_encoding(content_encoding)
+            if compression is None:
+                # other encodings like utf-8 were not applied by a codec, so they are left alone
+                return await original_decoder(message)
+            # subscribers of the same queue share the message, so its body stays compressed
+            message = copy.copy(message)
+            message.body = compression.decompress(message.body)
+
+        content_type = (message.content_type or "").split(";", 1)[0].strip()
+        if content_type == self.serializer.content_type and not self.is_stdlib_json:
+            return self.serializer.loads(message.body)
+        if content_type == MSGPACK_CONTENT_TYPE:
+            return get_serializer(AmqpSerializer.MSGPACK).loads(message.body)
+        return await original_decoder(message)
+
+    async def publish_scope(
+        self,
+        call_next: AsyncFunc,
+        message: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        # bytes are sent as they are, which also prevents encoding a message twice
+        if isinstance(message, bytes):
+            return await call_next(message, *args, **kwargs)
+
+        body, content_type, content_encoding = self.encode(message)
+        kwargs["content_type"] = content_type
+        kwargs["content_encoding"] = content_encoding
+        return await call_next(body, *args, **kwargs)
+
+
+class CodecMiddleware(BaseMiddleware):
+    def __init__(self, msg: Any | None = None, *, codec: AmqpCodec) -> None:  # noqa: ANN401
+        super().__init__(msg)
+        self.codec = codec
+
+    async def publish_scope(
+        self,
+        call_next: AsyncFunc,
+        msg: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        return await self.codec.publish_scope(call_next, msg, *args, **kwargs)
+
+
+def _get_compression_by_encoding(content_encoding: str) -> Compression | None:
+    try:
+        compression = AmqpCompression(content_encoding)
+    except ValueError:
+        return None
+    return get_compression(compression)
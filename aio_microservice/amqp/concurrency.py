@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Callable
+
+from faststream.utils.functions import to_async
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Hashable
+
+    from aio_pika import IncomingMessage
+    from faststream.broker.message import StreamMessage
+    from faststream.broker.types import Filter
+    from faststream.types import AsyncFuncAny
+
+    Parser = Callable[[IncomingMessage], Awaitable[StreamMessage[Any]]]
+    Decoder = Callable[[StreamMessage[Any]], Awaitable[Any]]
+
+
+class SubscriberLimiter:
+    def __init__(self, queue: str, concurrency: int | None = None) -> None:
+        if concurrency is not None and concurrency < 1:
+            msg = "concurrency must be at least 1"
+            raise ValueError(msg)
+        self.queue = queue
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def __call__(self, call_next: AsyncFuncAny, message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        self.in_flight += 1
+        try:
+            if self.concurrency is None:
+                return await call_next(message)
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+            async with self._semaphore:
+                return await call_next(message)
+        finally:
+            self.in_flight -= 1
+
+
+class _LaneClaim:
+    def __init__(self, previous_turn: asyncio.Future[None] | None) -> None:
+        loop = asyncio.get_running_loop()
+        self.previous_turn = previous_turn
+        self.turn: asyncio.Future[None] = loop.create_future()
+        # the lane and its previous message are known once the message is decoded
+        self.lane = 0
+        self.previous: asyncio.Future[None] | None = None
+        self.done: asyncio.Future[None] = loop.create_future()
+
+    async def wait_for_turn(self) -> None:
+        if self.previous_turn is not None:
+            await asyncio.shield(self.previous_turn)
+
+    def pass_turn(self) -> None:
+        # the next delivery claims its lane only after the previous deliveries did
+        if self.previous_turn is None or self.previous_turn.done():
+            self.turn.set_result(None)
+        else:
+            self.previous_turn.add_done_callback(lambda _: self.turn.set_result(None))
+
+
+class SubscriberPartitioner:
+    def __init__(
+        self,
+        queue: str,
+        handler: str,
+        partition_key: Callable[[Any], Hashable],
+        lanes: int,
+        parser: Callable[[IncomingMessage, Parser], Awaitable[StreamMessage[Any]]] | None = None,
+        decoder: Callable[[StreamMessage[Any], Decoder], Awaitable[Any]] | None = None,
+    ) -> None:
+        if lanes < 1:
+            msg = "partition_lanes must be at least 1"
+            raise ValueError(msg)
+        self.queue = queue
+        self.handler = handler
+        self.partition_key = partition_key
+        self.lane_depths = [0] * lanes
+        self._lane_tails: list[asyncio.Future[None] | None] = [None] * lanes
+        self._last_turn: asyncio.Future[None] | None = None
+        self._claims: dict[int, _LaneClaim] = {}
+        self._parser = parser
+        self._decoder = decoder
+
+    async def parse(
+        self,
+        message: IncomingMessage,
+        original_parser: Parser,
+    ) -> StreamMessage[Any]:
+        # aio-pika consumes every delivery in its own task, which starts parsing in delivery
+        # order, so the turn is taken before the parser or the decoder can suspend
+        claim = _LaneClaim(previous_turn=self._last_turn)
+        self._last_turn = claim.turn
+        try:
+            if self._parser is None:
+                stream_message = await original_parser(message)
+            else:
+                stream_message = await self._parser(message, original_parser)
+        except BaseException:
+            claim.pass_turn()
+            raise
+        self._claims[id(stream_message)] = claim
+        return stream_message
+
+    async def decode(
+        self,
+        message: StreamMessage[Any],
+        original_decoder: Decoder,
+    ) -> Any:  # noqa: ANN401
+        claim = self._claims[id(message)]
+        try:
+            if self._decoder is None:
+                decoded_body = await original_decoder(message)
+            else:
+                decoded_body = await self._decoder(message, original_decoder)
+            lane = hash(self.partition_key(decoded_body)) % len(self.lane_depths)
+            await claim.wait_for_turn()
+        except BaseException:
+            del self._claims[id(message)]
+            claim.pass_turn()
+            raise
+        claim.lane = lane
+        claim.previous = self._lane_tails[lane]
+        self._lane_tails[lane] = claim.done
+        self.lane_depths[lane] += 1
+        claim.pass_turn()
+        return decoded_body
+
+    def make_filter(self, filter_: Filter[Any]) -> Callable[[StreamMessage[Any]], Awaitable[bool]]:
+        async_filter = to_async(filter_)
+
+        async def filter_claimed(message: StreamMessage[Any]) -> bool:
+            try:
+                suitable = bool(await async_filter(message))
+            except BaseException:
+                self._release(self._claims.pop(id(message)))
+                raise
+            if not suitable:
+                # the message is not handled by this subscriber, so it leaves its lane at once
+                self._release(self._claims.pop(id(message)))
+            return suitable
+
+        return filter_claimed
+
+    async def __call__(self, call_next: AsyncFuncAny, message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        claim = self._claims.pop(id(message))
+        try:
+            # each lane processes its messages one at a time, in the order of their deliveries
+            if claim.previous is not None:
+                await asyncio.shield(claim.previous)
+            return await call_next(message)
+        finally:
+            self._release(claim)
+
+    def _release(self, claim: _LaneClaim) -> None:
+        self.lane_depths[claim.lane] -= 1
+        claim.done.set_result(None)
+        if self._lane_tails[claim.lane] is claim.done:
+            self._lane_tails[claim.lane] = None
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+from faststream.exceptions import AckMessage
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from pathlib import Path
+
+    from faststream.broker.message import StreamMessage
+    from faststream.types import AsyncFuncAny
+    from prometheus_client import Counter
+
+    Decoder = Callable[[StreamMessage[Any]], Awaitable[Any]]
+
+DUPLICATE = object()
+T = TypeVar("T")
+
+
+class DedupeStore(ABC):
+    @abstractmethod
+    async def contains(self, message_id: str) -> bool: ...
+
+    @abstractmethod
+    async def add(self, message_id: str) -> None: ...
+
+    def close(self) -> None:  # noqa: B027
+        # stores without resources have nothing to release
+        ...
+
+
+class InMemoryDedupeStore(DedupeStore):
+    def __init__(self, max_size: int = 100_000, window: float = 3600.0) -> None:
+        self.max_size = max_size
+        self.window = window
+        self._seen: OrderedDict[str, float] = OrderedDict()
+
+    async def contains(self, message_id: str) -> bool:
+        seen_at = self._seen.get(message_id)
+        return seen_at is not None and time.monotonic() - seen_at < self.window
+
+    async def add(self, message_id: str) -> None:
+        now = time.monotonic()
+        self._seen[message_id] = now
+        self._seen.move_to_end(message_id)
+        # the oldest ids are first, so expired ids are evicted from the front
+        while self._seen and (
+            len(self._seen) > self.max_size or now - next(iter(self._seen.values())) >= self.window
+        ):
+            self._seen.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+class SqliteDedupeStore(DedupeStore):
+    def __init__(
+        self,
+        path: str | Path,
+        max_size: int = 1_000_000,
+        window: float = 24 * 3600.0,
+        prune_interval: int = 1000,
+    ) -> None:
+        self.max_size = max_size
+        self.window = window
+        self.prune_interval = prune_interval
+        self._added = 0
+        # sqlite blocks, so the connection is used by a single thread off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dedupe")
+        # the store outlives restarts of the consumer, which is when most redeliveries happen
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS dedupe "
+            "(message_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)",
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS dedupe_seen_at ON dedupe (seen_at)")
+
+    async def contains(self, message_id: str) -> bool:
+        return await self._run(self._contains, message_id)
+
+    async def add(self, message_id: str) -> None:
+        await self._run(self._add, message_id)
+
+    def prune(self) -> None:
+        # both deletes walk the seen_at index from the oldest ids
+        self._connection.execute(
+            "DELETE FROM dedupe WHERE seen_at <= ?",
+            (time.time() - self.window,),
+        )
+        excess = len(self) - self.max_size
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM dedupe WHERE seen_at <= "
+                "(SELECT seen_at FROM dedupe ORDER BY seen_at LIMIT 1 OFFSET ?)",
+                (excess - 1,),
+            )
+
+    def _contains(self, message_id: str) -> bool:
+        row = self._connection.execute(
+            "SELECT 1 FROM dedupe WHERE message_id = ? AND seen_at > ?",
+            (message_id, time.time() - self.window),
+        ).fetchone()
+        return row is not None
+
+    def _add(self, message_id: str) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO dedupe (message_id, seen_at) VALUES (?, ?)",
+            (message_id, time.time()),
+        )
+        self._added += 1
+        if self._added % self.prune_interval == 0:
+            self.prune()
+
+    async def _run(self, fn: Callable[[str], T], message_id: str) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, message_id)
+
+    def __len__(self) -> int:
+        return int(self._connection.execute("SELECT COUNT(*) FROM dedupe").fetchone()[0])
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._connection.close()
+
+
+class MessageDeduplicator:
+    def __init__(
+        self,
+        queue: str,
+        store: DedupeStore,
+        decoder: Callable[[StreamMessage[Any], Decoder], Awaitable[Any]],
+    ) -> None:
+        self.queue = queue
+        self.store = store
+        self.duplicate = 0
+        self.unique = 0
+        self.counters: dict[str, Counter] | None = None
+        self._decoder = decoder
+
+    async def decode(self, message: StreamMessage[Any], original_decoder: Decoder) -> Any:  # noqa: ANN401
+        # duplicates are skipped before their body is decoded
+        message_id = message.raw_message.message_id
+        if message_id is not None and await self.store.contains(message_id):
+            return DUPLICATE
+        return await self._decoder(message, original_decoder)
+
+    async def __call__(self, call_next: AsyncFuncAny, message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        if message.decoded_body is DUPLICATE:
+            self._count("duplicate")
+            raise AckMessage
+
+        self._count("unique")
+        result = await call_next(message)
+        # failed messages are not recorded, so that their redeliveries are handled
+        message_id = message.raw_message.message_id
+        if message_id is not None:
+            await self.store.add(message_id)
+        return result
+
+    def _count(self, result: str) -> None:
+        if result == "duplicate":
+            self.duplicate += 1
+        else:
+            self.unique += 1
+        if self.counters is not None:
+            self.counters[result].inc()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable
+
+from faststream import context
+from faststream.broker.wrapper.call import HandlerCallWrapper
+from faststream.utils.functions import to_async
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Hashable, Iterable, Mapping
+
+    from aio_pika import IncomingMessage
+    from faststream.broker.message import StreamMessage
+    from faststream.broker.publisher.proto import PublisherProto
+    from faststream.broker.types import Filter
+    from faststream.types import AsyncFuncAny
+
+    Parser = Callable[[IncomingMessage], Awaitable[StreamMessage[Any]]]
+    Decoder = Callable[[StreamMessage[Any]], Awaitable[Any]]
+
+OTHER_TYPE = object()
+
+
+class MessageRoute:
+    def __init__(
+        self,
+        handler: Callable[..., Any],
+        parser: Callable[[IncomingMessage, Parser], Awaitable[StreamMessage[Any]]] | None,
+        decoder: Callable[[StreamMessage[Any], Decoder], Awaitable[Any]],
+        filter_: Filter[Any],
+        middlewares: Iterable[Callable[[AsyncFuncAny, StreamMessage[Any]], Awaitable[Any]]],
+    ) -> None:
+        self.parser = parser
+        self.decoder = decoder
+        self.filter = to_async(filter_)
+        self.middlewares = list(middlewares)
+        self.publishers: list[PublisherProto[Any]] = []
+        # the handler is injected the way faststream injects the handlers of its calls
+        self._handler = HandlerCallWrapper[Any, Any, Any](handler)
+        self._handler.set_wrapped(
+            apply_types=True,
+            is_validate=True,
+            dependencies=(),
+            _get_dependant=None,
+            _call_decorators=(),
+        )
+
+    async def call(self, message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        call: AsyncFuncAny = self._handler.call_wrapped
+        # the first middleware is the innermost, as with the calls of faststream
+        for middleware in self.middlewares:
+            call = partial(middleware, call)
+        result = await call(message)
+        for route_publisher in self.publishers:
+            await route_publisher.publish(result, correlation_id=message.correlation_id)
+        return result
+
+
+class HeaderDispatcher:
+    def __init__(
+        self,
+        header: str,
+        parser: Callable[[IncomingMessage, Parser], Awaitable[StreamMessage[Any]]] | None = None,
+    ) -> None:
+        self.header = header
+        self.routes: dict[str, MessageRoute] = {}
+        self._parser = parser
+
+    def route(self, headers: Mapping[str, Any] | None) -> MessageRoute | None:
+        message_type = (headers or {}).get(self.header)
+        return self.routes.get(message_type) if isinstance(message_type, str) else None
+
+    def add(self, message_type: str, route: MessageRoute) -> MessageRoute:
+        if message_type in self.routes:
+            msg = f"Message type {message_type} is dispatched to several subscribers"
+            raise ValueError(msg)
+        self.routes[message_type] = route
+        return route
+
+    async def parse(
+        self,
+        message: IncomingMessage,
+        original_parser: Parser,
+    ) -> StreamMessage[Any]:
+        # the headers of the delivery already name the route, so only its parser runs
+        route = self.route(message.headers)
+        parser = self._parser if route is None else route.parser
+        if parser is None:
+            return await original_parser(message)
+        return await parser(message, original_parser)
+
+    async def decode(
+        self,
+        message: StreamMessage[Any],
+        original_decoder: Decoder,
+    ) -> Any:  # noqa: ANN401
+        route = self.route(message.headers)
+        if route is None:
+            return OTHER_TYPE
+        return await route.decoder(message, original_decoder)
+
+    async def filter(self, message: StreamMessage[Any]) -> bool:
+        route = self.route(message.headers)
+        return route is not None and bool(await route.filter(message))
+
+    async def handle(self, body: Any) -> Any:  # noqa: ANN401
+        message: StreamMessage[Any] = context.get_local("message")
+        # the filter of the dispatcher only lets messages of a routed type through
+        return await self.routes[message.headers[self.header]].call(message)
+
+    def make_decoder(
+        self,
+        decoder: Callable[[StreamMessage[Any], Decoder], Awaitable[Any]],
+    ) -> Callable[[StreamMessage[Any], Decoder], Awaitable[Any]]:
+        async def decode(message: StreamMessage[Any], original_decoder: Decoder) -> Any:  # noqa: ANN401
+            # messages of a dispatched type only reach other subscribers when their route
+            # rejected them, so they are not decoded again
+            if self.route(message.headers) is not None:
+                return OTHER_TYPE
+            return await decoder(message, original_decoder)
+
+        return decode
+
+    def make_filter(self, filter_: Filter[Any]) -> Callable[[StreamMessage[Any]], Awaitable[bool]]:
+        async_filter = to_async(filter_)
+
+        async def filter_dispatched(message: StreamMessage[Any]) -> bool:
+            if message.decoded_body is OTHER_TYPE:
+                return False
+            return bool(await async_filter(message))
+
+        return filter_dispatched
+
+
+def make_partition_key(partition_key: Callable[[Any], Hashable]) -> Callable[[Any], Hashable]:
+    def dispatched_partition_key(body: Any) -> Hashable:  # noqa: ANN401
+        # messages of a dispatched type leave their lane at once, so any lane will do
+        return None if body is OTHER_TYPE else partition_key(body)
+
+    return dispatched_partition_key
@@ -3,29 +3,62 @@ from __future__ import annotations
 import dataclasses
 import inspect
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Callable, ClassVar, TypeVar
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, TypeVar
 
 from faststream import BaseMiddleware, FastStream
 from faststream.broker.utils import default_filter
-from faststream.rabbit import RabbitBroker, RabbitExchange, RabbitQueue
+from faststream.rabbit import ExchangeType, RabbitExchange, RabbitQueue
+from faststream.rabbit.parser import AioPikaParser
 from faststream.security import SASLPlaintext
+from humps import kebabize
 from loguru import logger
 from pydantic import BaseModel, Field, SecretStr
 from typing_extensions import Concatenate, ParamSpec
 
 from aio_microservice.amqp.asyncapi import make_asyncapi_controller
+from aio_microservice.amqp.autotune import PrefetchSampler, PrefetchTuner
+from aio_microservice.amqp.backpressure import BackpressureController
+from aio_microservice.amqp.batching import MessageBatcher
+from aio_microservice.amqp.broker import AmqpRabbitBroker
+from aio_microservice.amqp.claim_check import ClaimCheck, ClaimCheckMiddleware
+from aio_microservice.amqp.codecs import (
+    AmqpCodec,
+    AmqpCompression,
+    AmqpSerializer,
+    CodecMiddleware,
+)
+from aio_microservice.amqp.concurrency import SubscriberLimiter, SubscriberPartitioner
+from aio_microservice.amqp.dedupe import DedupeStore, MessageDeduplicator
+from aio_microservice.amqp.dispatch import HeaderDispatcher, MessageRoute, make_partition_key
+from aio_microservice.amqp.hashing import HashKeyRouter, consistent_hash_exchange, hash_queue
+from aio_microservice.amqp.publishing import PublishPipeline
+from aio_microservice.amqp.retries import AmqpRetryPolicy, SubscriberRetrier
+from aio_microservice.amqp.rpc import RpcClient
+from aio_microservice.amqp.streams import (
+    StreamOffsetCommitter,
+    StreamOffsetSpec,
+    StreamOffsetStore,
+    StreamOffsetTracker,
+    stream_queue,
+)
+from aio_microservice.amqp.trusted import SchemaVersionStamp, TrustedModelBuilder
 from aio_microservice.core.abc import (
+    PROMETHEUS_EXTENSION,
     ExtensionABC,
+    has_extension,
     litestar_on_app_init,
     readiness_probe,
     shutdown_hook,
     startup_hook,
     startup_message,
 )
+from aio_microservice.core.load import LoadMonitor
+from aio_microservice.executor.extension import make_offloaded
 from aio_microservice.types import Port  # noqa: TCH001
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Hashable, Iterable
 
     from aio_pika.abc import TimeoutType
     from faststream.broker.types import (
@@ -38,6 +71,8 @@ if TYPE_CHECKING:
     from faststream.types import AnyDict
     from litestar.config.app import AppConfig
 
+    from aio_microservice.executor.extension import ExecutorKind
+
 
 class AmqpSettings(BaseModel):
     host: str = Field(
@@ -48,6 +83,21 @@ class AmqpSettings(BaseModel):
         default=5672,
         description="The port for connecting to the broker.",
     )
+    failover_hosts: list[str] = Field(
+        default=[],
+        description="Further nodes of the cluster to fail over to, as host or host:port.",
+    )
+    spread_consumers: bool = Field(
+        default=False,
+        description="Whether to consume each queue over a connection to its own node.",
+    )
+    replica_name: str | None = Field(
+        default=None,
+        description=(
+            "The stable name of this replica, e.g. the pod name of a StatefulSet, which suffixes "
+            "the durable queues of its hash subscribers (required by hash subscribers)."
+        ),
+    )
     username: str = Field(
         default="guest",
         description="The username for authentication on the broker.",
@@ -60,16 +110,139 @@ class AmqpSettings(BaseModel):
         default=None,
         description="The prefetch window size.",
     )
+    prefetch_auto_tune: bool = Field(
+        default=False,
+        description="Whether to tune the prefetch window of subscribers from their latency.",
+    )
+    prefetch_auto_tune_min_count: int = Field(
+        default=1,
+        description="The lower bound of auto-tuned prefetch windows.",
+    )
+    prefetch_auto_tune_max_count: int = Field(
+        default=1000,
+        description="The upper bound of auto-tuned prefetch windows.",
+    )
+    prefetch_auto_tune_interval: float = Field(
+        default=10.0,
+        description="The interval for tuning the prefetch windows (in seconds).",
+    )
+    stream_prefetch_count: int = Field(
+        default=1000,
+        description="The prefetch window size of stream subscribers without a prefetch.",
+    )
+    stream_offset_commit_interval: float = Field(
+        default=5.0,
+        description="The interval for persisting the offsets of stream subscribers (in seconds).",
+    )
     timeout_graceful_shutdown: float | None = Field(
         default=None,
         description="The timeout for graceful shutdown (in seconds).",
     )
+    declare_topology: bool = Field(
+        default=True,
+        description="Whether to declare queues, exchanges and bindings instead of assuming them.",
+    )
+    publish_connection: bool = Field(
+        default=True,
+        description="Whether to publish over a dedicated connection.",
+    )
+    publish_channel_pool_size: int = Field(
+        default=4,
+        description="The number of channels used for publishing on the dedicated connection.",
+    )
+    publish_max_outstanding: int = Field(
+        default=1000,
+        description="The maximum number of unconfirmed messages of the publish pipeline.",
+    )
+    serializer: AmqpSerializer = Field(
+        default=AmqpSerializer.JSON,
+        description="The serializer used for publishing messages.",
+    )
+    compression: AmqpCompression | None = Field(
+        default=None,
+        description="The compression used for publishing messages.",
+    )
+    compression_min_size: int = Field(
+        default=1024,
+        description="The minimum size of a message body to be compressed (in bytes).",
+    )
+    claim_check_bucket: str | None = Field(
+        default=None,
+        description="The bucket to offload large message bodies to (requires the S3Extension).",
+    )
+    claim_check_threshold: int = Field(
+        default=1024 * 1024,
+        description="The minimum size of a message body to be offloaded (in bytes).",
+    )
+    claim_check_prefix: str = Field(
+        default="claim-check/",
+        description="The key prefix of offloaded message bodies, e.g. for lifecycle rules.",
+    )
+    claim_check_delete_consumed: bool = Field(
+        default=False,
+        description=(
+            "Whether to delete offloaded message bodies after consuming them. "
+            "Only for messages consumed by a single queue, others expire with a lifecycle rule."
+        ),
+    )
+    claim_check_cache_size: int = Field(
+        default=64 * 1024 * 1024,
+        description="The maximum size of cached offloaded message bodies (in bytes).",
+    )
+    backpressure: bool = Field(
+        default=False,
+        description="Whether to throttle consuming while the http server is under load.",
+    )
+    backpressure_interval: float = Field(
+        default=0.5,
+        description="The interval for measuring the load (in seconds).",
+    )
+    backpressure_throttle_loop_lag: float = Field(
+        default=0.05,
+        description="The event loop lag above which the prefetch count is lowered (in seconds).",
+    )
+    backpressure_pause_loop_lag: float = Field(
+        default=0.2,
+        description="The event loop lag above which consuming is paused (in seconds).",
+    )
+    backpressure_throttle_http_requests: int = Field(
+        default=50,
+        description="The number of in-flight http requests above which the prefetch is lowered.",
+    )
+    backpressure_pause_http_requests: int = Field(
+        default=200,
+        description="The number of in-flight http requests above which consuming is paused.",
+    )
+    backpressure_throttle_prefetch_count: int = Field(
+        default=1,
+        description="The prefetch count of subscribers while consuming is throttled.",
+    )
+    backpressure_cooldown: float = Field(
+        default=5.0,
+        description="The time the load must stay lower before consuming recovers (in seconds).",
+    )
+
+
+S3_EXTENSION = ("aio_microservice.s3.extension", "S3Extension")
 
 
 class AmqpExtensionImpl:
     def __init__(self, service: AmqpExtension, settings: AmqpSettings) -> None:
         self._service = service
         self._settings = settings
+        self._batchers: list[MessageBatcher] = []
+        self._subscriber_limiters: list[SubscriberLimiter] = []
+        self._subscriber_partitioners: list[SubscriberPartitioner] = []
+        self._trusted_model_builders: list[TrustedModelBuilder] = []
+        self._deduplicators: list[MessageDeduplicator] = []
+        self._header_dispatchers: dict[str, HeaderDispatcher] = {}
+        self._instrumented = has_extension(service, *PROMETHEUS_EXTENSION)
+        self._codec = AmqpCodec(
+            serializer=settings.serializer,
+            compression=settings.compression,
+            compression_min_size=settings.compression_min_size,
+        )
+        self._claim_check = self._create_claim_check(service=service)
         self._faststream_rabbit_broker = self._create_faststream_broker(
             service=service,
         )
@@ -77,26 +250,118 @@ class AmqpExtensionImpl:
             service=service,
             broker=self._faststream_rabbit_broker,
         )
+        self._publish_pipeline = PublishPipeline(
+            broker=self._faststream_rabbit_broker,
+            max_outstanding=settings.publish_max_outstanding,
+        )
+        self._rpc_client = self._create_rpc_client()
+        self._backpressure = self._create_backpressure()
+        self._prefetch_tuner = self._create_prefetch_tuner()
+        self._stream_offsets = StreamOffsetCommitter(
+            interval=settings.stream_offset_commit_interval,
+        )
         self._asyncapi_controller = make_asyncapi_controller(
             app=self._faststream_app,
         )
         self._register_handlers()
+        self._register_metrics()
 
-    def _create_faststream_broker(self, service: AmqpExtension) -> RabbitBroker:
+    def _create_claim_check(self, service: AmqpExtension) -> ClaimCheck | None:
+        if self._settings.claim_check_bucket is None:
+            return None
+        if not has_extension(service, *S3_EXTENSION):
+            msg = "Offloading message bodies requires the S3Extension"
+            raise TypeError(msg)
+        return ClaimCheck(
+            service=service,  # type: ignore[arg-type]
+            codec=self._codec,
+            bucket=self._settings.claim_check_bucket,
+            threshold=self._settings.claim_check_threshold,
+            prefix=self._settings.claim_check_prefix,
+            delete_consumed=self._settings.claim_check_delete_consumed,
+            cache_size=self._settings.claim_check_cache_size,
+        )
+
+    def _create_faststream_broker(self, service: AmqpExtension) -> AmqpRabbitBroker:
         security = SASLPlaintext(
             username=self._settings.username,
             password=self._settings.password.get_secret_value(),
         )
-        return RabbitBroker(
+        middlewares: list[Any] = list(service.__amqp_middlewares__)
+        if not self._codec.is_passthrough:
+            middlewares.append(partial(CodecMiddleware, codec=self._codec))
+        if self._claim_check is not None:
+            # the first middleware is the innermost, so it sees the encoded message body
+            middlewares.insert(0, partial(ClaimCheckMiddleware, claim_check=self._claim_check))
+        if self._instrumented:
+            from aio_microservice.amqp.instrumentation import (  # noqa: PLC0415
+                InstrumentationMiddleware,
+                PublishInstrumentation,
+            )
+
+            instrumentation = PublishInstrumentation(app_name=kebabize(service.__class__.__name__))
+            # the innermost middleware times the producer, the outermost the whole publish
+            middlewares.insert(
+                0,
+                partial(InstrumentationMiddleware, scope=instrumentation.confirm_scope),
+            )
+            middlewares.append(
+                partial(InstrumentationMiddleware, scope=instrumentation.publish_scope),
+            )
+        return AmqpRabbitBroker(
             host=self._settings.host,
             port=self._settings.port,
             security=security,
-            middlewares=service.__amqp_middlewares__,
+            middlewares=middlewares,
+            decoder=self._codec.decode,
+            parser=None if self._claim_check is None else self._claim_check.parse,
             max_consumers=self._settings.prefetch_count,
             graceful_timeout=self._settings.timeout_graceful_shutdown,
+            publish_connection=self._settings.publish_connection,
+            publish_channel_pool_size=self._settings.publish_channel_pool_size,
+            declare_topology=self._settings.declare_topology,
+            failover_hosts=self._settings.failover_hosts,
+            spread_consumers=self._settings.spread_consumers,
+        )
+
+    def _create_rpc_client(self) -> RpcClient:
+        parser = AioPikaParser().parse_message
+        if self._claim_check is not None:
+            parser = partial(self._claim_check.parse, original_parser=parser)
+        return RpcClient(broker=self._faststream_rabbit_broker, codec=self._codec, parser=parser)
+
+    def _create_backpressure(self) -> BackpressureController | None:
+        if not self._settings.backpressure:
+            return None
+        return BackpressureController(
+            broker=self._faststream_rabbit_broker,
+            monitor=LoadMonitor(),
+            interval=self._settings.backpressure_interval,
+            throttle_loop_lag=self._settings.backpressure_throttle_loop_lag,
+            pause_loop_lag=self._settings.backpressure_pause_loop_lag,
+            throttle_http_requests=self._settings.backpressure_throttle_http_requests,
+            pause_http_requests=self._settings.backpressure_pause_http_requests,
+            throttle_prefetch_count=self._settings.backpressure_throttle_prefetch_count,
+            cooldown=self._settings.backpressure_cooldown,
+        )
+
+    def _create_prefetch_tuner(self) -> PrefetchTuner | None:
+        if not self._settings.prefetch_auto_tune:
+            return None
+        return PrefetchTuner(
+            broker=self._faststream_rabbit_broker,
+            min_prefetch_count=self._settings.prefetch_auto_tune_min_count,
+            max_prefetch_count=self._settings.prefetch_auto_tune_max_count,
+            initial_prefetch_count=self._settings.prefetch_count,
+            interval=self._settings.prefetch_auto_tune_interval,
+            backpressure=self._backpressure,
         )
 
-    def _create_faststream_app(self, service: AmqpExtension, broker: RabbitBroker) -> FastStream:
+    def _create_faststream_app(
+        self,
+        service: AmqpExtension,
+        broker: AmqpRabbitBroker,
+    ) -> FastStream:
         return FastStream(
             broker=broker,
             title=service.__class__.__name__,
@@ -109,25 +374,579 @@ class AmqpExtensionImpl:
             object=self._service,
             predicate=lambda obj: hasattr(obj, AmqpDecorator.MARKER),
         )
+        for _, handler_method in handler_methods:
+            self._create_dispatchers(getattr(handler_method, AmqpDecorator.MARKER))
         for handler_name, _ in handler_methods:
             handler = getattr(self._service, handler_name)
             handler_settings = getattr(handler, AmqpDecorator.MARKER)
+            handler = self._offload_handler(handler=handler, handler_settings=handler_settings)
             for handler_setting in handler_settings:
                 if isinstance(handler_setting, subscriber):
-                    subscriber_decorator = self._faststream_rabbit_broker.subscriber(
-                        **dataclasses.asdict(handler_setting),
+                    handler = self._register_subscriber(
+                        handler=handler,
+                        handler_name=handler_name,
+                        handler_setting=handler_setting,
+                        handler_settings=handler_settings,
                     )
-                    handler = subscriber_decorator(handler)
                 elif isinstance(handler_setting, publisher):  # pragma: no branch
-                    publisher_decorator = self._faststream_rabbit_broker.publisher(
-                        **dataclasses.asdict(handler_setting),
+                    handler = self._register_publisher(
+                        handler=handler,
+                        handler_setting=handler_setting,
                     )
-                    handler = publisher_decorator(handler)
+
+    def _offload_handler(
+        self,
+        handler: Any,  # noqa: ANN401
+        handler_settings: list[AmqpDecorator],
+    ) -> Any:  # noqa: ANN401
+        executors = {
+            setting.executor
+            for setting in handler_settings
+            if isinstance(setting, subscriber) and setting.executor is not None
+        }
+        if not executors:
+            return handler
+        if len(executors) > 1:
+            msg = f"Subscribers of {handler.__name__} must use the same executor"
+            raise ValueError(msg)
+        return make_offloaded(service=self._service, kind=executors.pop(), fn=handler)
+
+    def _register_subscriber(
+        self,
+        handler: Any,  # noqa: ANN401
+        handler_name: str,
+        handler_setting: subscriber,
+        handler_settings: list[AmqpDecorator],
+    ) -> Any:  # noqa: ANN401
+        queue, exchange = self._subscriber_binding(handler_setting)
+        queue_name = queue.name
+        self._check_claim_check_consumer(handler_setting)
+
+        if handler_setting.trusted:
+            if handler_setting.batch_size is not None:
+                msg = "Batch subscribers can not be trusted"
+                raise ValueError(msg)
+            builder = TrustedModelBuilder(
+                handler=handler,
+                queue=queue_name,
+                schema_version=handler_setting.schema_version,
+            )
+            self._trusted_model_builders.append(builder)
+            handler = builder.make_handler()
+
+        if handler_setting.batch_size is not None:
+            if handler_setting.partition_key is not None:
+                msg = "Batch subscribers can not be partitioned"
+                raise ValueError(msg)
+            if any(isinstance(setting, publisher) for setting in handler_settings):
+                msg = "Batch subscribers can not be combined with publishers"
+                raise ValueError(msg)
+            prefetch_count = self._settings.prefetch_count
+            if prefetch_count is not None and prefetch_count < handler_setting.batch_size:
+                logger.warning(
+                    "Prefetch count {} is smaller than batch size {}",
+                    prefetch_count,
+                    handler_setting.batch_size,
+                )
+            batcher = MessageBatcher(
+                handler=handler,
+                batch_size=handler_setting.batch_size,
+                batch_timeout=handler_setting.batch_timeout,
+            )
+            self._batchers.append(batcher)
+            handler = batcher.make_collector()
+
+        middlewares = self._subscriber_middlewares(
+            queue_name=queue_name,
+            handler_setting=handler_setting,
+        )
+        stream_tracker = self._create_stream_tracker(
+            queue_name=queue_name,
+            handler_setting=handler_setting,
+        )
+        sampler: PrefetchSampler | None = None
+        if (
+            self._prefetch_tuner is not None
+            and stream_tracker is None
+            and not (handler_setting.prefetch or handler_setting.concurrency)
+        ):
+            sampler = PrefetchSampler()
+            # the first middleware is the innermost, so only the handler is timed
+            middlewares.insert(0, sampler)
+
+        broker_kwargs = _broker_kwargs(handler_setting)
+        broker_kwargs["decoder"] = self._subscriber_decoder(
+            handler_name=handler_name,
+            queue_name=queue_name,
+            handler_setting=handler_setting,
+            middlewares=middlewares,
+        )
+        broker_kwargs["filter"] = self._subscriber_filter(
+            queue_name=queue_name,
+            handler_setting=handler_setting,
+        )
+        partitioner = self._create_partitioner(
+            handler_name=handler_name,
+            queue_name=queue_name,
+            handler_setting=handler_setting,
+            decoder=broker_kwargs["decoder"],
+        )
+        if partitioner is not None:
+            # the last middleware is the outermost, so a skipped duplicate still leaves its lane
+            middlewares.append(partitioner)
+            # lanes are claimed while parsing and decoding, which may suspend
+            broker_kwargs["parser"] = partitioner.parse
+            broker_kwargs["decoder"] = partitioner.decode
+            broker_kwargs["filter"] = partitioner.make_filter(broker_kwargs["filter"])
+        broker_kwargs["queue"], broker_kwargs["exchange"] = queue, exchange
+        if stream_tracker is not None:
+            # the last middleware is the outermost, so offsets complete after retries and lanes
+            middlewares.append(stream_tracker)
+            # a parser of the subscriber replaces the one of the broker
+            default_parser = None if self._claim_check is None else self._claim_check.parse
+            broker_kwargs["parser"] = stream_tracker.make_parser(
+                broker_kwargs.get("parser", default_parser),
+            )
+            broker_kwargs["decoder"] = stream_tracker.make_decoder(broker_kwargs["decoder"])
+            broker_kwargs["filter"] = stream_tracker.make_filter(broker_kwargs["filter"])
+            broker_kwargs["queue"] = stream_queue(queue)
+            broker_kwargs["consume_args"] = stream_tracker.consume_args
+        broker_kwargs["middlewares"] = middlewares
+        return self._add_subscriber_call(
+            handler=handler,
+            queue_name=queue_name,
+            handler_setting=handler_setting,
+            broker_kwargs=broker_kwargs,
+            sampler=sampler,
+        )
+
+    def _add_subscriber_call(
+        self,
+        handler: Any,  # noqa: ANN401
+        queue_name: str,
+        handler_setting: subscriber,
+        broker_kwargs: AnyDict,
+        sampler: PrefetchSampler | None,
+    ) -> Any:  # noqa: ANN401
+        subscriber_decorator = self._faststream_rabbit_broker.subscriber(**broker_kwargs)
+        self._set_subscriber_prefetch_count(
+            subscriber=subscriber_decorator,
+            queue_name=queue_name,
+            handler_setting=handler_setting,
+            sampler=sampler,
+        )
+        if handler_setting.message_type is None:
+            return subscriber_decorator(handler)
+        # the dispatcher of the queue calls the handler, so it is not added as a call
+        return self._header_dispatchers[queue_name].add(
+            message_type=handler_setting.message_type,
+            route=MessageRoute(
+                handler=handler,
+                # a parser of the subscriber replaces the one of the broker
+                parser=broker_kwargs.get(
+                    "parser",
+                    None if self._claim_check is None else self._claim_check.parse,
+                ),
+                decoder=broker_kwargs["decoder"],
+                filter_=broker_kwargs["filter"],
+                middlewares=broker_kwargs["middlewares"],
+            ),
+        )
+
+    def _create_dispatchers(self, handler_settings: list[AmqpDecorator]) -> None:
+        # the dispatcher of a queue must be its first call, so it is registered before any
+        # subscriber
+        for handler_setting in handler_settings:
+            if not isinstance(handler_setting, subscriber) or handler_setting.message_type is None:
+                continue
+            if handler_setting.stream_offset is not None:
+                # the offsets of a stream are tracked per subscriber, not per message type
+                msg = "Stream subscribers can not use a message type"
+                raise ValueError(msg)
+            queue, exchange = self._subscriber_binding(handler_setting)
+            dispatcher = self._header_dispatchers.get(queue.name)
+            if dispatcher is None:
+                dispatcher = HeaderDispatcher(
+                    header=handler_setting.type_header,
+                    # a parser of the subscriber replaces the one of the broker
+                    parser=None if self._claim_check is None else self._claim_check.parse,
+                )
+                self._header_dispatchers[queue.name] = dispatcher
+                self._register_dispatcher(
+                    dispatcher=dispatcher,
+                    queue=queue,
+                    exchange=exchange,
+                    handler_setting=handler_setting,
+                )
+            elif dispatcher.header != handler_setting.type_header:
+                msg = "Subscribers of a queue must dispatch on the same header"
+                raise ValueError(msg)
+
+    def _register_dispatcher(
+        self,
+        dispatcher: HeaderDispatcher,
+        queue: RabbitQueue,
+        exchange: RabbitExchange | str | None,
+        handler_setting: subscriber,
+    ) -> None:
+        broker_kwargs = _broker_kwargs(handler_setting)
+        broker_kwargs["queue"], broker_kwargs["exchange"] = queue, exchange
+        broker_kwargs["middlewares"] = ()
+        broker_kwargs["parser"] = dispatcher.parse
+        broker_kwargs["decoder"] = dispatcher.decode
+        broker_kwargs["filter"] = dispatcher.filter
+        # a single call routes every message type of the queue, so faststream only tries the
+        # subscribers without a message type in turn for messages of other types
+        self._faststream_rabbit_broker.subscriber(**broker_kwargs)(dispatcher.handle)
+
+    def _subscriber_binding(
+        self,
+        handler_setting: subscriber,
+    ) -> tuple[RabbitQueue, RabbitExchange | str | None]:
+        if handler_setting.hash_weight is None:
+            return RabbitQueue.validate(handler_setting.queue), handler_setting.exchange
+        if self._settings.replica_name is None:
+            # the queues are durable, so a name changing with every restart would strand them
+            msg = "Hash subscribers require a stable replica_name"
+            raise ValueError(msg)
+        queue = hash_queue(
+            queue=handler_setting.queue,
+            replica=self._settings.replica_name,
+            weight=handler_setting.hash_weight,
+        )
+        return queue, consistent_hash_exchange(handler_setting.exchange)
+
+    def _set_subscriber_prefetch_count(
+        self,
+        subscriber: Any,  # noqa: ANN401
+        queue_name: str,
+        handler_setting: subscriber,
+        sampler: PrefetchSampler | None,
+    ) -> None:
+        prefetch_count = handler_setting.prefetch or handler_setting.concurrency
+        if sampler is not None and self._prefetch_tuner is not None:
+            prefetch_count = self._prefetch_tuner.add_sampler(
+                subscriber=subscriber,
+                queue=queue_name,
+                sampler=sampler,
+            )
+        elif prefetch_count is None and handler_setting.stream_offset is not None:
+            # stream consumers require a prefetch count, and a large one replays at stream speed
+            prefetch_count = self._settings.stream_prefetch_count
+        elif prefetch_count is None and self._backpressure is not None:
+            # backpressure adjusts the prefetch count, which requires a channel per subscriber
+            prefetch_count = self._settings.prefetch_count or 0
+        if prefetch_count is not None:
+            self._faststream_rabbit_broker.set_subscriber_prefetch_count(
+                subscriber=subscriber,
+                prefetch_count=prefetch_count,
+            )
+
+    def _create_stream_tracker(
+        self,
+        queue_name: str,
+        handler_setting: subscriber,
+    ) -> StreamOffsetTracker | None:
+        if handler_setting.stream_offset is None:
+            if handler_setting.stream_offset_store is not None:
+                msg = "Only stream subscribers can track offsets"
+                raise ValueError(msg)
+            return None
+        if (
+            handler_setting.retry
+            or handler_setting.retry_policy is not None
+            or handler_setting.no_ack
+        ):
+            # streams neither requeue messages nor deliver them without acknowledgements
+            msg = "Stream subscribers can not use retry, retry_policy or no_ack"
+            raise ValueError(msg)
+        tracker = StreamOffsetTracker(
+            queue=queue_name,
+            offset=handler_setting.stream_offset,
+            store=handler_setting.stream_offset_store,
+            consume_args=handler_setting.consume_args,
+        )
+        self._stream_offsets.add_tracker(tracker)
+        return tracker
+
+    def _subscriber_decoder(
+        self,
+        handler_name: str,
+        queue_name: str,
+        handler_setting: subscriber,
+        middlewares: list[Any],
+    ) -> Callable[..., Any]:
+        decoder: Callable[..., Any] = (handler_setting.codec or self._codec).decode
+
+        if handler_setting.dedupe is not None:
+            deduplicator = MessageDeduplicator(
+                queue=queue_name,
+                store=handler_setting.dedupe,
+                decoder=decoder,
+            )
+            self._deduplicators.append(deduplicator)
+            # the last middleware is the outermost, so duplicates are skipped before anything else
+            middlewares.append(deduplicator)
+            decoder = deduplicator.decode
+
+        if self._instrumented:
+            from aio_microservice.amqp.instrumentation import (  # noqa: PLC0415
+                SubscriberInstrumentation,
+            )
+
+            instrumentation = SubscriberInstrumentation(
+                app_name=kebabize(self._service.__class__.__name__),
+                queue=queue_name,
+                handler=handler_name,
+                decoder=decoder,
+            )
+            # the handler duration and the outcome cover all other middlewares
+            middlewares.append(instrumentation)
+            decoder = instrumentation.decode
+
+        dispatcher = self._header_dispatchers.get(queue_name)
+        if dispatcher is not None and handler_setting.message_type is None:
+            decoder = dispatcher.make_decoder(decoder)
+
+        return decoder
+
+    def _subscriber_filter(
+        self,
+        queue_name: str,
+        handler_setting: subscriber,
+    ) -> Filter[Any]:
+        dispatcher = self._header_dispatchers.get(queue_name)
+        if dispatcher is None or handler_setting.message_type is not None:
+            return handler_setting.filter
+        return dispatcher.make_filter(handler_setting.filter)
+
+    def _subscriber_middlewares(
+        self,
+        queue_name: str,
+        handler_setting: subscriber,
+    ) -> list[Any]:
+        middlewares: list[Any] = list(handler_setting.middlewares)
+
+        if handler_setting.retry_policy is not None:
+            if handler_setting.retry:
+                # requeueing at once would bypass the delays of the retry policy
+                msg = "Subscribers with a retry policy can not use retry"
+                raise ValueError(msg)
+            retrier = SubscriberRetrier(
+                broker=self._faststream_rabbit_broker,
+                queue=queue_name,
+                policy=handler_setting.retry_policy,
+            )
+            middlewares.append(retrier)
+
+        limiter = SubscriberLimiter(queue=queue_name, concurrency=handler_setting.concurrency)
+        self._subscriber_limiters.append(limiter)
+        middlewares.append(limiter)
+
+        return middlewares
+
+    def _create_partitioner(
+        self,
+        handler_name: str,
+        queue_name: str,
+        handler_setting: subscriber,
+        decoder: Callable[..., Any],
+    ) -> SubscriberPartitioner | None:
+        if handler_setting.partition_key is None:
+            return None
+        partition_key = handler_setting.partition_key
+        if queue_name in self._header_dispatchers and handler_setting.message_type is None:
+            partition_key = make_partition_key(partition_key)
+        partitioner = SubscriberPartitioner(
+            queue=queue_name,
+            handler=handler_name,
+            partition_key=partition_key,
+            lanes=handler_setting.partition_lanes,
+            # a parser or decoder of the subscriber replaces the one of the broker
+            parser=None if self._claim_check is None else self._claim_check.parse,
+            decoder=decoder,
+        )
+        self._subscriber_partitioners.append(partitioner)
+        return partitioner
+
+    def _register_publisher(
+        self,
+        handler: Any,  # noqa: ANN401
+        handler_setting: publisher,
+    ) -> Any:  # noqa: ANN401
+        middlewares: list[PublisherMiddleware] = list(handler_setting.middlewares)
+        if handler_setting.schema_version is not None:
+            middlewares.append(SchemaVersionStamp(schema_version=handler_setting.schema_version))
+        if handler_setting.codec is not None:
+            # the last middleware is the outermost, so it encodes before the broker codec
+            middlewares.append(handler_setting.codec.publish_scope)
+        if handler_setting.hash_key is not None:
+            # the outermost middleware takes the key from the message before it is encoded
+            middlewares.append(HashKeyRouter(key=handler_setting.hash_key))
+
+        broker_kwargs = _broker_kwargs(handler_setting)
+        broker_kwargs["middlewares"] = middlewares
+        if handler_setting.hash_key is not None:
+            broker_kwargs["exchange"] = consistent_hash_exchange(handler_setting.exchange)
+        publisher_decorator = self._faststream_rabbit_broker.publisher(**broker_kwargs)
+        if isinstance(handler, MessageRoute):
+            # faststream does not call the handlers of routes, so the route publishes their results
+            handler.publishers.append(publisher_decorator)
+            return handler
+        return publisher_decorator(handler)
+
+    def _check_claim_check_consumer(self, handler_setting: subscriber) -> None:
+        if self._claim_check is None or not self._claim_check.delete_consumed:
+            return
+        # the first consumer deletes the body, which the other queues of a fan-out still need
+        exchange = RabbitExchange.validate(handler_setting.exchange)
+        if exchange.type in (ExchangeType.FANOUT, ExchangeType.TOPIC, ExchangeType.HEADERS):
+            msg = "Subscribers of fanout, topic or headers exchanges can not delete claim checks"
+            raise ValueError(msg)
+
+    def _register_metrics(self) -> None:
+        if not self._instrumented:
+            return
+
+        from aio_microservice.amqp.metrics import (  # noqa: PLC0415
+            DEDUPLICATED_MESSAGES,
+            IN_FLIGHT_MESSAGES,
+            PARTITION_LANE_DEPTH,
+            PREFETCH_COUNT,
+            STREAM_OFFSET,
+            TRUSTED_MESSAGES,
+        )
+
+        app_name = kebabize(self._service.__class__.__name__)
+        for queue in self.in_flight_messages:
+            IN_FLIGHT_MESSAGES.labels(app_name=app_name, queue=queue).set_function(
+                partial(self._get_in_flight_messages, queue),
+            )
+        if self._prefetch_tuner is not None:
+            for window in self._prefetch_tuner.windows.values():
+                PREFETCH_COUNT.labels(app_name=app_name, queue=window.queue).set_function(
+                    partial(getattr, window, "prefetch_count"),
+                )
+        for tracker in self._stream_offsets.trackers:
+            STREAM_OFFSET.labels(app_name=app_name, queue=tracker.queue).set_function(
+                partial(self._get_stream_offset, tracker),
+            )
+        for partitioner in self._subscriber_partitioners:
+            for lane in range(len(partitioner.lane_depths)):
+                PARTITION_LANE_DEPTH.labels(
+                    app_name=app_name,
+                    queue=partitioner.queue,
+                    handler=partitioner.handler,
+                    lane=str(lane),
+                ).set_function(partial(partitioner.lane_depths.__getitem__, lane))
+        for builder in self._trusted_model_builders:
+            builder.counters = {
+                path: TRUSTED_MESSAGES.labels(app_name=app_name, queue=builder.queue, path=path)
+                for path in ("constructed", "validated")
+            }
+        for deduplicator in self._deduplicators:
+            deduplicator.counters = {
+                result: DEDUPLICATED_MESSAGES.labels(
+                    app_name=app_name,
+                    queue=deduplicator.queue,
+                    result=result,
+                )
+                for result in ("duplicate", "unique")
+            }
+
+    def _get_in_flight_messages(self, queue: str) -> int:
+        return self.in_flight_messages[queue]
+
+    def _get_stream_offset(self, tracker: StreamOffsetTracker) -> int:
+        committed = tracker.committed
+        return -1 if committed is None else committed
+
+    def _close_stores(self) -> None:
+        stores: list[DedupeStore | StreamOffsetStore | None] = [
+            *(deduplicator.store for deduplicator in self._deduplicators),
+            *(tracker.store for tracker in self._stream_offsets.trackers),
+        ]
+        # subscribers may share a store, which is closed once
+        for store in {id(store): store for store in stores if store is not None}.values():
+            store.close()
+
+    async def rpc(
+        self,
+        queue: str,
+        message: Any = None,  # noqa: ANN401
+        *,
+        timeout: float = 30.0,
+        headers: dict[str, Any] | None = None,
+    ) -> Any:  # noqa: ANN401
+        return await self._rpc_client.call(queue, message, timeout=timeout, headers=headers)
 
     @property
-    def broker(self) -> RabbitBroker:
+    def broker(self) -> AmqpRabbitBroker:
         return self._faststream_rabbit_broker
 
+    @property
+    def claim_check(self) -> ClaimCheck | None:
+        return self._claim_check
+
+    @property
+    def backpressure(self) -> BackpressureController | None:
+        return self._backpressure
+
+    @property
+    def prefetch_counts(self) -> dict[str, int]:
+        if self._prefetch_tuner is None:
+            return {}
+        return {
+            window.queue: window.prefetch_count for window in self._prefetch_tuner.windows.values()
+        }
+
+    @property
+    def publish_pipeline(self) -> PublishPipeline:
+        return self._publish_pipeline
+
+    @property
+    def in_flight_messages(self) -> dict[str, int]:
+        in_flight_messages: dict[str, int] = {}
+        for limiter in self._subscriber_limiters:
+            in_flight_messages[limiter.queue] = (
+                in_flight_messages.get(limiter.queue, 0) + limiter.in_flight
+            )
+        return in_flight_messages
+
+    @property
+    def partition_lane_depths(self) -> dict[str, list[int]]:
+        return {
+            partitioner.handler: list(partitioner.lane_depths)
+            for partitioner in self._subscriber_partitioners
+        }
+
+    @property
+    def trusted_messages(self) -> dict[str, dict[str, int]]:
+        trusted_messages: dict[str, dict[str, int]] = {}
+        for builder in self._trusted_model_builders:
+            counts = trusted_messages.setdefault(builder.queue, {"constructed": 0, "validated": 0})
+            counts["constructed"] += builder.constructed
+            counts["validated"] += builder.validated
+        return trusted_messages
+
+    @property
+    def stream_offsets(self) -> dict[str, int | None]:
+        return {tracker.queue: tracker.committed for tracker in self._stream_offsets.trackers}
+
+    @property
+    def dedupe_hit_rates(self) -> dict[str, float]:
+        counts: dict[str, tuple[int, int]] = {}
+        for deduplicator in self._deduplicators:
+            duplicate, total = counts.get(deduplicator.queue, (0, 0))
+            counts[deduplicator.queue] = (
+                duplicate + deduplicator.duplicate,
+                total + deduplicator.duplicate + deduplicator.unique,
+            )
+        return {
+            queue: duplicate / total if total else 0.0
+            for queue, (duplicate, total) in counts.items()
+        }
+
 
 class AmqpExtensionSettings(BaseModel):
     amqp: AmqpSettings = AmqpSettings()
@@ -142,6 +961,8 @@ class AmqpExtension(ExtensionABC):
     @litestar_on_app_init
     def amqp_litestar_on_app_init(self, app_config: AppConfig) -> AppConfig:
         app_config.route_handlers.append(self.amqp._asyncapi_controller)
+        if self.amqp._backpressure is not None:
+            app_config.middleware.append(self.amqp._backpressure.monitor.middleware)
         return app_config
 
     @startup_message
@@ -158,19 +979,39 @@ class AmqpExtension(ExtensionABC):
     @startup_hook
     async def _amqp_startup_hook(self) -> None:
         logger.info("Connecting to broker")
+        await self.amqp._stream_offsets.resume()
         await self.amqp._faststream_rabbit_broker.start()
+        self.amqp._stream_offsets.start()
+        if self.amqp._backpressure is not None:
+            self.amqp._backpressure.start()
+        if self.amqp._prefetch_tuner is not None:
+            self.amqp._prefetch_tuner.start()
 
     @shutdown_hook
     async def _amqp_shutdown_hook(self) -> None:
         logger.info("Disconnecting from broker")
+        if self.amqp._prefetch_tuner is not None:
+            await self.amqp._prefetch_tuner.stop()
+        if self.amqp._backpressure is not None:
+            await self.amqp._backpressure.stop()
+        for batcher in self.amqp._batchers:
+            await batcher.close()
+        await self.amqp._publish_pipeline.flush()
+        await self.amqp._rpc_client.close()
         await self.amqp._faststream_rabbit_broker.close()
+        await self.amqp._stream_offsets.stop()
+        self.amqp._close_stores()
 
     @readiness_probe
     async def _amqp_readiness_probe(self) -> bool:
-        if self.amqp._faststream_rabbit_broker._connection:
+        connections = self.amqp._faststream_rabbit_broker.connections
+        if connections:
             # NOTE this might break.
             # faststream maintainer says, they will provide functionality like this.
-            return self.amqp._faststream_rabbit_broker._connection.connected.is_set()
+            disconnected = [c for c in connections if not c.connected.is_set()]
+            for connection in disconnected:
+                logger.warning("Connection to {} is down", connection.url.host)
+            return not disconnected
         return False  # pragma: no cover
 
 
@@ -181,6 +1022,18 @@ R = TypeVar("R")
 
 class AmqpDecorator:
     MARKER = "_amqp_decorator"
+    EXTENSION_OPTION = "_amqp_extension_option"
+
+
+EXTENSION_OPTION_METADATA = {AmqpDecorator.EXTENSION_OPTION: True}
+
+
+def _broker_kwargs(handler_setting: subscriber | publisher) -> AnyDict:
+    return {
+        field.name: getattr(handler_setting, field.name)
+        for field in dataclasses.fields(handler_setting)
+        if not field.metadata.get(AmqpDecorator.EXTENSION_OPTION, False)
+    }
 
 
 @dataclass
@@ -202,6 +1055,49 @@ class subscriber(AmqpDecorator):  # noqa: N801
     description: str | None = None
     include_in_schema: bool = True
 
+    # extension arguments
+    batch_size: int | None = dataclasses.field(default=None, metadata=EXTENSION_OPTION_METADATA)
+    batch_timeout: float = dataclasses.field(default=0.1, metadata=EXTENSION_OPTION_METADATA)
+    concurrency: int | None = dataclasses.field(default=None, metadata=EXTENSION_OPTION_METADATA)
+    prefetch: int | None = dataclasses.field(default=None, metadata=EXTENSION_OPTION_METADATA)
+    partition_key: Callable[[Any], Hashable] | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    partition_lanes: int = dataclasses.field(default=8, metadata=EXTENSION_OPTION_METADATA)
+    executor: ExecutorKind | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    codec: AmqpCodec | None = dataclasses.field(default=None, metadata=EXTENSION_OPTION_METADATA)
+    trusted: bool = dataclasses.field(default=False, metadata=EXTENSION_OPTION_METADATA)
+    retry_policy: AmqpRetryPolicy | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    dedupe: DedupeStore | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    schema_version: str | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    stream_offset: StreamOffsetSpec | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    stream_offset_store: StreamOffsetStore | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    hash_weight: int | None = dataclasses.field(default=None, metadata=EXTENSION_OPTION_METADATA)
+    message_type: str | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    type_header: str = dataclasses.field(default="type", metadata=EXTENSION_OPTION_METADATA)
+
     def __call__(
         self,
         fn: Callable[Concatenate[AmqpExtensionT, P], R],
@@ -232,6 +1128,17 @@ class publisher(AmqpDecorator):  # noqa: N801
     description: str | None = None
     include_in_schema: bool = True
 
+    # extension arguments
+    codec: AmqpCodec | None = dataclasses.field(default=None, metadata=EXTENSION_OPTION_METADATA)
+    schema_version: str | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+    hash_key: Callable[[Any], Hashable] | None = dataclasses.field(
+        default=None,
+        metadata=EXTENSION_OPTION_METADATA,
+    )
+
     def __call__(
         self,
         fn: Callable[Concatenate[AmqpExtensionT, P], R],
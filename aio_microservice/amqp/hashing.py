@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable
+
+from faststream.rabbit import ExchangeType, RabbitExchange, RabbitQueue
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+    from faststream.types import AsyncFunc
+
+
+def consistent_hash_exchange(exchange: RabbitExchange | str | None) -> RabbitExchange:
+    if isinstance(exchange, str) and exchange:
+        return RabbitExchange(exchange, type=ExchangeType.X_CONSISTENT_HASH, durable=True)
+    if not isinstance(exchange, RabbitExchange) or exchange.type != ExchangeType.X_CONSISTENT_HASH:
+        msg = "Consistent hash routing requires an x-consistent-hash exchange"
+        raise ValueError(msg)
+    return exchange
+
+
+def hash_queue(queue: RabbitQueue | str, replica: str, weight: int) -> RabbitQueue:
+    if weight < 1:
+        msg = "hash_weight must be at least 1"
+        raise ValueError(msg)
+    # every replica binds its own queue, and the binding key is its share of the hash ring
+    if isinstance(queue, str):
+        # the queue outlives restarts and paused consumers, so its share of messages is kept
+        return RabbitQueue(f"{queue}.{replica}", durable=True, routing_key=str(weight))
+    return RabbitQueue(
+        f"{queue.name}.{replica}",
+        durable=queue.durable,
+        exclusive=queue.exclusive,
+        passive=queue.passive,
+        auto_delete=queue.auto_delete,
+        arguments=queue.arguments,
+        timeout=queue.timeout,
+        robust=queue.robust,
+        bind_arguments=queue.bind_arguments,
+        routing_key=str(weight),
+    )
+
+
+class HashKeyRouter:
+    def __init__(self, key: Callable[[Any], Hashable]) -> None:
+        self.key = key
+
+    async def __call__(
+        self,
+        call_next: AsyncFunc,
+        message: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        # the exchange hashes the routing key, so messages with the same key reach the same replica
+        kwargs["routing_key"] = str(self.key(message))
+        return await call_next(message, *args, **kwargs)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from faststream import BaseMiddleware
+from faststream.exceptions import AckMessage, NackMessage, RejectMessage, SkipMessage
+
+from aio_microservice.amqp.metrics import (
+    PUBLISHER_CONFIRM_SECONDS,
+    PUBLISHER_PUBLISH_SECONDS,
+    SUBSCRIBER_DECODE_SECONDS,
+    SUBSCRIBER_HANDLER_SECONDS,
+    SUBSCRIBER_MESSAGES,
+    SUBSCRIBER_QUEUE_SECONDS,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from faststream.broker.message import StreamMessage
+    from faststream.types import AsyncFunc, AsyncFuncAny
+    from prometheus_client import Histogram
+
+    Decoder = Callable[[StreamMessage[Any]], Awaitable[Any]]
+
+PUBLISHED_AT_HEADER = "x-published-at"
+DIRECT_REPLY_TO_PREFIX = "amq.rabbitmq.reply-to"
+OUTCOMES = ("ack", "nack", "reject", "error")
+
+
+class SubscriberInstrumentation:
+    def __init__(
+        self,
+        app_name: str,
+        queue: str,
+        handler: str,
+        decoder: Callable[[StreamMessage[Any], Decoder], Awaitable[Any]],
+    ) -> None:
+        # the labelled children are resolved once, so recording a message is cheap
+        self._messages = {
+            outcome: SUBSCRIBER_MESSAGES.labels(
+                app_name=app_name,
+                queue=queue,
+                handler=handler,
+                outcome=outcome,
+            )
+            for outcome in OUTCOMES
+        }
+        self._handler_seconds = SUBSCRIBER_HANDLER_SECONDS.labels(
+            app_name=app_name,
+            queue=queue,
+            handler=handler,
+        )
+        self._decode_seconds = SUBSCRIBER_DECODE_SECONDS.labels(
+            app_name=app_name,
+            queue=queue,
+            handler=handler,
+        )
+        self._queue_seconds = SUBSCRIBER_QUEUE_SECONDS.labels(app_name=app_name, queue=queue)
+        self._decoder = decoder
+
+    async def decode(self, message: StreamMessage[Any], original_decoder: Decoder) -> Any:  # noqa: ANN401
+        start = time.perf_counter()
+        try:
+            return await self._decoder(message, original_decoder)
+        finally:
+            self._decode_seconds.observe(time.perf_counter() - start)
+
+    async def __call__(self, call_next: AsyncFuncAny, message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        published_at = _published_at(message)
+        if published_at is not None:
+            self._queue_seconds.observe(max(time.time() - published_at, 0.0))
+
+        outcome = "ack"
+        start = time.perf_counter()
+        try:
+            return await call_next(message)
+        except (AckMessage, SkipMessage):
+            raise
+        except NackMessage:
+            outcome = "nack"
+            raise
+        except RejectMessage:
+            outcome = "reject"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self._handler_seconds.observe(time.perf_counter() - start)
+            self._messages[outcome].inc()
+
+
+class PublishInstrumentation:
+    def __init__(self, app_name: str) -> None:
+        self.app_name = app_name
+
+    async def publish_scope(
+        self,
+        call_next: AsyncFunc,
+        message: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), PUBLISHED_AT_HEADER: time.time()}
+        start = time.perf_counter()
+        try:
+            return await call_next(message, *args, **kwargs)
+        finally:
+            self._histogram(PUBLISHER_PUBLISH_SECONDS, kwargs).observe(time.perf_counter() - start)
+
+    async def confirm_scope(
+        self,
+        call_next: AsyncFunc,
+        message: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        # the producer returns once the broker has confirmed the message
+        start = time.perf_counter()
+        try:
+            return await call_next(message, *args, **kwargs)
+        finally:
+            self._histogram(PUBLISHER_CONFIRM_SECONDS, kwargs).observe(time.perf_counter() - start)
+
+    def _histogram(self, histogram: Histogram, kwargs: dict[str, Any]) -> Histogram:
+        exchange = getattr(kwargs.get("exchange"), "name", kwargs.get("exchange")) or ""
+        routing_key: str = kwargs.get("routing_key") or ""
+        if exchange:
+            # routing keys of exchanges may be arbitrary (e.g. the entity keys of a
+            # consistent hash exchange), only the queue names of the default exchange are bounded
+            routing_key = ""
+        elif routing_key.startswith(DIRECT_REPLY_TO_PREFIX):
+            # every rpc caller has its own reply-to routing key
+            routing_key = DIRECT_REPLY_TO_PREFIX
+        return histogram.labels(
+            app_name=self.app_name,
+            exchange=exchange,
+            routing_key=routing_key,
+        )
+
+
+class InstrumentationMiddleware(BaseMiddleware):
+    def __init__(
+        self,
+        msg: Any | None = None,  # noqa: ANN401
+        *,
+        scope: Callable[..., Awaitable[Any]],
+    ) -> None:
+        super().__init__(msg)
+        self.scope = scope
+
+    async def publish_scope(
+        self,
+        call_next: AsyncFunc,
+        msg: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        return await self.scope(call_next, msg, *args, **kwargs)
+
+
+def _published_at(message: StreamMessage[Any]) -> float | None:
+    published_at = message.headers.get(PUBLISHED_AT_HEADER)
+    if published_at is not None:
+        return float(published_at)
+    # the timestamp property only has a resolution of seconds
+    timestamp = getattr(message.raw_message, "timestamp", None)
+    return timestamp.timestamp() if timestamp is not None else None
@@ -0,0 +1,77 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+IN_FLIGHT_MESSAGES = Gauge(
+    name="amqp_subscriber_in_flight_messages",
+    documentation="Number of messages currently processed by the subscribers of a queue",
+    labelnames=["app_name", "queue"],
+)
+
+PREFETCH_COUNT = Gauge(
+    name="amqp_subscriber_prefetch_count",
+    documentation="Prefetch count chosen by the auto-tuning of a subscriber",
+    labelnames=["app_name", "queue"],
+)
+
+STREAM_OFFSET = Gauge(
+    name="amqp_stream_committed_offset",
+    documentation="Offset up to which a stream subscriber has handled all messages",
+    labelnames=["app_name", "queue"],
+)
+
+PARTITION_LANE_DEPTH = Gauge(
+    name="amqp_subscriber_partition_lane_depth",
+    documentation="Number of messages queued or processed in a partition lane of a subscriber",
+    labelnames=["app_name", "queue", "handler", "lane"],
+)
+
+TRUSTED_MESSAGES = Counter(
+    name="amqp_subscriber_trusted_messages",
+    documentation="Number of messages of trusted subscribers by construction path",
+    labelnames=["app_name", "queue", "path"],
+)
+
+DEDUPLICATED_MESSAGES = Counter(
+    name="amqp_subscriber_deduplicated_messages",
+    documentation="Number of messages of deduplicating subscribers by result",
+    labelnames=["app_name", "queue", "result"],
+)
+
+SUBSCRIBER_MESSAGES = Counter(
+    name="amqp_subscriber_messages",
+    documentation="Number of messages handled by a subscriber by outcome",
+    labelnames=["app_name", "queue", "handler", "outcome"],
+)
+
+SUBSCRIBER_HANDLER_SECONDS = Histogram(
+    name="amqp_subscriber_handler_duration_seconds",
+    documentation="Time a subscriber took to handle a message",
+    labelnames=["app_name", "queue", "handler"],
+)
+
+SUBSCRIBER_DECODE_SECONDS = Histogram(
+    name="amqp_subscriber_decode_duration_seconds",
+    documentation="Time a subscriber took to decode a message body",
+    labelnames=["app_name", "queue", "handler"],
+    buckets=FAST_BUCKETS,
+)
+
+SUBSCRIBER_QUEUE_SECONDS = Histogram(
+    name="amqp_subscriber_queue_time_seconds",
+    documentation="Time between publishing a message and receiving it",
+    labelnames=["app_name", "queue"],
+)
+
+PUBLISHER_PUBLISH_SECONDS = Histogram(
+    name="amqp_publisher_publish_duration_seconds",
+    documentation="Time to publish a message including encoding and confirmation",
+    labelnames=["app_name", "exchange", "routing_key"],
+)
+
+PUBLISHER_CONFIRM_SECONDS = Histogram(
+    name="amqp_publisher_confirm_duration_seconds",
+    documentation="Time between sending a message and its confirmation by the broker",
+    labelnames=["app_name", "exchange", "routing_key"],
+    buckets=FAST_BUCKETS,
+)
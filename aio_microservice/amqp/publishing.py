@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from faststream.rabbit import RabbitBroker, RabbitExchange, RabbitQueue
+
+
+class PublishPipeline:
+    def __init__(self, broker: RabbitBroker, max_outstanding: int) -> None:
+        if max_outstanding < 1:
+            msg = "max_outstanding must be at least 1"
+            raise ValueError(msg)
+        self._broker = broker
+        self._max_outstanding = max_outstanding
+        self._semaphore: asyncio.Semaphore | None = None
+        self._outstanding: set[asyncio.Task[Any]] = set()
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._outstanding)
+
+    async def publish(
+        self,
+        message: Any = None,  # noqa: ANN401
+        queue: RabbitQueue | str = "",
+        exchange: RabbitExchange | str | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> asyncio.Future[Any]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_outstanding)
+        # waits while the window of unconfirmed messages is full
+        await self._semaphore.acquire()
+
+        task = asyncio.create_task(
+            self._broker.publish(message, queue=queue, exchange=exchange, **kwargs),
+        )
+        self._outstanding.add(task)
+        task.add_done_callback(self._on_confirmed)
+        # callers may not await the confirmation, so failures are logged in any case
+        task.add_done_callback(_log_failure)
+        return task
+
+    async def flush(self) -> None:
+        if self._outstanding:
+            await asyncio.wait(self._outstanding)
+
+    def _on_confirmed(self, task: asyncio.Task[Any]) -> None:
+        self._outstanding.discard(task)
+        if self._semaphore is not None:  # pragma: no branch
+            self._semaphore.release()
+
+
+def _log_failure(task: asyncio.Task[Any]) -> None:
+    if task.cancelled():
+        return
+    if (error := task.exception()) is not None:
+        logger.opt(exception=error).error("Failed to publish message")
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from aio_pika import DeliveryMode
+from faststream.exceptions import AckMessage, HandlerException
+from faststream.rabbit import RabbitQueue
+from loguru import logger
+
+if TYPE_CHECKING:
+    from faststream.broker.message import StreamMessage
+    from faststream.rabbit.publisher.asyncapi import AsyncAPIPublisher
+    from faststream.types import AsyncFuncAny
+
+    from aio_microservice.amqp.broker import AmqpRabbitBroker
+
+RETRY_ATTEMPT_HEADER = "x-retry-attempt"
+RETRY_ERROR_HEADER = "x-retry-error"
+
+
+@dataclass(frozen=True)
+class AmqpRetryPolicy:
+    max_attempts: int = 5
+    initial_delay: float = 1.0
+    multiplier: float = 2.0
+    max_delay: float = 300.0
+    jitter: float = 0.1
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 1:
+            msg = "max_attempts must be at least 1"
+            raise ValueError(msg)
+        if self.initial_delay <= 0 or self.max_delay < self.initial_delay:
+            msg = "initial_delay must be positive and not larger than max_delay"
+            raise ValueError(msg)
+        if self.multiplier < 1:
+            msg = "multiplier must be at least 1"
+            raise ValueError(msg)
+        if not 0 <= self.jitter < 1:
+            msg = "jitter must be between 0 and 1"
+            raise ValueError(msg)
+
+    def delay(self, attempt: int) -> float:
+        return min(self.initial_delay * self.multiplier ** (attempt - 1), self.max_delay)
+
+    def expiration(self, attempt: int) -> float:
+        # the delay of the retry queue is an upper bound, so the jitter only shortens it
+        return self.delay(attempt) * (1 - self.jitter * random.random())  # noqa: S311
+
+    @property
+    def delays(self) -> list[float]:
+        return sorted({self.delay(attempt) for attempt in range(1, self.max_attempts)})
+
+
+class SubscriberRetrier:
+    def __init__(self, broker: AmqpRabbitBroker, queue: str, policy: AmqpRetryPolicy) -> None:
+        self.queue = queue
+        self.policy = policy
+        self.retry_publishers: dict[float, AsyncAPIPublisher] = {}
+        for delay in policy.delays:
+            retry_queue = RabbitQueue(
+                name=f"{queue}.retry.{round(delay * 1000)}",
+                durable=True,
+                arguments={
+                    "x-message-ttl": round(delay * 1000),
+                    # expired messages go back to the source queue
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": queue,
+                },
+            )
+            broker.declare_on_connect(retry_queue)
+            self.retry_publishers[delay] = broker.publisher(queue=retry_queue)
+        dead_letter_queue = RabbitQueue(name=f"{queue}.dlq", durable=True)
+        broker.declare_on_connect(dead_letter_queue)
+        self.dead_letter_publisher = broker.publisher(queue=dead_letter_queue)
+
+    async def __call__(self, call_next: AsyncFuncAny, message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        try:
+            return await call_next(message)
+        except HandlerException:
+            raise
+        except Exception as exc:
+            attempt = int(message.headers.get(RETRY_ATTEMPT_HEADER, 0)) + 1
+            if attempt < self.policy.max_attempts:
+                delay = self.policy.delay(attempt)
+                logger.warning(
+                    "Retrying message of {} in {}s (attempt {}/{}): {!r}",
+                    self.queue,
+                    delay,
+                    attempt,
+                    self.policy.max_attempts,
+                    exc,
+                )
+                await self._republish(
+                    self.retry_publishers[delay],
+                    message,
+                    headers={RETRY_ATTEMPT_HEADER: attempt},
+                    expiration=self.policy.expiration(attempt),
+                )
+            else:
+                logger.error(
+                    "Dead-lettering message of {} after {} attempts: {!r}",
+                    self.queue,
+                    attempt,
+                    exc,
+                )
+                await self._republish(
+                    self.dead_letter_publisher,
+                    message,
+                    headers={RETRY_ATTEMPT_HEADER: attempt, RETRY_ERROR_HEADER: repr(exc)},
+                )
+            # the original message is acknowledged once its copy has been published
+            raise AckMessage from exc
+
+    async def _republish(
+        self,
+        publisher: AsyncAPIPublisher,
+        message: StreamMessage[Any],
+        headers: dict[str, Any],
+        expiration: float | None = None,
+    ) -> None:
+        # the raw body is still encoded and might only reference an offloaded payload
+        raw_message = message.raw_message
+        await publisher.publish(
+            raw_message.body,
+            headers={**message.headers, **headers},
+            content_type=message.content_type,
+            content_encoding=raw_message.content_encoding,
+            correlation_id=message.correlation_id,
+            message_id=message.message_id,
+            expiration=expiration,
+            persist=raw_message.delivery_mode == DeliveryMode.PERSISTENT,
+        )
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable
+
+from aio_pika import Message
+from faststream.broker.message import decode_message
+from faststream.utils.functions import to_async
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from aio_pika import IncomingMessage
+    from aio_pika.abc import AbstractChannel, AbstractIncomingMessage
+    from faststream.broker.message import StreamMessage
+
+    from aio_microservice.amqp.broker import AmqpRabbitBroker
+    from aio_microservice.amqp.codecs import AmqpCodec
+
+DIRECT_REPLY_TO = "amq.rabbitmq.reply-to"
+
+
+class RpcClient:
+    def __init__(
+        self,
+        broker: AmqpRabbitBroker,
+        codec: AmqpCodec,
+        parser: Callable[[IncomingMessage], Awaitable[StreamMessage[Any]]],
+    ) -> None:
+        self._broker = broker
+        self._codec = codec
+        self._parser = parser
+        self._futures: dict[str, asyncio.Future[Any]] = {}
+        self._channel: AbstractChannel | None = None
+        self._channel_lock: asyncio.Lock | None = None
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._futures)
+
+    async def call(
+        self,
+        queue: str,
+        message: Any = None,  # noqa: ANN401
+        *,
+        timeout: float = 30.0,
+        headers: dict[str, Any] | None = None,
+    ) -> Any:  # noqa: ANN401
+        channel = await self._get_channel()
+        correlation_id = uuid.uuid4().hex
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._futures[correlation_id] = future
+
+        try:
+            # the publish middlewares of the broker, e.g. claim checks, apply to requests as well
+            await self._broker.publish_with_middlewares(
+                partial(self._publish, channel),
+                message,
+                routing_key=queue,
+                headers=headers,
+                correlation_id=correlation_id,
+                expiration=timeout,
+            )
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            # timed out and cancelled calls must not leak their future
+            self._futures.pop(correlation_id, None)
+
+    async def close(self) -> None:
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        if self._channel is not None and not self._channel.is_closed:
+            await self._channel.close()
+        self._channel = None
+
+    async def _publish(
+        self,
+        channel: AbstractChannel,
+        message: Any,  # noqa: ANN401
+        *,
+        routing_key: str,
+        correlation_id: str,
+        expiration: float,
+        headers: dict[str, Any] | None = None,
+        content_type: str | None = None,
+        content_encoding: str | None = None,
+    ) -> None:
+        if not isinstance(message, bytes):
+            # without a codec middleware, requests are encoded with the default codec
+            message, content_type, content_encoding = self._codec.encode(message)
+        # direct reply-to requires publishing on the channel that consumes the replies
+        await channel.default_exchange.publish(
+            Message(
+                message,
+                headers=headers,
+                content_type=content_type,
+                content_encoding=content_encoding,
+                # returned messages are matched to their publish by the message id
+                message_id=correlation_id,
+                correlation_id=correlation_id,
+                reply_to=DIRECT_REPLY_TO,
+                # requests that can no longer be answered in time are dropped by the broker
+                expiration=expiration,
+            ),
+            routing_key=routing_key,
+            # requests without a queue are returned at once instead of timing out
+            mandatory=True,
+        )
+
+    async def _get_channel(self) -> AbstractChannel:
+        if self._channel_lock is None:
+            self._channel_lock = asyncio.Lock()
+        async with self._channel_lock:
+            if self._channel is None or self._channel.is_closed:
+                channel = await self._broker.open_channel()
+                channel.return_callbacks.add(self._on_return)
+                reply_queue = await channel.declare_queue(DIRECT_REPLY_TO, passive=True)
+                await reply_queue.consume(self._on_reply, no_ack=True)  # type: ignore[arg-type]
+                self._channel = channel
+            return self._channel
+
+    def _on_return(self, _: AbstractChannel, message: AbstractIncomingMessage) -> None:
+        future = self._futures.pop(message.correlation_id or "", None)
+        if future is None or future.done():
+            return
+        msg = f"The request could not be routed to {message.routing_key}"
+        future.set_exception(RuntimeError(msg))
+
+    async def _on_reply(self, message: IncomingMessage) -> None:
+        # the first reply claims the call before decoding, so duplicates can not overtake it
+        future = self._futures.pop(message.correlation_id or "", None)
+        if future is None:
+            # replies of timed out or cancelled calls are dropped
+            return
+        error: Exception | None = None
+        try:
+            stream_message = await self._parser(message)
+            result = await self._codec.decode(stream_message, to_async(decode_message))
+        except Exception as exc:  # noqa: BLE001
+            error = exc
+
+        if future.done():
+            # the call timed out or was cancelled while its reply was decoded
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import sqlite3
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Literal, Union
+
+from faststream.rabbit import RabbitQueue
+from faststream.utils.functions import to_async
+from loguru import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from pathlib import Path
+
+    from aio_pika import IncomingMessage
+    from faststream.broker.message import StreamMessage
+    from faststream.broker.types import Filter
+    from faststream.types import AnyDict, AsyncFuncAny
+
+    Parser = Callable[[IncomingMessage], Awaitable[StreamMessage[Any]]]
+    Decoder = Callable[[StreamMessage[Any]], Awaitable[Any]]
+
+StreamOffsetSpec = Union[Literal["first", "last", "next"], int, datetime]
+
+STREAM_OFFSET_HEADER = "x-stream-offset"
+
+
+def stream_queue(queue: RabbitQueue | str) -> RabbitQueue:
+    queue = RabbitQueue.validate(queue)
+    arguments = queue.arguments or {}
+    if arguments.get("x-queue-type") == "stream":
+        return queue
+    # streams are always durable and outlive their consumers
+    return RabbitQueue(
+        queue.name,
+        durable=True,
+        passive=queue.passive,
+        arguments={**arguments, "x-queue-type": "stream"},
+        timeout=queue.timeout,
+        robust=queue.robust,
+        bind_arguments=queue.bind_arguments,
+        routing_key=queue.routing_key,
+    )
+
+
+class StreamOffsetStore(ABC):
+    @abstractmethod
+    async def load(self, name: str) -> int | None: ...
+
+    @abstractmethod
+    async def save(self, name: str, offset: int) -> None: ...
+
+    def close(self) -> None:  # noqa: B027
+        # stores without resources have nothing to release
+        ...
+
+
+class InMemoryStreamOffsetStore(StreamOffsetStore):
+    def __init__(self) -> None:
+        self._offsets: dict[str, int] = {}
+
+    async def load(self, name: str) -> int | None:
+        return self._offsets.get(name)
+
+    async def save(self, name: str, offset: int) -> None:
+        self._offsets[name] = offset
+
+
+class SqliteStreamOffsetStore(StreamOffsetStore):
+    def __init__(self, path: str | Path) -> None:
+        # sqlite blocks, so the connection is used by a single thread off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-offsets")
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS stream_offsets "
+            "(name TEXT PRIMARY KEY, stream_offset INTEGER NOT NULL)",
+        )
+
+    async def load(self, name: str) -> int | None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._load, name)
+
+    async def save(self, name: str, offset: int) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._save, name, offset)
+
+    def _load(self, name: str) -> int | None:
+        row = self._connection.execute(
+            "SELECT stream_offset FROM stream_offsets WHERE name = ?",
+            (name,),
+        ).fetchone()
+        return None if row is None else int(row[0])
+
+    def _save(self, name: str, offset: int) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO stream_offsets (name, stream_offset) VALUES (?, ?)",
+            (name, offset),
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._connection.close()
+
+
+class StreamOffsetTracker:
+    def __init__(
+        self,
+        queue: str,
+        offset: StreamOffsetSpec,
+        store: StreamOffsetStore | None,
+        consume_args: AnyDict | None = None,
+    ) -> None:
+        self.queue = queue
+        self.offset = offset
+        self.store = store
+        # faststream and aio-pika keep this dict, so consumers restart from the tracked offset
+        self.consume_args: AnyDict = {**(consume_args or {}), STREAM_OFFSET_HEADER: offset}
+        self.completed: int | None = None
+        self.saved: int | None = None
+        self._in_flight: set[int] = set()
+
+    @property
+    def committed(self) -> int | None:
+        # messages complete out of order with concurrency, so only the gapless prefix counts
+        if self._in_flight:
+            committed = min(self._in_flight) - 1
+            return committed if self.completed is None else min(committed, self.completed)
+        return self.completed
+
+    def make_parser(
+        self,
+        parser: Callable[[IncomingMessage, Parser], Awaitable[StreamMessage[Any]]] | None,
+    ) -> Callable[[IncomingMessage, Parser], Awaitable[StreamMessage[Any]]]:
+        async def parse(message: IncomingMessage, original_parser: Parser) -> StreamMessage[Any]:
+            # aio-pika consumes every delivery in its own task, which starts parsing in delivery
+            # order, so offsets are in flight before the parser or the decoder can suspend
+            offset = _get_offset(message.headers)
+            if offset is not None:
+                self._in_flight.add(offset)
+            try:
+                if parser is None:
+                    return await original_parser(message)
+                return await parser(message, original_parser)
+            except BaseException:
+                self._complete(offset)
+                raise
+
+        return parse
+
+    def make_decoder(
+        self,
+        decoder: Callable[[StreamMessage[Any], Decoder], Awaitable[Any]],
+    ) -> Callable[[StreamMessage[Any], Decoder], Awaitable[Any]]:
+        async def decode(message: StreamMessage[Any], original_decoder: Decoder) -> Any:  # noqa: ANN401
+            try:
+                return await decoder(message, original_decoder)
+            except BaseException:
+                self._complete(_get_offset(message.headers))
+                raise
+
+        return decode
+
+    def make_filter(self, filter_: Filter[Any]) -> Callable[[StreamMessage[Any]], Awaitable[bool]]:
+        async_filter = to_async(filter_)
+
+        async def filter_tracked(message: StreamMessage[Any]) -> bool:
+            try:
+                suitable = bool(await async_filter(message))
+            except BaseException:
+                self._complete(_get_offset(message.headers))
+                raise
+            if not suitable:
+                # stream messages are not redelivered, so skipped ones are passed as well
+                self._complete(_get_offset(message.headers))
+            return suitable
+
+        return filter_tracked
+
+    async def __call__(self, call_next: AsyncFuncAny, message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        try:
+            return await call_next(message)
+        finally:
+            # stream messages are not redelivered, so failed ones are passed as well
+            self._complete(_get_offset(message.headers))
+
+    def _complete(self, offset: int | None) -> None:
+        if offset is None:
+            return
+        self._in_flight.discard(offset)
+        self.completed = offset if self.completed is None else max(self.completed, offset)
+        committed = self.committed
+        if committed is not None and committed >= 0:
+            self.consume_args[STREAM_OFFSET_HEADER] = committed + 1
+
+    async def resume(self) -> None:
+        if self.store is None or self.completed is not None:
+            # the consumer already resumed or made progress of its own
+            return
+        offset = await self.store.load(self.queue)
+        if offset is None:
+            return
+        logger.info("Resuming stream {} after offset {}", self.queue, offset)
+        self.completed = self.saved = offset
+        self.consume_args[STREAM_OFFSET_HEADER] = offset + 1
+
+    async def commit(self) -> None:
+        committed = self.committed
+        if self.store is None or committed is None or committed < 0 or committed == self.saved:
+            return
+        await self.store.save(self.queue, committed)
+        self.saved = committed
+
+
+class StreamOffsetCommitter:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.trackers: list[StreamOffsetTracker] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def add_tracker(self, tracker: StreamOffsetTracker) -> None:
+        self.trackers.append(tracker)
+
+    async def resume(self) -> None:
+        for tracker in self.trackers:
+            await tracker.resume()
+
+    async def commit(self) -> None:
+        for tracker in self.trackers:
+            await tracker.commit()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        # the offsets of the last interval are committed once the consumers stopped
+        await self._commit()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._commit()
+
+    async def _commit(self) -> None:
+        try:
+            await self.commit()
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to commit the stream offsets")
+
+
+def _get_offset(headers: AnyDict | None) -> int | None:
+    offset = (headers or {}).get(STREAM_OFFSET_HEADER)
+    return offset if isinstance(offset, int) else None
@@ -1,14 +1,28 @@
 from __future__ import annotations
 
+import bisect
+import hashlib
+import time
+from datetime import datetime
 from typing import TYPE_CHECKING, Any, TypeVar
 
-from faststream.rabbit import RabbitBroker, TestRabbitBroker
+from faststream.rabbit import ExchangeType, RabbitBroker, RabbitExchange, TestRabbitBroker
+from faststream.rabbit.testing import FakeProducer, build_message
+from faststream.testing.broker import call_handler
 from typing_extensions import override
 
 from aio_microservice.amqp import AmqpExtension
+from aio_microservice.amqp.streams import STREAM_OFFSET_HEADER
 
 if TYPE_CHECKING:
+    from types import TracebackType
+
+    from aio_pika.abc import HeadersType
     from faststream.rabbit.publisher.asyncapi import AsyncAPIPublisher
+    from faststream.rabbit.subscriber.asyncapi import AsyncAPISubscriber
+
+    from aio_microservice.amqp.rpc import RpcClient
+    from aio_microservice.amqp.streams import StreamOffsetSpec, StreamOffsetTracker
 
 ServiceT = TypeVar("ServiceT", bound=AmqpExtension)
 
@@ -57,12 +71,204 @@ class AmqpBroker:
             publisher.mock.reset_mock()
 
 
+class TestRpcClient:
+    def __init__(self, broker: RabbitBroker) -> None:
+        self._broker = broker
+
+    async def call(
+        self,
+        queue: str,
+        message: Any = None,  # noqa: ANN401
+        *,
+        timeout: float = 30.0,
+        headers: dict[str, Any] | None = None,
+    ) -> Any:  # noqa: ANN401
+        # the test broker answers requests in process instead of using direct reply-to
+        return await self._broker.publish(
+            message,
+            queue=queue,
+            headers=headers,
+            rpc=True,
+            rpc_timeout=timeout,
+            raise_timeout=True,
+        )
+
+    async def close(self) -> None: ...
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=4).digest(), "big")
+
+
+class AmqpFakeProducer(FakeProducer):
+    def __init__(self, broker: RabbitBroker, streams: dict[str, list[Any]]) -> None:
+        super().__init__(broker)
+        self.streams = streams
+
+    @override
+    async def publish(
+        self,
+        message: Any = "",
+        exchange: RabbitExchange | str | None = None,
+        *,
+        routing_key: str = "",
+        headers: HeadersType | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        exch = RabbitExchange.validate(exchange)
+        subscribers = [
+            subscriber
+            for subscriber in self.broker._subscribers.values()
+            if subscriber.exchange == exch
+            and subscriber.exchange.type == ExchangeType.X_CONSISTENT_HASH
+        ]
+        if subscribers:
+            return await self._publish_consistent_hash(
+                subscribers,
+                message,
+                exch,
+                routing_key=routing_key,
+                headers=headers,
+                **kwargs,
+            )
+        stream = None if RabbitExchange.validate(exchange).name else self.streams.get(routing_key)
+        if stream is not None:
+            # the stream keeps the message, so that later consumers can replay it
+            headers = {**(headers or {}), STREAM_OFFSET_HEADER: len(stream)}
+            stream.append(message)
+        return await super().publish(
+            message,
+            exchange,
+            routing_key=routing_key,
+            headers=headers,
+            **kwargs,
+        )
+
+    async def _publish_consistent_hash(
+        self,
+        subscribers: list[AsyncAPISubscriber],
+        message: Any,  # noqa: ANN401
+        exchange: RabbitExchange,
+        *,
+        routing_key: str,
+        headers: HeadersType | None,
+        rpc: bool = False,
+        rpc_timeout: float | None = 30.0,
+        raise_timeout: bool = False,
+        mandatory: bool = True,
+        immediate: bool = False,
+        timeout: Any = None,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        # like the exchange of the plugin, every queue owns as many points of the ring as its weight
+        ring = sorted(
+            (_ring_hash(f"{subscriber.queue.name}:{point}"), index)
+            for index, subscriber in enumerate(subscribers)
+            if subscriber.queue.routing_key.isdigit()
+            for point in range(int(subscriber.queue.routing_key))
+        )
+        if ring:
+            position = bisect.bisect_left(ring, (_ring_hash(routing_key), -1))
+            receivers = [subscribers[ring[position % len(ring)][1]]]
+        else:
+            receivers = []
+        # the test broker records published messages with subscribers that are not weighted
+        receivers.extend(s for s in subscribers if not s.queue.routing_key.isdigit())
+
+        incoming = build_message(
+            message,
+            exchange=exchange,
+            routing_key=routing_key,
+            headers=headers,
+            **kwargs,
+        )
+        result = None
+        for index, subscriber in enumerate(receivers):
+            response = await call_handler(
+                handler=subscriber,
+                message=incoming,
+                rpc=rpc,
+                rpc_timeout=rpc_timeout,
+                raise_timeout=raise_timeout,
+            )
+            if index == 0:
+                result = response
+        return result
+
+    async def replay(self, tracker: StreamOffsetTracker) -> None:
+        subscriber = next(
+            subscriber
+            for subscriber in self.broker._subscribers.values()
+            if subscriber.queue.name == tracker.queue
+        )
+        stream = self.streams[tracker.queue]
+        start = self._start_offset(tracker.queue, tracker.consume_args[STREAM_OFFSET_HEADER])
+        for offset in range(start, len(stream)):
+            message = build_message(
+                stream[offset],
+                queue=tracker.queue,
+                headers={STREAM_OFFSET_HEADER: offset},
+            )
+            await call_handler(handler=subscriber, message=message)
+
+    def _start_offset(self, queue: str, offset: StreamOffsetSpec) -> int:
+        stream = self.streams[queue]
+        if isinstance(offset, datetime):
+            # the messages of the streams count as published when the test broker starts
+            return 0 if offset.timestamp() <= time.time() else len(stream)
+        if offset == "first":
+            return 0
+        if offset == "last":
+            return max(len(stream) - 1, 0)
+        if offset == "next":
+            return len(stream)
+        return offset
+
+
 class TestAmqpBroker(TestRabbitBroker):
-    def __init__(self, service: ServiceT, with_real: bool = False) -> None:
+    def __init__(
+        self,
+        service: ServiceT,
+        with_real: bool = False,
+        streams: dict[str, list[Any]] | None = None,
+    ) -> None:
         super().__init__(broker=service.amqp._faststream_rabbit_broker, with_real=with_real)
         self._service = service
+        self._rpc_client: RpcClient | None = None
+        self.streams = {} if streams is None else streams
 
     @override
     async def __aenter__(self) -> AmqpBroker:  # type: ignore
         broker = await super().__aenter__()
+        if not self.with_real:
+            self._rpc_client = self._service.amqp._rpc_client
+            self._service.amqp._rpc_client = TestRpcClient(broker)  # type: ignore[assignment]
+            producer = AmqpFakeProducer(broker, self.streams)
+            broker._producer = producer
+            for publisher in broker._publishers.values():
+                # publishers were set up with the producer of the test broker
+                publisher._producer = producer
+            await self._replay_streams(producer)
         return AmqpBroker(broker)
+
+    async def _replay_streams(self, producer: AmqpFakeProducer) -> None:
+        stream_offsets = self._service.amqp._stream_offsets
+        # the streams are kept in process, and consumers replay them from their offset on start
+        await stream_offsets.resume()
+        for tracker in stream_offsets.trackers:
+            self.streams.setdefault(tracker.queue, [])
+            await producer.replay(tracker)
+
+    @override
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_val: BaseException | None = None,
+        exc_tb: TracebackType | None = None,
+    ) -> None:
+        if self._rpc_client is not None:
+            self._service.amqp._rpc_client = self._rpc_client
+            self._rpc_client = None
+        if not self.with_real:
+            await self._service.amqp._stream_offsets.commit()
+        await super().__aexit__(exc_type, exc_val, exc_tb)
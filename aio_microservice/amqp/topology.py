@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+from typing import TYPE_CHECKING
+
+from faststream.rabbit.helpers.declarer import RabbitDeclarer
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+    from aio_pika import RobustChannel, RobustExchange, RobustQueue
+    from faststream.rabbit import RabbitExchange, RabbitQueue
+    from faststream.rabbit.publisher.asyncapi import AsyncAPIPublisher
+    from faststream.rabbit.subscriber.asyncapi import AsyncAPISubscriber
+
+
+class AmqpTopology:
+    def __init__(self) -> None:
+        self.queues: dict[str, RabbitQueue] = {}
+        self.exchanges: dict[str, RabbitExchange] = {}
+        self.queue_bindings: dict[tuple[str, str, str], tuple[RabbitQueue, RabbitExchange]] = {}
+        self.exchange_bindings: dict[tuple[str, str, str], RabbitExchange] = {}
+
+    def add_queue(self, queue: RabbitQueue, exchange: RabbitExchange | None = None) -> None:
+        if not queue.name:
+            # server-named queues are only known once declared
+            return
+        self.queues.setdefault(queue.name, queue)
+        # like faststream does, passive queues are not bound
+        if exchange is not None and exchange.name and not queue.passive:
+            self.add_exchange(exchange)
+            key = (queue.name, exchange.name, queue.routing)
+            self.queue_bindings.setdefault(key, (queue, exchange))
+
+    def add_exchange(self, exchange: RabbitExchange) -> None:
+        if not exchange.name or exchange.name in self.exchanges:
+            return
+        self.exchanges[exchange.name] = exchange
+        if exchange.bind_to is not None and exchange.bind_to.name:
+            self.add_exchange(exchange.bind_to)
+            key = (exchange.name, exchange.bind_to.name, exchange.routing)
+            self.exchange_bindings.setdefault(key, exchange)
+
+    def collect(
+        self,
+        subscribers: Iterable[AsyncAPISubscriber],
+        publishers: Iterable[AsyncAPIPublisher],
+    ) -> None:
+        for subscriber in subscribers:
+            self.add_queue(subscriber.queue, subscriber.exchange)
+        for publisher in publishers:
+            self.add_exchange(publisher.exchange)
+
+    async def declare(
+        self,
+        channels: Sequence[RobustChannel],
+        queue_channels: Mapping[str, RobustChannel] | None = None,
+    ) -> None:
+        queue_channels = queue_channels or {}
+        # aiormq serializes the methods of a channel, so the entities are spread over several
+        # channels, and each binding goes over the channel of its destination
+        next_channel = itertools.cycle(channels)
+        # entities and bindings are declared in two rounds, as bindings require both ends
+        declared_exchanges, declared_queues = await asyncio.gather(
+            asyncio.gather(
+                *(self._declare_exchange(next(next_channel), e) for e in self.exchanges.values()),
+            ),
+            asyncio.gather(
+                *(
+                    self._declare_queue(queue_channels.get(name) or next(next_channel), queue)
+                    for name, queue in self.queues.items()
+                ),
+            ),
+        )
+        exchanges: dict[str, RobustExchange] = dict(zip(self.exchanges, declared_exchanges))
+        queues: dict[str, RobustQueue] = dict(zip(self.queues, declared_queues))
+        await asyncio.gather(
+            *(
+                exchanges[exchange.name].bind(
+                    exchanges[source_name],
+                    routing_key=routing_key,
+                    arguments=exchange.bind_arguments,
+                    timeout=exchange.timeout,
+                    robust=exchange.robust,
+                )
+                for (_, source_name, routing_key), exchange in self.exchange_bindings.items()
+            ),
+            *(
+                queues[queue.name].bind(
+                    exchanges[exchange.name],
+                    routing_key=routing_key,
+                    arguments=queue.bind_arguments,
+                    timeout=queue.timeout,
+                    robust=queue.robust,
+                )
+                for (_, _, routing_key), (queue, exchange) in self.queue_bindings.items()
+            ),
+        )
+
+    async def _declare_exchange(
+        self,
+        channel: RobustChannel,
+        exchange: RabbitExchange,
+    ) -> RobustExchange:
+        return await channel.declare_exchange(  # type: ignore[return-value]
+            name=exchange.name,
+            type=exchange.type.value,
+            durable=exchange.durable,
+            auto_delete=exchange.auto_delete,
+            passive=exchange.passive,
+            arguments=exchange.arguments,
+            timeout=exchange.timeout,
+            robust=exchange.robust,
+        )
+
+    async def _declare_queue(self, channel: RobustChannel, queue: RabbitQueue) -> RobustQueue:
+        return await channel.declare_queue(  # type: ignore[return-value]
+            name=queue.name,
+            durable=queue.durable,
+            exclusive=queue.exclusive,
+            passive=queue.passive,
+            auto_delete=queue.auto_delete,
+            arguments=queue.arguments,
+            timeout=queue.timeout,
+            robust=queue.robust,
+        )
+
+
+class AmqpDeclarer(RabbitDeclarer):
+    def __init__(self, channel: RobustChannel, topology: AmqpTopology) -> None:
+        super().__init__(channel)
+        self.topology = topology
+
+    async def declare_queue(self, queue: RabbitQueue, passive: bool = False) -> RobustQueue:
+        # queues of the topology only have to be looked up, which also skips binding them again
+        passive = passive or queue.name in self.topology.queues
+        return await super().declare_queue(queue, passive=passive)
+
+    async def declare_exchange(
+        self,
+        exchange: RabbitExchange,
+        passive: bool = False,
+    ) -> RobustExchange:
+        passive = passive or exchange.name in self.topology.exchanges
+        return await super().declare_exchange(exchange, passive=passive)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import types
+import typing
+from collections.abc import Iterable, Mapping
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+from faststream import context
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from faststream.types import AsyncFunc
+    from prometheus_client import Counter
+
+SCHEMA_VERSION_HEADER = "x-schema-version"
+ModelT = TypeVar("ModelT", bound=BaseModel)
+UNION_TYPES = {typing.Union, getattr(types, "UnionType", typing.Union)}
+
+
+class TrustedModelBuilder:
+    def __init__(
+        self,
+        handler: Callable[..., Any],
+        queue: str,
+        schema_version: str | None = None,
+    ) -> None:
+        self.queue = queue
+        self.constructed = 0
+        self.validated = 0
+        self.counters: dict[str, Counter] | None = None
+        self._handler = handler
+        self._schema_version = schema_version
+        self._parameter, self._model = _model_parameter(handler)
+
+    def build(self, data: Any, headers: Mapping[str, Any]) -> BaseModel:  # noqa: ANN401
+        schema_version = headers.get(SCHEMA_VERSION_HEADER)
+        if self._schema_version is None or schema_version == self._schema_version:
+            self._count("constructed")
+            return construct_model(self._model, data)
+        # unknown producers and schema versions fall back to full validation
+        self._count("validated")
+        return self._model.model_validate(data)
+
+    def make_handler(self) -> Callable[..., Awaitable[Any]]:
+        handler = self._handler
+        name = self._parameter.name
+
+        async def handle(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            # dependency injection passes the arguments by name
+            kwargs[name] = self.build(kwargs[name], context.get_local("message").headers)
+            result = handler(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        # dependency injection must pass the message through without validating it
+        signature = inspect.signature(handler)
+        handle.__name__ = getattr(handler, "__name__", handle.__name__)
+        handle.__qualname__ = getattr(handler, "__qualname__", handle.__qualname__)
+        handle.__doc__ = handler.__doc__
+        handle.__signature__ = signature.replace(  # type: ignore[attr-defined]
+            parameters=[
+                parameter.replace(annotation=Any) if parameter.name == name else parameter
+                for parameter in signature.parameters.values()
+            ],
+        )
+        return handle
+
+    def _count(self, path: str) -> None:
+        if path == "constructed":
+            self.constructed += 1
+        else:
+            self.validated += 1
+        if self.counters is not None:
+            self.counters[path].inc()
+
+
+class SchemaVersionStamp:
+    def __init__(self, schema_version: str) -> None:
+        self.schema_version = schema_version
+
+    async def __call__(
+        self,
+        call_next: AsyncFunc,
+        message: Any,  # noqa: ANN401
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        # the headers of a handler response override the headers of the publisher
+        kwargs["headers"] = {
+            **(kwargs.get("headers") or {}),
+            SCHEMA_VERSION_HEADER: self.schema_version,
+        }
+        return await call_next(message, *args, **kwargs)
+
+
+def construct_model(model: type[ModelT], data: Any) -> ModelT:  # noqa: ANN401
+    if not isinstance(data, Mapping):
+        return model.model_validate(data)
+    values = dict(data)
+    for key, convert in _nested_converters(model):
+        if key in values:
+            values[key] = convert(values[key])
+    return model.model_construct(**values)
+
+
+def _construct_nested_model(model: type[BaseModel], value: Any) -> Any:  # noqa: ANN401
+    return construct_model(model, value) if isinstance(value, Mapping) else value
+
+
+@functools.cache
+def _nested_converters(model: type[BaseModel]) -> list[tuple[str, Callable[[Any], Any]]]:
+    converters = []
+    for name, field in model.model_fields.items():
+        convert = _make_converter(field.annotation)
+        if convert is not None:
+            converters.append((field.alias or name, convert))
+    return converters
+
+
+def _make_converter(annotation: Any) -> Callable[[Any], Any] | None:  # noqa: ANN401
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return functools.partial(_construct_nested_model, annotation)
+
+    origin = typing.get_origin(annotation)
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if origin is None or not args:
+        return None
+    if origin in UNION_TYPES:
+        # only optional models are constructed, other unions are left as they are
+        return _make_converter(args[0]) if len(args) == 1 else None
+    if not (isinstance(origin, type) and issubclass(origin, Iterable)):
+        return None
+
+    is_mapping = issubclass(origin, Mapping)
+    convert = _make_converter(args[-1] if is_mapping else args[0])
+    if convert is None:
+        return None
+    if is_mapping:
+        return lambda value: {key: convert(item) for key, item in value.items()}
+    return lambda value: [convert(item) for item in value]
+
+
+def _model_parameter(handler: Callable[..., Any]) -> tuple[inspect.Parameter, type[BaseModel]]:
+    parameters = list(inspect.signature(handler).parameters.values())
+    annotation = typing.get_type_hints(handler).get(parameters[0].name) if parameters else None
+    if not (isinstance(annotation, type) and issubclass(annotation, BaseModel)):
+        msg = f"Trusted handler {handler!r} must accept a pydantic model"
+        raise TypeError(msg)
+    return parameters[0], annotation
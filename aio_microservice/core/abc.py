@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import inspect
+import sys
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Callable, ClassVar, TypeVar
 
@@ -81,6 +82,18 @@ class ExtensionABC(CommonABC):
         ExtensionABC._extension_classes.add(cls)
 
 
+PROMETHEUS_EXTENSION = ("aio_microservice.prometheus.extension", "PrometheusExtension")
+
+
+def has_extension(service: object, module: str, name: str) -> bool:
+    # a service composed with an extension has imported its module already,
+    # so optional extensions can be detected without importing their dependencies
+    extension_module = sys.modules.get(module)
+    if extension_module is None:
+        return False
+    return isinstance(service, getattr(extension_module, name))
+
+
 CommonABCT = TypeVar("CommonABCT", bound=CommonABC)
 
 
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from litestar.enums import ScopeType
+
+if TYPE_CHECKING:
+    from litestar.types import ASGIApp, Receive, Scope, Send
+
+
+class LoadMonitor:
+    def __init__(self) -> None:
+        self.in_flight_requests = 0
+        self.loop_lag = 0.0
+
+    def middleware(self, app: ASGIApp) -> ASGIApp:
+        async def count_in_flight_requests(scope: Scope, receive: Receive, send: Send) -> None:
+            if scope["type"] != ScopeType.HTTP:
+                await app(scope, receive, send)
+                return
+            self.in_flight_requests += 1
+            try:
+                await app(scope, receive, send)
+            finally:
+                self.in_flight_requests -= 1
+
+        return count_in_flight_requests
+
+    async def measure_loop_lag(self, interval: float) -> float:
+        # a busy event loop resumes the sleep late
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.sleep(interval)
+        self.loop_lag = max(loop.time() - start - interval, 0.0)
+        return self.loop_lag
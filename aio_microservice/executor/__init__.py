@@ -0,0 +1,13 @@
+from aio_microservice.executor.extension import (
+    ExecutorExtension,
+    ExecutorExtensionSettings,
+    ExecutorQueueWait,
+    ExecutorSettings,
+)
+
+__all__ = [
+    "ExecutorExtension",
+    "ExecutorExtensionSettings",
+    "ExecutorQueueWait",
+    "ExecutorSettings",
+]
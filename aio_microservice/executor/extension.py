@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+import typing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Literal, TypeVar
+
+from humps import kebabize
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from aio_microservice.core.abc import (
+    PROMETHEUS_EXTENSION,
+    ExtensionABC,
+    has_extension,
+    shutdown_hook,
+    startup_hook,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from prometheus_client import Histogram
+
+ExecutorKind = Literal["thread", "process"]
+T = TypeVar("T")
+
+
+class ExecutorSettings(BaseModel):
+    max_threads: int | None = Field(
+        default=None,
+        description="The number of worker threads (defaults to the number of cpus + 4).",
+    )
+    max_processes: int | None = Field(
+        default=None,
+        description="The number of worker processes (defaults to the number of cpus).",
+    )
+
+
+@dataclass
+class ExecutorQueueWait:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class ExecutorExtensionImpl:
+    def __init__(self, service: ExecutorExtension, settings: ExecutorSettings) -> None:
+        self._service = service
+        self._settings = settings
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._queue_wait: dict[ExecutorKind, ExecutorQueueWait] = {
+            "thread": ExecutorQueueWait(),
+            "process": ExecutorQueueWait(),
+        }
+        self._queue_wait_histogram = self._create_queue_wait_histogram()
+
+    def _create_queue_wait_histogram(self) -> Histogram | None:
+        if not has_extension(self._service, *PROMETHEUS_EXTENSION):
+            return None
+
+        from aio_microservice.executor.metrics import QUEUE_WAIT_SECONDS  # noqa: PLC0415
+
+        return QUEUE_WAIT_SECONDS
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self._settings.max_threads,
+                thread_name_prefix="executor",
+            )
+        return self._thread_pool
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self._settings.max_processes)
+        return self._process_pool
+
+    @property
+    def queue_wait(self) -> dict[ExecutorKind, ExecutorQueueWait]:
+        return self._queue_wait
+
+    def get_pool(self, kind: ExecutorKind) -> Executor:
+        if kind == "thread":
+            return self.thread_pool
+        return self.process_pool
+
+    async def shutdown(self) -> None:
+        loop = asyncio.get_running_loop()
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                await loop.run_in_executor(None, partial(pool.shutdown, cancel_futures=True))
+        self._thread_pool = None
+        self._process_pool = None
+
+    async def run(
+        self,
+        kind: ExecutorKind,
+        fn: Callable[..., T],
+        /,
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[tuple[float, T]] = loop.run_in_executor(
+            self.get_pool(kind),
+            partial(_call_with_queue_wait, time.monotonic(), fn, *args, **kwargs),
+        )
+        queue_wait, result = await future
+        self._record_queue_wait(kind, queue_wait)
+        return result
+
+    def _record_queue_wait(self, kind: ExecutorKind, seconds: float) -> None:
+        queue_wait = self._queue_wait[kind]
+        queue_wait.count += 1
+        queue_wait.total_seconds += seconds
+        queue_wait.max_seconds = max(queue_wait.max_seconds, seconds)
+        if self._queue_wait_histogram is not None:
+            self._queue_wait_histogram.labels(
+                app_name=kebabize(self._service.__class__.__name__),
+                executor=kind,
+            ).observe(seconds)
+
+
+class ExecutorExtensionSettings(BaseModel):
+    executor: ExecutorSettings = ExecutorSettings()
+
+
+class ExecutorExtension(ExtensionABC):
+    def __init__(self, settings: ExecutorExtensionSettings) -> None:
+        self.executor = ExecutorExtensionImpl(service=self, settings=settings.executor)
+
+    @startup_hook
+    async def _executor_startup_hook(self) -> None:
+        logger.info("Starting executor pools")
+        # process-workers are spawned on demand, so touching the pools is cheap
+        _ = self.executor.thread_pool
+        _ = self.executor.process_pool
+
+    @shutdown_hook
+    async def _executor_shutdown_hook(self) -> None:
+        logger.info("Stopping executor pools")
+        await self.executor.shutdown()
+
+
+def make_offloaded(
+    service: object,
+    kind: ExecutorKind,
+    fn: Callable[..., Any],
+) -> Callable[..., Awaitable[Any]]:
+    if not isinstance(service, ExecutorExtension):
+        msg = f"Running {fn.__name__} in the {kind} executor requires the ExecutorExtension"
+        raise TypeError(msg)
+    if inspect.iscoroutinefunction(fn):
+        msg = f"Only synchronous functions can run in an executor, got {fn.__name__}"
+        raise ValueError(msg)
+    if kind == "process" and inspect.ismethod(fn):
+        msg = f"The process executor can not run bound method {fn.__name__}, use a staticmethod"
+        raise ValueError(msg)
+
+    async def offloaded(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return await service.executor.run(kind, fn, *args, **kwargs)
+
+    # keep name and (resolved) signature, so dependency injection still sees the parameters
+    type_hints = typing.get_type_hints(fn)
+    signature = inspect.signature(fn)
+    offloaded.__name__ = fn.__name__
+    offloaded.__qualname__ = fn.__qualname__
+    offloaded.__doc__ = fn.__doc__
+    offloaded.__annotations__ = type_hints
+    offloaded.__signature__ = signature.replace(  # type: ignore[attr-defined]
+        parameters=[
+            parameter.replace(annotation=type_hints.get(name, parameter.annotation))
+            for name, parameter in signature.parameters.items()
+        ],
+        return_annotation=type_hints.get("return", signature.return_annotation),
+    )
+    return offloaded
+
+
+def _call_with_queue_wait(
+    submitted_at: float,
+    fn: Callable[..., T],
+    /,
+    *args: Any,  # noqa: ANN401
+    **kwargs: Any,  # noqa: ANN401
+) -> tuple[float, T]:
+    queue_wait = time.monotonic() - submitted_at
+    return queue_wait, fn(*args, **kwargs)
@@ -0,0 +1,7 @@
+from prometheus_client import Histogram
+
+QUEUE_WAIT_SECONDS = Histogram(
+    name="executor_queue_wait_seconds",
+    documentation="Time functions waited for a free worker of an executor pool",
+    labelnames=["app_name", "executor"],
+)
@@ -1,11 +1,18 @@
 from aio_microservice.s3.extension import (
+    S3BulkError,
+    S3BulkResult,
     S3Extension,
     S3ExtensionSettings,
     S3Settings,
 )
+from aio_microservice.s3.testing import InMemoryS3Client, TestS3Backend
 
 __all__ = [
+    "InMemoryS3Client",
+    "S3BulkError",
+    "S3BulkResult",
     "S3Extension",
     "S3ExtensionSettings",
     "S3Settings",
+    "TestS3Backend",
 ]
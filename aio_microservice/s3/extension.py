@@ -1,16 +1,37 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Generic, TypeVar
 
 import boto3
 import botocore
+from botocore.config import Config
 from loguru import logger
 from pydantic import BaseModel, Field, SecretStr
 
-from aio_microservice.core.abc import ExtensionABC, readiness_probe, startup_hook
+from aio_microservice.core.abc import ExtensionABC, readiness_probe, shutdown_hook, startup_hook
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator, Mapping
+
     from mypy_boto3_s3.client import S3Client
+    from mypy_boto3_s3.type_defs import (
+        HeadObjectOutputTypeDef,
+        ListObjectsV2OutputTypeDef,
+        ObjectTypeDef,
+    )
+
+T = TypeVar("T")
+
+DELETE_OBJECTS_MAX_KEYS = 1000
 
 
 class S3Settings(BaseModel):
@@ -23,6 +44,83 @@ class S3Settings(BaseModel):
     secret_access_key: SecretStr = Field(
         description="The AWS secret access key used for authentication.",
     )
+    max_workers: int | None = Field(
+        default=None,
+        description="The maximum number of threads used to run blocking S3 requests.",
+    )
+    presigned_url_cache_size: int = Field(
+        default=1024,
+        description="The maximum number of cached presigned URLs (0 disables caching).",
+    )
+    presigned_url_min_remaining_validity: float = Field(
+        default=60,
+        description="The minimum remaining validity of a cached presigned URL (in seconds).",
+    )
+    readiness_bucket: str | None = Field(
+        default=None,
+        description=(
+            "The bucket to check with HeadBucket for verifying the connection. "
+            "Falls back to listing all buckets if not set."
+        ),
+    )
+    readiness_timeout: float = Field(
+        default=5,
+        description="The timeout for verifying the connection (in seconds).",
+    )
+    readiness_cache_ttl: float = Field(
+        default=5,
+        description="The duration to reuse the result of verifying the connection (in seconds).",
+    )
+
+
+@dataclass
+class S3BulkError:
+    key: str
+    code: str
+    message: str
+
+
+@dataclass
+class S3BulkResult(Generic[T]):
+    succeeded: dict[str, T] = field(default_factory=dict)
+    errors: list[S3BulkError] = field(default_factory=list)
+
+
+class PresignedUrlCache:
+    def __init__(self, max_size: int, min_remaining_validity: float) -> None:
+        self._max_size = max_size
+        self._min_remaining_validity = min_remaining_validity
+        # maps cache-key to (url, expiry as monotonic timestamp)
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            url, expires_at = entry
+            if expires_at - time.monotonic() < self._min_remaining_validity:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return url
+
+    def put(self, key: str, url: str, expires_in: float) -> None:
+        if self._max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (url, time.monotonic() + expires_in)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
 
 class S3ExtensionImpl:
@@ -36,6 +134,26 @@ class S3ExtensionImpl:
             service_name="s3",
             endpoint_url=self._settings.endpoint_url,
         )
+        self._executor: ThreadPoolExecutor | None = None
+        self._presigned_url_cache = PresignedUrlCache(
+            max_size=self._settings.presigned_url_cache_size,
+            min_remaining_validity=self._settings.presigned_url_min_remaining_validity,
+        )
+        # the probe gives up on hanging endpoints instead of waiting for the default timeouts
+        self._boto3_s3_probe_client = self.session.client(
+            service_name="s3",
+            endpoint_url=self._settings.endpoint_url,
+            config=Config(
+                connect_timeout=self._settings.readiness_timeout,
+                read_timeout=self._settings.readiness_timeout,
+                retries={"total_max_attempts": 1},
+            ),
+        )
+        self._probe_executor: ThreadPoolExecutor | None = None
+        # the lock is created lazily to bind it to the running event-loop
+        self._connection_check_lock: asyncio.Lock | None = None
+        self._connection_check: asyncio.Future[bool] | None = None
+        self._connection_check_result: tuple[float, bool] | None = None
 
     @property
     def session(self) -> boto3.session.Session:
@@ -45,14 +163,316 @@ class S3ExtensionImpl:
     def client(self) -> S3Client:
         return self._boto3_s3_client
 
+    @property
+    def presigned_url_cache(self) -> PresignedUrlCache:
+        return self._presigned_url_cache
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._settings.max_workers,
+                thread_name_prefix="s3",
+            )
+        return self._executor
+
+    def shutdown_executor(self) -> None:
+        if self._probe_executor is not None:
+            self._probe_executor.shutdown(wait=False, cancel_futures=True)
+            self._probe_executor = None
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def run_in_executor(
+        self,
+        fn: Callable[..., T],
+        /,
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> asyncio.Future[T]:
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
     def verify_connection(self) -> bool:
         try:
-            self._boto3_s3_client.list_buckets()
-        except botocore.exceptions.EndpointConnectionError:
-            pass
-        else:
-            return True
-        return False
+            if self._settings.readiness_bucket is None:
+                self._boto3_s3_probe_client.list_buckets()
+            else:
+                self._boto3_s3_probe_client.head_bucket(Bucket=self._settings.readiness_bucket)
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            logger.debug("Failed to verify connection: {}", e)
+            return False
+        return True
+
+    async def check_connection(self) -> bool:
+        if self._connection_check_lock is None:
+            self._connection_check_lock = asyncio.Lock()
+        # concurrent callers share a single in-flight check
+        async with self._connection_check_lock:
+            if self._connection_check_result is not None:
+                checked_at, result = self._connection_check_result
+                if time.monotonic() - checked_at < self._settings.readiness_cache_ttl:
+                    return result
+            if self._connection_check is None or self._connection_check.done():
+                # the probe has a worker of its own, so a hanging check can not starve requests
+                if self._probe_executor is None:
+                    self._probe_executor = ThreadPoolExecutor(
+                        max_workers=1,
+                        thread_name_prefix="s3-probe",
+                    )
+                loop = asyncio.get_running_loop()
+                self._connection_check = loop.run_in_executor(
+                    self._probe_executor,
+                    self.verify_connection,
+                )
+            try:
+                # a check that is still running is awaited again instead of starting another one
+                result = await asyncio.wait_for(
+                    asyncio.shield(self._connection_check),
+                    timeout=self._settings.readiness_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Timed out verifying connection")
+                result = False
+            self._connection_check_result = (time.monotonic(), result)
+            return result
+
+    def generate_presigned_url(
+        self,
+        client_method: str,
+        params: Mapping[str, Any],
+        expires_in: int = 3600,
+        http_method: str | None = None,
+    ) -> str:
+        cache_key = json.dumps(
+            [client_method, params, expires_in, http_method],
+            sort_keys=True,
+            default=str,
+        )
+        if (url := self._presigned_url_cache.get(cache_key)) is not None:
+            return url
+        url = self.client.generate_presigned_url(
+            ClientMethod=client_method,
+            Params=params,
+            ExpiresIn=expires_in,
+            HttpMethod=http_method,  # type: ignore[arg-type]
+        )
+        self._presigned_url_cache.put(cache_key, url, expires_in=expires_in)
+        return url
+
+    async def iter_objects(
+        self,
+        bucket: str,
+        prefix: str = "",
+        page_size: int = 1000,
+    ) -> AsyncIterator[ObjectTypeDef]:
+        async for page in self._iter_object_pages(
+            bucket=bucket,
+            prefix=prefix,
+            page_size=page_size,
+        ):
+            for obj in page:
+                yield obj
+
+    async def iter_objects_parallel(
+        self,
+        bucket: str,
+        prefixes: Iterable[str],
+        page_size: int = 1000,
+    ) -> AsyncIterator[ObjectTypeDef]:
+        # NOTE objects are yielded in the order their pages arrive, not sorted by key
+        prefixes = list(prefixes)
+        pages: asyncio.Queue[list[ObjectTypeDef] | Exception | None] = asyncio.Queue(
+            maxsize=2 * len(prefixes),
+        )
+
+        async def list_prefix(prefix: str) -> None:
+            try:
+                async for page in self._iter_object_pages(
+                    bucket=bucket,
+                    prefix=prefix,
+                    page_size=page_size,
+                ):
+                    await pages.put(page)
+            except Exception as error:  # noqa: BLE001
+                await pages.put(error)
+            else:
+                await pages.put(None)
+
+        tasks = [asyncio.create_task(list_prefix(prefix)) for prefix in prefixes]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                page = await pages.get()
+                if page is None:
+                    remaining -= 1
+                    continue
+                if isinstance(page, Exception):
+                    # the first failing prefix ends the listing, the others are cancelled
+                    raise page
+                for obj in page:
+                    yield obj
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def bulk_delete_objects(
+        self,
+        bucket: str,
+        keys: Iterable[str] | AsyncIterable[str],
+        batch_size: int = DELETE_OBJECTS_MAX_KEYS,
+        max_concurrency: int = 4,
+    ) -> AsyncIterator[S3BulkResult[None]]:
+        if not 0 < batch_size <= DELETE_OBJECTS_MAX_KEYS:
+            msg = f"batch_size must be between 1 and {DELETE_OBJECTS_MAX_KEYS}"
+            raise ValueError(msg)
+
+        def delete_batch(batch: list[str]) -> S3BulkResult[None]:
+            result: S3BulkResult[None] = S3BulkResult()
+            try:
+                response = self.client.delete_objects(
+                    Bucket=bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+            except botocore.exceptions.ClientError as e:
+                result.errors = [_bulk_error_from_client_error(key, e) for key in batch]
+                return result
+            result.errors = [
+                S3BulkError(key=error["Key"], code=error["Code"], message=error["Message"])
+                for error in response.get("Errors", [])
+            ]
+            failed_keys = {error.key for error in result.errors}
+            result.succeeded = {key: None for key in batch if key not in failed_keys}
+            return result
+
+        async for result in self._run_bulk(keys, batch_size, max_concurrency, delete_batch):
+            yield result
+
+    async def bulk_head_objects(
+        self,
+        bucket: str,
+        keys: Iterable[str] | AsyncIterable[str],
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+    ) -> AsyncIterator[S3BulkResult[HeadObjectOutputTypeDef]]:
+        def head_batch(batch: list[str]) -> S3BulkResult[HeadObjectOutputTypeDef]:
+            result: S3BulkResult[HeadObjectOutputTypeDef] = S3BulkResult()
+            for key in batch:
+                try:
+                    result.succeeded[key] = self.client.head_object(Bucket=bucket, Key=key)
+                except botocore.exceptions.ClientError as e:  # noqa: PERF203
+                    result.errors.append(_bulk_error_from_client_error(key, e))
+            return result
+
+        async for result in self._run_bulk(keys, batch_size, max_concurrency, head_batch):
+            yield result
+
+    async def bulk_put_object_tagging(
+        self,
+        bucket: str,
+        keys: Iterable[str] | AsyncIterable[str],
+        tags: Mapping[str, str],
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+    ) -> AsyncIterator[S3BulkResult[None]]:
+        tag_set = [{"Key": key, "Value": value} for key, value in tags.items()]
+
+        def tag_batch(batch: list[str]) -> S3BulkResult[None]:
+            result: S3BulkResult[None] = S3BulkResult()
+            for key in batch:
+                try:
+                    self.client.put_object_tagging(
+                        Bucket=bucket,
+                        Key=key,
+                        Tagging={"TagSet": tag_set},  # type: ignore[typeddict-item]
+                    )
+                except botocore.exceptions.ClientError as e:  # noqa: PERF203
+                    result.errors.append(_bulk_error_from_client_error(key, e))
+                else:
+                    result.succeeded[key] = None
+            return result
+
+        async for result in self._run_bulk(keys, batch_size, max_concurrency, tag_batch):
+            yield result
+
+    async def _run_bulk(
+        self,
+        keys: Iterable[str] | AsyncIterable[str],
+        batch_size: int,
+        max_concurrency: int,
+        run_batch: Callable[[list[str]], S3BulkResult[T]],
+    ) -> AsyncIterator[S3BulkResult[T]]:
+        pending: set[asyncio.Future[S3BulkResult[T]]] = set()
+        try:
+            async for batch in _iter_batches(keys, batch_size):
+                if len(pending) >= max_concurrency:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        yield future.result()
+                pending.add(self.run_in_executor(run_batch, batch))
+            for future in asyncio.as_completed(pending):
+                yield await future
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _iter_object_pages(
+        self,
+        bucket: str,
+        prefix: str,
+        page_size: int,
+    ) -> AsyncIterator[list[ObjectTypeDef]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        page_iterator: Iterator[ListObjectsV2OutputTypeDef] = iter(
+            paginator.paginate(
+                Bucket=bucket,
+                Prefix=prefix,
+                PaginationConfig={"PageSize": page_size},
+            ),
+        )
+        next_page = self.run_in_executor(next, page_iterator, None)
+        try:
+            while (page := await next_page) is not None:
+                # prefetch the following page while the current one is consumed
+                next_page = self.run_in_executor(next, page_iterator, None)
+                yield page.get("Contents", [])
+        finally:
+            next_page.cancel()
+
+
+def _bulk_error_from_client_error(key: str, error: botocore.exceptions.ClientError) -> S3BulkError:
+    return S3BulkError(
+        key=key,
+        code=error.response.get("Error", {}).get("Code", ""),
+        message=error.response.get("Error", {}).get("Message", ""),
+    )
+
+
+async def _iter_batches(
+    keys: Iterable[str] | AsyncIterable[str],
+    batch_size: int,
+) -> AsyncIterator[list[str]]:
+    batch: list[str] = []
+    if isinstance(keys, AsyncIterable):
+        async for key in keys:
+            batch.append(key)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    else:
+        for key in keys:
+            batch.append(key)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
 
 
 class S3ExtensionSettings(BaseModel):
@@ -65,9 +485,13 @@ class S3Extension(ExtensionABC):
 
     @startup_hook
     async def _s3_startup_hook(self) -> None:
-        if not self.s3.verify_connection():
+        if not await self.s3.check_connection():
             logger.error("Failed to verify connection")
 
+    @shutdown_hook
+    async def _s3_shutdown_hook(self) -> None:
+        self.s3.shutdown_executor()
+
     @readiness_probe
     async def _s3_readiness_probe(self) -> bool:
-        return self.s3.verify_connection()
+        return await self.s3.check_connection()
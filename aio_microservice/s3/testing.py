@@ -0,0 +1,524 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, BinaryIO, TypeVar
+
+from botocore.exceptions import ClientError, OperationNotPageableError
+from botocore.response import StreamingBody
+
+from aio_microservice.s3.extension import S3Extension
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from types import TracebackType
+
+ServiceT = TypeVar("ServiceT", bound=S3Extension)
+
+
+@dataclass
+class _StoredObject:
+    data: bytes
+    etag: str
+    content_type: str = "binary/octet-stream"
+    metadata: dict[str, str] = field(default_factory=dict)
+    tags: list[dict[str, str]] = field(default_factory=list)
+    last_modified: datetime = field(default_factory=lambda: datetime.now(tz=timezone.utc))
+
+
+@dataclass
+class _MultipartUpload:
+    bucket: str
+    key: str
+    content_type: str
+    metadata: dict[str, str]
+    parts: dict[int, _StoredObject] = field(default_factory=dict)
+
+
+def _client_error(operation_name: str, code: str, message: str, status_code: int) -> ClientError:
+    return ClientError(
+        error_response={
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"HTTPStatusCode": status_code},  # type: ignore[typeddict-item]
+        },
+        operation_name=operation_name,
+    )
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.md5(data).hexdigest()}"'  # noqa: S324
+
+
+def _read_body(body: bytes | str | BinaryIO) -> bytes:
+    if isinstance(body, str):
+        return body.encode()
+    if isinstance(body, bytes):
+        return body
+    return body.read()
+
+
+class InMemoryS3Client:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self._buckets: dict[str, dict[str, _StoredObject]] = {}
+        self._multipart_uploads: dict[str, _MultipartUpload] = {}
+        self._lock = threading.RLock()
+
+    def _simulate_latency(self) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _get_bucket(self, operation_name: str, bucket: str) -> dict[str, _StoredObject]:
+        if (objects := self._buckets.get(bucket)) is None:
+            raise _client_error(
+                operation_name,
+                code="NoSuchBucket",
+                message="The specified bucket does not exist",
+                status_code=404,
+            )
+        return objects
+
+    def _get_object(self, operation_name: str, bucket: str, key: str) -> _StoredObject:
+        objects = self._get_bucket(operation_name, bucket)
+        if (obj := objects.get(key)) is None:
+            raise _client_error(
+                operation_name,
+                code="NoSuchKey",
+                message="The specified key does not exist.",
+                status_code=404,
+            )
+        return obj
+
+    # buckets
+
+    def create_bucket(self, Bucket: str, **_: Any) -> dict[str, Any]:  # noqa: N803, ANN401
+        self._simulate_latency()
+        with self._lock:
+            if Bucket in self._buckets:
+                raise _client_error(
+                    "CreateBucket",
+                    code="BucketAlreadyOwnedByYou",
+                    message="Your previous request to create the named bucket succeeded.",
+                    status_code=409,
+                )
+            self._buckets[Bucket] = {}
+        return {"Location": f"/{Bucket}"}
+
+    def delete_bucket(self, Bucket: str) -> dict[str, Any]:  # noqa: N803
+        self._simulate_latency()
+        with self._lock:
+            if self._get_bucket("DeleteBucket", Bucket):
+                raise _client_error(
+                    "DeleteBucket",
+                    code="BucketNotEmpty",
+                    message="The bucket you tried to delete is not empty",
+                    status_code=409,
+                )
+            del self._buckets[Bucket]
+        return {}
+
+    def head_bucket(self, Bucket: str) -> dict[str, Any]:  # noqa: N803
+        self._simulate_latency()
+        with self._lock:
+            if Bucket not in self._buckets:
+                # HEAD responses carry no body, so the code is the status
+                raise _client_error("HeadBucket", code="404", message="Not Found", status_code=404)
+        return {}
+
+    def list_buckets(self) -> dict[str, Any]:
+        self._simulate_latency()
+        with self._lock:
+            return {"Buckets": [{"Name": name} for name in sorted(self._buckets)]}
+
+    # objects
+
+    def put_object(
+        self,
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        Body: bytes | str | BinaryIO = b"",  # noqa: N803
+        ContentType: str = "binary/octet-stream",  # noqa: N803
+        Metadata: dict[str, str] | None = None,  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        data = _read_body(Body)
+        obj = _StoredObject(
+            data=data,
+            etag=_etag(data),
+            content_type=ContentType,
+            metadata=dict(Metadata or {}),
+        )
+        with self._lock:
+            self._get_bucket("PutObject", Bucket)[Key] = obj
+        return {"ETag": obj.etag}
+
+    def get_object(
+        self,
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        Range: str | None = None,  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        with self._lock:
+            obj = self._get_object("GetObject", Bucket, Key)
+        response = self._object_attributes(obj)
+        data = obj.data
+        if Range is not None:
+            start, end = self._parse_range(Range, size=len(data))
+            response["ContentRange"] = f"bytes {start}-{end}/{len(data)}"
+            data = data[start : end + 1]
+        response["ContentLength"] = len(data)
+        response["Body"] = StreamingBody(io.BytesIO(data), len(data))
+        return response
+
+    def head_object(self, Bucket: str, Key: str, **_: Any) -> dict[str, Any]:  # noqa: N803, ANN401
+        self._simulate_latency()
+        with self._lock:
+            try:
+                obj = self._get_object("HeadObject", Bucket, Key)
+            except ClientError:
+                # HEAD responses carry no body, so the code is the status
+                raise _client_error(
+                    "HeadObject",
+                    code="404",
+                    message="Not Found",
+                    status_code=404,
+                ) from None
+        return self._object_attributes(obj)
+
+    def delete_object(self, Bucket: str, Key: str, **_: Any) -> dict[str, Any]:  # noqa: N803, ANN401
+        self._simulate_latency()
+        with self._lock:
+            self._get_bucket("DeleteObject", Bucket).pop(Key, None)
+        return {}
+
+    def delete_objects(
+        self,
+        Bucket: str,  # noqa: N803
+        Delete: dict[str, Any],  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        keys = [obj["Key"] for obj in Delete["Objects"]]
+        with self._lock:
+            objects = self._get_bucket("DeleteObjects", Bucket)
+            for key in keys:
+                objects.pop(key, None)
+        if Delete.get("Quiet", False):
+            return {}
+        return {"Deleted": [{"Key": key} for key in keys]}
+
+    def list_objects_v2(
+        self,
+        Bucket: str,  # noqa: N803
+        Prefix: str = "",  # noqa: N803
+        Delimiter: str = "",  # noqa: N803
+        MaxKeys: int = 1000,  # noqa: N803
+        ContinuationToken: str = "",  # noqa: N803
+        StartAfter: str = "",  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        with self._lock:
+            objects = dict(self._get_bucket("ListObjectsV2", Bucket))
+
+        start_after = ContinuationToken or StartAfter
+        contents: list[dict[str, Any]] = []
+        common_prefixes: list[str] = []
+        last_key = ""
+        is_truncated = False
+        for key in sorted(objects):
+            if not key.startswith(Prefix) or key <= start_after:
+                continue
+            if len(contents) + len(common_prefixes) >= MaxKeys:
+                is_truncated = True
+                break
+            last_key = key
+            if Delimiter and Delimiter in key[len(Prefix) :]:
+                common_prefix = key[: key.index(Delimiter, len(Prefix)) + len(Delimiter)]
+                if common_prefix not in common_prefixes:
+                    common_prefixes.append(common_prefix)
+                continue
+            obj = objects[key]
+            contents.append({
+                "Key": key,
+                "LastModified": obj.last_modified,
+                "ETag": obj.etag,
+                "Size": len(obj.data),
+                "StorageClass": "STANDARD",
+            })
+
+        response: dict[str, Any] = {
+            "Name": Bucket,
+            "Prefix": Prefix,
+            "MaxKeys": MaxKeys,
+            "KeyCount": len(contents) + len(common_prefixes),
+            "IsTruncated": is_truncated,
+        }
+        if contents:
+            response["Contents"] = contents
+        if common_prefixes:
+            response["CommonPrefixes"] = [{"Prefix": p} for p in common_prefixes]
+        if is_truncated:
+            response["NextContinuationToken"] = last_key
+        return response
+
+    def can_paginate(self, operation_name: str) -> bool:
+        # the extension only paginates object listings
+        return operation_name == "list_objects_v2"
+
+    def get_paginator(self, operation_name: str) -> _ListObjectsV2Paginator:
+        if not self.can_paginate(operation_name):
+            raise OperationNotPageableError(operation_name=operation_name)
+        return _ListObjectsV2Paginator(self)
+
+    # tagging
+
+    def put_object_tagging(
+        self,
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        Tagging: dict[str, Any],  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        with self._lock:
+            obj = self._get_object("PutObjectTagging", Bucket, Key)
+            obj.tags = [dict(tag) for tag in Tagging["TagSet"]]
+        return {}
+
+    def get_object_tagging(self, Bucket: str, Key: str, **_: Any) -> dict[str, Any]:  # noqa: N803, ANN401
+        self._simulate_latency()
+        with self._lock:
+            obj = self._get_object("GetObjectTagging", Bucket, Key)
+            return {"TagSet": [dict(tag) for tag in obj.tags]}
+
+    # multipart uploads
+
+    def create_multipart_upload(
+        self,
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        ContentType: str = "binary/octet-stream",  # noqa: N803
+        Metadata: dict[str, str] | None = None,  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._get_bucket("CreateMultipartUpload", Bucket)
+            self._multipart_uploads[upload_id] = _MultipartUpload(
+                bucket=Bucket,
+                key=Key,
+                content_type=ContentType,
+                metadata=dict(Metadata or {}),
+            )
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def upload_part(
+        self,
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        UploadId: str,  # noqa: N803
+        PartNumber: int,  # noqa: N803
+        Body: bytes | str | BinaryIO = b"",  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        data = _read_body(Body)
+        part = _StoredObject(data=data, etag=_etag(data))
+        with self._lock:
+            self._get_multipart_upload("UploadPart", UploadId).parts[PartNumber] = part
+        return {"ETag": part.etag}
+
+    def complete_multipart_upload(
+        self,
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        UploadId: str,  # noqa: N803
+        MultipartUpload: dict[str, Any],  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        with self._lock:
+            upload = self._get_multipart_upload("CompleteMultipartUpload", UploadId)
+            parts: list[_StoredObject] = []
+            for requested_part in MultipartUpload["Parts"]:
+                part = upload.parts.get(requested_part["PartNumber"])
+                if part is None or part.etag != requested_part["ETag"]:
+                    raise _client_error(
+                        "CompleteMultipartUpload",
+                        code="InvalidPart",
+                        message="One or more of the specified parts could not be found.",
+                        status_code=400,
+                    )
+                parts.append(part)
+            digest = hashlib.md5(  # noqa: S324
+                b"".join(bytes.fromhex(part.etag.strip('"')) for part in parts),
+            )
+            obj = _StoredObject(
+                data=b"".join(part.data for part in parts),
+                etag=f'"{digest.hexdigest()}-{len(parts)}"',
+                content_type=upload.content_type,
+                metadata=upload.metadata,
+            )
+            self._get_bucket("CompleteMultipartUpload", Bucket)[Key] = obj
+            del self._multipart_uploads[UploadId]
+        return {"Bucket": Bucket, "Key": Key, "ETag": obj.etag}
+
+    def abort_multipart_upload(
+        self,
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        UploadId: str,  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> dict[str, Any]:
+        self._simulate_latency()
+        with self._lock:
+            self._get_multipart_upload("AbortMultipartUpload", UploadId)
+            del self._multipart_uploads[UploadId]
+        return {}
+
+    def _get_multipart_upload(self, operation_name: str, upload_id: str) -> _MultipartUpload:
+        if (upload := self._multipart_uploads.get(upload_id)) is None:
+            raise _client_error(
+                operation_name,
+                code="NoSuchUpload",
+                message="The specified multipart upload does not exist.",
+                status_code=404,
+            )
+        return upload
+
+    # managed transfers and presigning
+
+    def upload_fileobj(
+        self,
+        Fileobj: BinaryIO,  # noqa: N803
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        ExtraArgs: dict[str, Any] | None = None,  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> None:
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj, **(ExtraArgs or {}))
+
+    def download_fileobj(
+        self,
+        Bucket: str,  # noqa: N803
+        Key: str,  # noqa: N803
+        Fileobj: BinaryIO,  # noqa: N803
+        **_: Any,  # noqa: ANN401
+    ) -> None:
+        response = self.get_object(Bucket=Bucket, Key=Key)
+        Fileobj.write(response["Body"].read())
+
+    def generate_presigned_url(
+        self,
+        ClientMethod: str,  # noqa: N803
+        Params: dict[str, Any] | None = None,  # noqa: N803
+        ExpiresIn: int = 3600,  # noqa: N803
+        HttpMethod: str | None = None,  # noqa: N803
+    ) -> str:
+        params = Params or {}
+        return (
+            f"memory://{params.get('Bucket', '')}/{params.get('Key', '')}"
+            f"?method={ClientMethod}&expires={ExpiresIn}&signature={uuid.uuid4().hex}"
+        )
+
+    @staticmethod
+    def _object_attributes(obj: _StoredObject) -> dict[str, Any]:
+        return {
+            "ContentLength": len(obj.data),
+            "ContentType": obj.content_type,
+            "ETag": obj.etag,
+            "LastModified": obj.last_modified,
+            "Metadata": dict(obj.metadata),
+            "AcceptRanges": "bytes",
+        }
+
+    @staticmethod
+    def _parse_range(value: str, size: int) -> tuple[int, int]:
+        unit, _, byte_range = value.partition("=")
+        first, _, last = byte_range.partition("-")
+        if unit != "bytes" or not (first or last):
+            start, end = -1, -1
+        elif not first:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if not 0 <= start <= end:
+            raise _client_error(
+                "GetObject",
+                code="InvalidRange",
+                message="The requested range is not satisfiable",
+                status_code=416,
+            )
+        return start, end
+
+
+class _ListObjectsV2Paginator:
+    def __init__(self, client: InMemoryS3Client) -> None:
+        self._client = client
+
+    def paginate(
+        self,
+        PaginationConfig: dict[str, Any] | None = None,  # noqa: N803
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Iterator[dict[str, Any]]:
+        page_size = (PaginationConfig or {}).get("PageSize", 1000)
+        continuation_token = ""
+        while True:
+            page = self._client.list_objects_v2(
+                MaxKeys=page_size,
+                ContinuationToken=continuation_token,
+                **kwargs,
+            )
+            yield page
+            if not page["IsTruncated"]:
+                return
+            continuation_token = page["NextContinuationToken"]
+
+
+class TestS3Backend:
+    def __init__(self, service: ServiceT, latency: float = 0.0) -> None:
+        self._service = service
+        self._client = InMemoryS3Client(latency=latency)
+        self._original_client: Any = None
+        self._original_probe_client: Any = None
+
+    def __enter__(self) -> InMemoryS3Client:
+        self._original_client = self._service.s3._boto3_s3_client
+        self._original_probe_client = self._service.s3._boto3_s3_probe_client
+        self._service.s3._boto3_s3_client = self._client  # type: ignore[assignment]
+        self._service.s3._boto3_s3_probe_client = self._client  # type: ignore[assignment]
+        self._service.s3._connection_check_result = None
+        self._service.s3.presigned_url_cache.clear()
+        return self._client
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self._service.s3._boto3_s3_client = self._original_client
+        self._service.s3._boto3_s3_probe_client = self._original_probe_client
+        self._service.s3._connection_check_result = None
+        self._service.s3.presigned_url_cache.clear()
+
+    async def __aenter__(self) -> InMemoryS3Client:
+        return self.__enter__()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.__exit__(exc_type, exc_val, exc_tb)
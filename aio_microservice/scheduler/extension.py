@@ -12,10 +12,13 @@ from loguru import logger
 from typing_extensions import Concatenate, ParamSpec
 
 from aio_microservice.core.abc import ExtensionABC, shutdown_hook, startup_hook
+from aio_microservice.executor.extension import make_offloaded
 
 if TYPE_CHECKING:
     from collections.abc import Awaitable
 
+    from aio_microservice.executor.extension import ExecutorKind
+
 
 class SchedulerExtensionImpl:
     def __init__(self, service: SchedulerExtension) -> None:
@@ -40,6 +43,7 @@ class SchedulerExtensionImpl:
                         hours=schedule_setting.hours,
                         minutes=schedule_setting.minutes,
                         seconds=schedule_setting.seconds,
+                        executor=schedule_setting.executor,
                     )
                 elif isinstance(schedule_setting, cron):
                     self.add_cron(
@@ -52,25 +56,37 @@ class SchedulerExtensionImpl:
                         hour=schedule_setting.hour,
                         minute=schedule_setting.minute,
                         second=schedule_setting.second,
+                        executor=schedule_setting.executor,
                     )
                 elif isinstance(schedule_setting, crontab):  # pragma: no branch
                     self.add_crontab(
                         fn=schedule,
                         expression=schedule_setting.expression,
+                        executor=schedule_setting.executor,
                     )
 
     @property
     def scheduler(self) -> AsyncIOScheduler:
         return self._scheduler
 
+    def _wrap(
+        self,
+        fn: Callable[[], Awaitable[None] | None],
+        executor: ExecutorKind | None,
+    ) -> Callable[[], Awaitable[None] | None]:
+        if executor is None:
+            return fn
+        return make_offloaded(service=self._service, kind=executor, fn=fn)
+
     def add_interval(
         self,
-        fn: Callable[[], Awaitable[None]],
+        fn: Callable[[], Awaitable[None] | None],
         weeks: int = 0,
         days: int = 0,
         hours: int = 0,
         minutes: int = 0,
         seconds: int = 0,
+        executor: ExecutorKind | None = None,
     ) -> None:
         trigger = IntervalTrigger(
             weeks=weeks,
@@ -80,7 +96,7 @@ class SchedulerExtensionImpl:
             seconds=seconds,
         )
         self._scheduler.add_job(
-            func=fn,
+            func=self._wrap(fn, executor),
             trigger=trigger,
             # Note: v3.x only starts _after_ the interval passed, while v4.x will run now and after
             # every interval
@@ -91,7 +107,7 @@ class SchedulerExtensionImpl:
 
     def add_cron(
         self,
-        fn: Callable[[], Awaitable[None]],
+        fn: Callable[[], Awaitable[None] | None],
         year: int | str | None = None,
         month: int | str | None = None,
         day: int | str | None = None,
@@ -100,6 +116,7 @@ class SchedulerExtensionImpl:
         hour: int | str | None = None,
         minute: int | str | None = None,
         second: int | str | None = None,
+        executor: ExecutorKind | None = None,
     ) -> None:
         trigger = CronTrigger(
             year=year,
@@ -111,15 +128,16 @@ class SchedulerExtensionImpl:
             minute=minute,
             second=second,
         )
-        self._scheduler.add_job(func=fn, trigger=trigger)
+        self._scheduler.add_job(func=self._wrap(fn, executor), trigger=trigger)
 
     def add_crontab(
         self,
-        fn: Callable[[], Awaitable[None]],
+        fn: Callable[[], Awaitable[None] | None],
         expression: str,
+        executor: ExecutorKind | None = None,
     ) -> None:
         trigger = CronTrigger.from_crontab(expr=expression)
-        self._scheduler.add_job(func=fn, trigger=trigger)
+        self._scheduler.add_job(func=self._wrap(fn, executor), trigger=trigger)
 
 
 class SchedulerExtension(ExtensionABC):
@@ -153,6 +171,7 @@ class interval(SchedulerDecorator):  # noqa: N801
     hours: int = 0
     minutes: int = 0
     seconds: int = 0
+    executor: ExecutorKind | None = None
 
     def __call__(
         self,
@@ -174,6 +193,7 @@ class cron(SchedulerDecorator):  # noqa: N801
     hour: int | str | None = None
     minute: int | str | None = None
     second: int | str | None = None
+    executor: ExecutorKind | None = None
 
     def __call__(
         self,
@@ -188,6 +208,7 @@ class cron(SchedulerDecorator):  # noqa: N801
 @dataclass
 class crontab(SchedulerDecorator):  # noqa: N801
     expression: str
+    executor: ExecutorKind | None = None
 
     def __call__(
         self,
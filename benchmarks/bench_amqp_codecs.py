@@ -0,0 +1,96 @@
+"""Compare the amqp codecs by cpu time and payload size.
+
+Run with: `python benchmarks/bench_amqp_codecs.py`
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from datetime import datetime, timezone
+
+from faststream.broker.message import decode_message
+from faststream.rabbit.message import RabbitMessage
+from faststream.utils.functions import to_async
+from pydantic import BaseModel
+from rich.console import Console
+from rich.table import Table
+
+from aio_microservice.amqp import AmqpCodec, AmqpCompression, AmqpSerializer
+
+ITERATIONS = 2000
+
+
+class Item(BaseModel):
+    sku: str
+    quantity: int
+    price: float
+
+
+class Order(BaseModel):
+    order_id: int
+    customer: str
+    created_at: datetime
+    items: list[Item]
+
+
+ORDER = Order(
+    order_id=42,
+    customer="customer@example.com",
+    created_at=datetime(2024, 6, 1, tzinfo=timezone.utc),
+    items=[Item(sku=f"SKU-{index:05}", quantity=index, price=index * 1.5) for index in range(100)],
+)
+
+
+original_decoder = to_async(decode_message)
+
+
+async def benchmark(codec: AmqpCodec) -> tuple[int, float, float]:
+    body, content_type, content_encoding = codec.encode(ORDER)
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        codec.encode(ORDER)
+    encode_seconds = time.perf_counter() - start
+
+    raw_message = type("RawMessage", (), {"content_encoding": content_encoding})()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        message = RabbitMessage(body=body, content_type=content_type, raw_message=raw_message)
+        await codec.decode(message, original_decoder)
+    decode_seconds = time.perf_counter() - start
+
+    return len(body), encode_seconds, decode_seconds
+
+
+async def main() -> None:
+    table = Table(title=f"amqp codecs ({ITERATIONS} messages)")
+    table.add_column("serializer")
+    table.add_column("compression")
+    table.add_column("size (bytes)", justify="right")
+    table.add_column("encode (us/msg)", justify="right")
+    table.add_column("decode (us/msg)", justify="right")
+
+    for serializer, compression in itertools.product(
+        AmqpSerializer,
+        [None, *AmqpCompression],
+    ):
+        try:
+            codec = AmqpCodec(serializer=serializer, compression=compression)
+        except ImportError:
+            continue
+        size, encode_seconds, decode_seconds = await benchmark(codec)
+        table.add_row(
+            serializer.value,
+            compression.value if compression is not None else "-",
+            str(size),
+            f"{encode_seconds / ITERATIONS * 1e6:.1f}",
+            f"{decode_seconds / ITERATIONS * 1e6:.1f}",
+        )
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,27 @@
+from loguru import logger
+from pydantic import BaseModel
+
+from aio_microservice import Service, ServiceSettings, amqp
+from aio_microservice.amqp import AmqpBatchError, AmqpExtension, AmqpExtensionSettings
+
+
+class Measurement(BaseModel):
+    sensor: str
+    value: float
+
+
+class MySettings(ServiceSettings, AmqpExtensionSettings): ...
+
+
+class MyService(Service[MySettings], AmqpExtension):
+    @amqp.subscriber(queue="measurement-queue", batch_size=500, batch_timeout=0.2)
+    async def handle_measurements(self, messages: list[Measurement]) -> None:
+        logger.info(f"storing {len(messages)} measurements")
+        # reject single messages of the batch, the others get acknowledged
+        invalid = {index: ValueError("negative") for index, m in enumerate(messages) if m.value < 0}
+        if invalid:
+            raise AmqpBatchError(errors=invalid)
+
+
+if __name__ == "__main__":
+    MyService.cli()
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+
+from aio_microservice import Service, ServiceSettings, amqp
+from aio_microservice.amqp import (
+    AmqpCodec,
+    AmqpCompression,
+    AmqpExtension,
+    AmqpExtensionSettings,
+    AmqpSerializer,
+)
+
+
+class Report(BaseModel):
+    name: str
+    rows: list[dict[str, float]]
+
+
+class MySettings(ServiceSettings, AmqpExtensionSettings): ...
+
+
+class MyService(Service[MySettings], AmqpExtension):
+    # incoming messages are decoded by their content-type and content-encoding
+    @amqp.subscriber(queue="report-request-queue")
+    @amqp.publisher(
+        queue="report-queue",
+        codec=AmqpCodec(serializer=AmqpSerializer.MSGPACK, compression=AmqpCompression.ZSTD),
+    )
+    async def handle_report_request(self, name: str) -> Report:
+        return Report(name=name, rows=[{"value": float(index)} for index in range(10_000)])
+
+
+if __name__ == "__main__":
+    # the default codec can be configured with e.g. `--amqp-serializer ORJSON`
+    MyService.cli()
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
 import asyncio
-from typing import TYPE_CHECKING, ClassVar
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, ClassVar
 
 import pytest
+from aiormq.exceptions import ChannelNotFoundEntity
+from faststream.broker.message import StreamMessage
+from faststream.exceptions import NackMessage, RejectMessage
+from faststream.rabbit import ExchangeType
+from pydantic import BaseModel
 from testcontainers_on_whales.rabbitmq import RabbitmqContainer
 
 from aio_microservice import Service, ServiceSettings, amqp, http
@@ -12,9 +19,14 @@ from aio_microservice.amqp import (
     AmqpExtensionSettings,
     AmqpSettings,
     BaseMiddleware,
+    InMemoryDedupeStore,
+    RabbitExchange,
+    RabbitQueue,
     TestAmqpBroker,
 )
+from aio_microservice.amqp.concurrency import SubscriberPartitioner
 from aio_microservice.http import TestHttpClient
+from aio_microservice.prometheus import PrometheusExtension, PrometheusExtensionSettings
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
@@ -348,3 +360,678 @@ async def test_amqp_graceful_timeout_higher_handler_duration(
     assert handler_cancelled_stub.call_count == 0
     assert handler_pre_stub.call_count == 1
     assert handler_post_stub.call_count == 1
+
+
+async def test_amqp_subscriber_concurrency(mocker: MockerFixture) -> None:
+    handler_pre_stub = mocker.stub()
+    handler_post_stub = mocker.stub()
+
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        def __init__(self, settings: TestSettings | None = None) -> None:
+            super().__init__(settings=settings)
+            self.keep_running = True
+
+        @amqp.subscriber(queue="test-subscriber-queue", concurrency=1)
+        async def handle_test(self) -> None:
+            handler_pre_stub()
+            while self.keep_running:
+                await asyncio.sleep(0.1)
+            handler_post_stub()
+
+    service = TestService()
+
+    async with TestAmqpBroker(service) as amqp_broker:
+        task1 = asyncio.create_task(amqp_broker.publish(queue="test-subscriber-queue"))
+        task2 = asyncio.create_task(amqp_broker.publish(queue="test-subscriber-queue"))
+
+        await asyncio.sleep(0.5)
+
+        assert handler_pre_stub.call_count == 1
+        assert handler_post_stub.call_count == 0
+        assert service.amqp.in_flight_messages == {"test-subscriber-queue": 2}
+
+        service.keep_running = False
+
+        await task1
+        await task2
+
+        assert handler_pre_stub.call_count == 2
+        assert handler_post_stub.call_count == 2
+        assert service.amqp.in_flight_messages == {"test-subscriber-queue": 0}
+
+
+def test_amqp_subscriber_concurrency_invalid() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(queue="test-subscriber-queue", concurrency=0)
+        async def handle_test(self) -> None: ...
+
+    with pytest.raises(ValueError, match="concurrency must be at least 1"):
+        TestService()
+
+
+async def test_amqp_subscriber_prefetch(
+    mocker: MockerFixture,
+    rabbitmq_ip: str,
+    rabbitmq_port: int,
+) -> None:
+    slow_handler_pre_stub = mocker.stub()
+    fast_handler_stub = mocker.stub()
+
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        def __init__(self, settings: TestSettings | None = None) -> None:
+            super().__init__(settings=settings)
+            self.keep_running = True
+
+        @amqp.subscriber(queue="test-slow-queue", prefetch=1)
+        async def handle_slow(self) -> None:
+            slow_handler_pre_stub()
+            while self.keep_running:
+                await asyncio.sleep(0.1)
+
+        @amqp.subscriber(queue="test-fast-queue")
+        async def handle_fast(self) -> None:
+            fast_handler_stub()
+
+    settings = TestSettings(amqp=AmqpSettings(host=rabbitmq_ip, port=rabbitmq_port))
+    service = TestService(settings=settings)
+
+    async with TestAmqpBroker(service, with_real=True) as amqp_broker:
+        for _ in range(2):
+            await amqp_broker.publish(queue="test-slow-queue")
+            await amqp_broker.publish(queue="test-fast-queue")
+
+        await asyncio.sleep(0.5)
+
+        assert slow_handler_pre_stub.call_count == 1
+        assert fast_handler_stub.call_count == 2
+
+        service.keep_running = False
+
+        await asyncio.sleep(0.5)
+
+        assert slow_handler_pre_stub.call_count == 2
+
+
+async def test_amqp_backpressure(
+    mocker: MockerFixture,
+    rabbitmq_ip: str,
+    rabbitmq_port: int,
+) -> None:
+    handler_stub = mocker.stub()
+
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(queue="test-backpressure-queue")
+        async def handle_backpressure(self) -> None:
+            handler_stub()
+
+    settings = TestSettings(
+        amqp=AmqpSettings(
+            host=rabbitmq_ip,
+            port=rabbitmq_port,
+            backpressure=True,
+            backpressure_pause_http_requests=2,
+            backpressure_throttle_http_requests=1,
+            backpressure_cooldown=0.0,
+        ),
+    )
+    service = TestService(settings=settings)
+    backpressure = service.amqp.backpressure
+    assert backpressure is not None
+
+    async with TestAmqpBroker(service, with_real=True) as amqp_broker:
+        backpressure.monitor.in_flight_requests = 2
+        await backpressure.update(now=0.0)
+        assert backpressure.level == "paused"
+
+        await amqp_broker.publish(queue="test-backpressure-queue")
+        await asyncio.sleep(0.5)
+        assert handler_stub.call_count == 0
+
+        backpressure.monitor.in_flight_requests = 1
+        await backpressure.update(now=0.0)
+        assert backpressure.level == "throttled"
+
+        await asyncio.sleep(0.5)
+        assert handler_stub.call_count == 1
+
+        backpressure.monitor.in_flight_requests = 0
+        await backpressure.update(now=0.0)
+        assert backpressure.level == "normal"
+
+        await amqp_broker.publish(queue="test-backpressure-queue")
+        await asyncio.sleep(0.5)
+        assert handler_stub.call_count == 2
+
+
+async def test_amqp_declare_topology(
+    mocker: MockerFixture,
+    rabbitmq_ip: str,
+    rabbitmq_port: int,
+) -> None:
+    handler_stub = mocker.stub()
+
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(
+            queue=RabbitQueue("test-topology-queue", routing_key="test.*"),
+            exchange=RabbitExchange("test-topology-exchange", type=ExchangeType.TOPIC),
+        )
+        async def handle_topology(self, message: str) -> None:
+            handler_stub(message)
+
+    def make_service(declare_topology: bool) -> TestService:
+        amqp_settings = AmqpSettings(
+            host=rabbitmq_ip,
+            port=rabbitmq_port,
+            declare_topology=declare_topology,
+        )
+        return TestService(settings=TestSettings(amqp=amqp_settings))
+
+    # the topology is assumed to exist, which fails until it has been declared
+    with pytest.raises(ChannelNotFoundEntity):
+        async with TestAmqpBroker(make_service(declare_topology=False), with_real=True):
+            pass  # pragma: no cover
+
+    for declare_topology in (True, False):
+        async with TestAmqpBroker(make_service(declare_topology), with_real=True) as amqp_broker:
+            await amqp_broker.publish(
+                "TEST",
+                exchange="test-topology-exchange",
+                routing_key="test.topology",
+            )
+            await asyncio.sleep(0.5)
+
+    assert handler_stub.call_count == 2
+
+
+async def test_amqp_in_flight_messages_metric() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings, PrometheusExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension, PrometheusExtension):
+        @amqp.subscriber(queue="test-subscriber-queue")
+        async def handle_test(self) -> None: ...
+
+        @amqp.subscriber(
+            queue="test-partitioned-queue",
+            partition_key=lambda message: message,
+            partition_lanes=2,
+        )
+        async def handle_partitioned(self) -> None: ...
+
+    service = TestService()
+
+    async with TestAmqpBroker(service), TestHttpClient(service) as http_client:
+        response = await http_client.get("/metrics")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+        metrics_lines = response.text.splitlines()
+        assert (
+            'amqp_subscriber_in_flight_messages{app_name="test-service",queue="test-subscriber-queue"} 0.0'  # noqa: E501
+            in metrics_lines
+        )
+        assert (
+            'amqp_subscriber_partition_lane_depth{app_name="test-service",handler="handle_partitioned",lane="1",queue="test-partitioned-queue"} 0.0'  # noqa: E501
+            in metrics_lines
+        )
+
+
+class Reading(BaseModel):
+    value: float
+
+
+async def test_amqp_trusted_messages_metric() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings, PrometheusExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension, PrometheusExtension):
+        @amqp.subscriber(queue="test-subscriber-queue", trusted=True, schema_version="1")
+        async def handle_test(self, message: Reading) -> None: ...
+
+    service = TestService()
+
+    async with TestAmqpBroker(service) as amqp_broker, TestHttpClient(service) as http_client:
+        await amqp_broker.publish(
+            queue="test-subscriber-queue",
+            message={"value": 1.0},
+            headers={"x-schema-version": "1"},
+        )
+
+        response = await http_client.get("/metrics")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+        metrics_lines = response.text.splitlines()
+        assert (
+            'amqp_subscriber_trusted_messages_total{app_name="test-service",path="constructed",queue="test-subscriber-queue"} 1.0'  # noqa: E501
+            in metrics_lines
+        )
+        assert (
+            'amqp_subscriber_trusted_messages_total{app_name="test-service",path="validated",queue="test-subscriber-queue"} 0.0'  # noqa: E501
+            in metrics_lines
+        )
+
+
+async def test_amqp_deduplicated_messages_metric() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings, PrometheusExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension, PrometheusExtension):
+        @amqp.subscriber(queue="test-subscriber-queue", dedupe=InMemoryDedupeStore())
+        async def handle_test(self, message: str) -> None: ...
+
+    service = TestService()
+
+    async with TestAmqpBroker(service) as amqp_broker, TestHttpClient(service) as http_client:
+        for _ in range(3):
+            await amqp_broker.publish(queue="test-subscriber-queue", message="TEST", message_id="1")
+
+        response = await http_client.get("/metrics")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+        metrics_lines = response.text.splitlines()
+        assert (
+            'amqp_subscriber_deduplicated_messages_total{app_name="test-service",queue="test-subscriber-queue",result="duplicate"} 2.0'  # noqa: E501
+            in metrics_lines
+        )
+        assert (
+            'amqp_subscriber_deduplicated_messages_total{app_name="test-service",queue="test-subscriber-queue",result="unique"} 1.0'  # noqa: E501
+            in metrics_lines
+        )
+
+
+async def test_amqp_stream_offset_metric() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings, PrometheusExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension, PrometheusExtension):
+        @amqp.subscriber(queue="test-stream", stream_offset="first")
+        async def handle_test(self, message: str) -> None: ...
+
+        @amqp.subscriber(queue="test-empty-stream", stream_offset="first")
+        async def handle_empty(self, message: str) -> None: ...
+
+    service = TestService()
+    streams: dict[str, list[Any]] = {"test-stream": ["TEST", "TEST"]}
+
+    async with TestAmqpBroker(service, streams=streams), TestHttpClient(service) as http_client:
+        response = await http_client.get("/metrics")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+        metrics_lines = response.text.splitlines()
+        assert (
+            'amqp_stream_committed_offset{app_name="test-service",queue="test-stream"} 1.0'
+            in metrics_lines
+        )
+        # streams without handled messages have no offset yet
+        assert (
+            'amqp_stream_committed_offset{app_name="test-service",queue="test-empty-stream"} -1.0'
+            in metrics_lines
+        )
+
+
+async def test_amqp_handler_metrics() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings, PrometheusExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension, PrometheusExtension):
+        @amqp.subscriber(queue="test-instrumented-queue")
+        @amqp.publisher(queue="test-instrumented-publisher-queue")
+        async def handle_instrumented(self, message: str) -> str:
+            if message == "NACK":
+                raise NackMessage
+            if message == "REJECT":
+                raise RejectMessage
+            if message == "FAIL":
+                msg = "TEST-ERROR"
+                raise RuntimeError(msg)
+            return message
+
+    service = TestService()
+
+    async with TestAmqpBroker(service) as amqp_broker, TestHttpClient(service) as http_client:
+        for message in ("TEST", "TEST", "NACK", "REJECT"):
+            await amqp_broker.publish(queue="test-instrumented-queue", message=message)
+        with pytest.raises(RuntimeError, match="TEST-ERROR"):
+            await amqp_broker.publish(queue="test-instrumented-queue", message="FAIL")
+        # the queue time prefers the publish header over the timestamp of the message
+        await amqp_broker.publish(
+            queue="test-instrumented-queue",
+            message="TEST",
+            timestamp=datetime.now(tz=timezone.utc),
+        )
+        await service.amqp.rpc("test-instrumented-queue", "TEST")
+
+        response = await http_client.get("/metrics")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+        metrics_lines = response.text.splitlines()
+
+    handler_labels = 'app_name="test-service",handler="handle_instrumented"'
+    queue_labels = 'queue="test-instrumented-queue"'
+    labels = f"{handler_labels},{queue_labels}"
+    for outcome, count in (("ack", 4), ("nack", 1), ("reject", 1), ("error", 1)):
+        assert (
+            f'amqp_subscriber_messages_total{{{handler_labels},outcome="{outcome}",{queue_labels}}} {count}.0'  # noqa: E501
+            in metrics_lines
+        )
+    assert f"amqp_subscriber_handler_duration_seconds_count{{{labels}}} 7.0" in metrics_lines
+    assert f"amqp_subscriber_decode_duration_seconds_count{{{labels}}} 7.0" in metrics_lines
+    assert (
+        'amqp_subscriber_queue_time_seconds_count{app_name="test-service",queue="test-instrumented-queue"} 7.0'  # noqa: E501
+        in metrics_lines
+    )
+    publisher_labels = (
+        'app_name="test-service",exchange="",routing_key="test-instrumented-publisher-queue"'
+    )
+    for metric in ("publish", "confirm"):
+        assert (
+            f"amqp_publisher_{metric}_duration_seconds_count{{{publisher_labels}}} 4.0"
+            in metrics_lines
+        )
+
+
+async def test_amqp_subscriber_partition_key() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        def __init__(self, settings: TestSettings | None = None) -> None:
+            super().__init__(settings=settings)
+            self.events: list[tuple[str, int, int]] = []
+            self.keep_running = asyncio.Event()
+
+        @amqp.subscriber(
+            queue="test-subscriber-queue",
+            partition_key=itemgetter("account"),
+            partition_lanes=4,
+        )
+        async def handle_test(self, account: int, sequence: int) -> None:
+            self.events.append(("start", account, sequence))
+            await self.keep_running.wait()
+            self.events.append(("end", account, sequence))
+
+    service = TestService()
+
+    async with TestAmqpBroker(service) as amqp_broker:
+        publish_tasks = [
+            asyncio.create_task(
+                amqp_broker.publish(
+                    queue="test-subscriber-queue",
+                    message={"account": account, "sequence": sequence},
+                ),
+            )
+            for account, sequence in ((1, 1), (2, 1), (1, 2), (1, 3), (2, 2))
+        ]
+
+        await asyncio.sleep(0.1)
+
+        # one message per account is processed, the others wait in their lane
+        assert service.events == [("start", 1, 1), ("start", 2, 1)]
+        assert service.amqp.partition_lane_depths == {"handle_test": [0, 3, 2, 0]}
+
+        service.keep_running.set()
+        await asyncio.gather(*publish_tasks)
+
+        for account in (1, 2):
+            sequences = [sequence for event, a, sequence in service.events if a == account]
+            assert sequences == sorted(sequences)
+        assert service.amqp.partition_lane_depths == {"handle_test": [0, 0, 0, 0]}
+
+
+async def _deliver_partitioned(
+    partitioner: SubscriberPartitioner,
+    body: Any,  # noqa: ANN401
+    decode_delay: float,
+    events: list[Any],
+    suitable: bool = True,
+) -> None:
+    async def parse(message: Any) -> StreamMessage[Any]:  # noqa: ANN401
+        await asyncio.sleep(0)
+        if body == "invalid-message":
+            msg = "invalid message"
+            raise ValueError(msg)
+        return StreamMessage(raw_message=message, body=body)
+
+    async def decode(message: StreamMessage[Any]) -> Any:  # noqa: ANN401
+        # decoders like the claim check or the dedupe store suspend before the handler
+        await asyncio.sleep(decode_delay)
+        if message.body == "invalid-body":
+            msg = "invalid body"
+            raise ValueError(msg)
+        return message.body
+
+    def filter_(message: StreamMessage[Any]) -> bool:
+        if message.body == "invalid-filter":
+            msg = "invalid filter"
+            raise ValueError(msg)
+        return suitable
+
+    async def handle(message: StreamMessage[Any]) -> None:
+        events.append(message.decoded_body)
+        await asyncio.sleep(0.01)
+
+    message = await partitioner.parse(object(), parse)  # type: ignore[arg-type]
+    message.decoded_body = await partitioner.decode(message, decode)
+    if await partitioner.make_filter(filter_)(message):
+        await partitioner(handle, message)
+
+
+async def test_amqp_subscriber_partition_key_suspending_decoder() -> None:
+    partitioner = SubscriberPartitioner(
+        queue="test-subscriber-queue",
+        handler="handle_test",
+        partition_key=itemgetter("account"),
+        lanes=4,
+    )
+    events: list[Any] = []
+    deliveries = [
+        ({"account": 1, "sequence": 1}, 0.05),
+        ({"account": 2, "sequence": 1}, 0.0),
+        ({"account": 1, "sequence": 2}, 0.0),
+        ({"account": 1, "sequence": 3}, 0.02),
+        ({"account": 2, "sequence": 2}, 0.0),
+    ]
+
+    await asyncio.gather(
+        *(
+            _deliver_partitioned(partitioner, body=body, decode_delay=delay, events=events)
+            for body, delay in deliveries
+        ),
+    )
+
+    # the lanes are claimed in delivery order, although later messages are decoded first
+    for account in (1, 2):
+        sequences = [event["sequence"] for event in events if event["account"] == account]
+        assert sequences == sorted(sequences)
+    assert partitioner.lane_depths == [0, 0, 0, 0]
+
+
+async def test_amqp_subscriber_partition_key_failures() -> None:
+    partitioner = SubscriberPartitioner(
+        queue="test-subscriber-queue",
+        handler="handle_test",
+        partition_key=len,
+        lanes=1,
+    )
+    events: list[Any] = []
+    results = await asyncio.gather(
+        _deliver_partitioned(partitioner, body="first", decode_delay=0.05, events=events),
+        _deliver_partitioned(partitioner, body="invalid-message", decode_delay=0, events=events),
+        _deliver_partitioned(partitioner, body="invalid-body", decode_delay=0, events=events),
+        _deliver_partitioned(partitioner, body=1, decode_delay=0, events=events),
+        _deliver_partitioned(partitioner, body="invalid-filter", decode_delay=0, events=events),
+        _deliver_partitioned(
+            partitioner,
+            body="unsuitable",
+            decode_delay=0,
+            events=events,
+            suitable=False,
+        ),
+        _deliver_partitioned(partitioner, body="last", decode_delay=0, events=events),
+        return_exceptions=True,
+    )
+
+    assert [type(result) for result in results] == [
+        type(None),
+        ValueError,
+        ValueError,
+        TypeError,
+        ValueError,
+        type(None),
+        type(None),
+    ]
+    # failed and unsuitable messages pass their turn on without blocking the lane
+    assert events == ["first", "last"]
+    assert partitioner.lane_depths == [0]
+
+
+def test_amqp_subscriber_partition_key_invalid() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestServiceWithInvalidLanes(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(
+            queue="test-subscriber-queue",
+            partition_key=lambda message: message,
+            partition_lanes=0,
+        )
+        async def handle_test(self) -> None: ...
+
+    class TestServiceWithBatch(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(
+            queue="test-subscriber-queue",
+            partition_key=lambda message: message,
+            batch_size=10,
+        )
+        async def handle_test(self, messages: list[str]) -> None: ...
+
+    with pytest.raises(ValueError, match="partition_lanes must be at least 1"):
+        TestServiceWithInvalidLanes()
+    with pytest.raises(ValueError, match="can not be partitioned"):
+        TestServiceWithBatch()
+
+
+@pytest.mark.parametrize("publish_connection", [True, False])
+async def test_amqp_publish_connection(
+    mocker: MockerFixture,
+    rabbitmq_ip: str,
+    rabbitmq_port: int,
+    publish_connection: bool,
+) -> None:
+    handler_stub = mocker.stub()
+
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(queue="test-subscriber-queue")
+        async def handle_test(self, message: str) -> None:
+            handler_stub(message)
+
+        @http.get(path="/test")
+        async def get_test(self) -> str:
+            publishes = [
+                self.amqp.broker.publish("TEST", queue="test-subscriber-queue") for _ in range(8)
+            ]
+            await asyncio.gather(*publishes)
+            return "TEST"
+
+    settings = TestSettings(
+        amqp=AmqpSettings(
+            host=rabbitmq_ip,
+            port=rabbitmq_port,
+            publish_connection=publish_connection,
+            publish_channel_pool_size=2,
+        ),
+    )
+    service = TestService(settings=settings)
+
+    async with TestHttpClient(service=service) as http_client:
+        assert len(service.amqp.broker.connections) == (2 if publish_connection else 1)
+
+        response = await http_client.get("/test")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+
+        await asyncio.sleep(0.5)
+        assert handler_stub.call_count == 8
+
+        response = await http_client.get("/readiness")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+
+
+async def test_amqp_failover(
+    mocker: MockerFixture,
+    rabbitmq_ip: str,
+    rabbitmq_port: int,
+) -> None:
+    handler_stub = mocker.stub()
+
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(queue="test-failover-queue")
+        async def handle_failover(self, message: str) -> None:
+            handler_stub(message)
+
+    # the first node refuses connections, so that all connections fail over to the second one
+    settings = TestSettings(
+        amqp=AmqpSettings(
+            host=rabbitmq_ip,
+            port=1,
+            failover_hosts=[f"{rabbitmq_ip}:{rabbitmq_port}"],
+            spread_consumers=True,
+        ),
+    )
+    service = TestService(settings=settings)
+
+    async with TestHttpClient(service=service) as http_client:
+        connections = service.amqp.broker.connections
+        assert len(connections) == 3
+        assert {connection.url.port for connection in connections} == {rabbitmq_port}
+
+        await service.amqp.broker.publish("TEST", queue="test-failover-queue")
+        await asyncio.sleep(0.5)
+        handler_stub.assert_called_once_with("TEST")
+
+        response = await http_client.get("/readiness")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+
+
+def test_amqp_publish_channel_pool_size_invalid() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension): ...
+
+    with pytest.raises(ValueError, match="publish_channel_pool_size must be at least 1"):
+        TestService(settings=TestSettings(amqp=AmqpSettings(publish_channel_pool_size=0)))
+
+
+async def test_amqp_rpc(rabbitmq_ip: str, rabbitmq_port: int) -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(queue="test-subscriber-queue")
+        async def handle_test(self, message: int) -> int:
+            return message * 2
+
+        @http.get(path="/test")
+        async def get_test(self) -> list[int]:
+            calls = [
+                self.amqp.rpc("test-subscriber-queue", value, timeout=5.0) for value in range(8)
+            ]
+            return list(await asyncio.gather(*calls))
+
+        @http.get(path="/test-timeout")
+        async def get_test_timeout(self) -> str:
+            try:
+                await self.amqp.rpc("test-unknown-queue", "TEST", timeout=0.1)
+            except asyncio.TimeoutError:
+                return "TIMEOUT"
+            return "TEST"  # pragma: no cover
+
+    settings = TestSettings(amqp=AmqpSettings(host=rabbitmq_ip, port=rabbitmq_port))
+    service = TestService(settings=settings)
+
+    async with TestHttpClient(service=service) as http_client:
+        response = await http_client.get("/test")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+        assert response.json() == [value * 2 for value in range(8)]
+
+        response = await http_client.get("/test-timeout")
+        assert response.json() == "TIMEOUT"
@@ -1,7 +1,7 @@
 from typing import TypeVar
 
 from aio_microservice import Service, ServiceSettings
-from aio_microservice.core.abc import ExtensionABC
+from aio_microservice.core.abc import ExtensionABC, has_extension
 
 
 async def test_custom_base() -> None:
@@ -32,3 +32,14 @@ async def test_custom_base_with_extensions() -> None:
 
     service = TestService()
     assert service.settings.somethings == "else"
+
+
+def test_has_extension() -> None:
+    class TestExtension(ExtensionABC): ...
+
+    class TestService(Service[ServiceSettings], TestExtension): ...
+
+    service = TestService()
+    assert has_extension(service, __name__, "ExtensionABC") is True
+    assert has_extension(service, "aio_microservice.core.service", "ServiceSettings") is False
+    assert has_extension(service, "not.imported.module", "TestExtension") is False
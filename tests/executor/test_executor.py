@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+from aio_microservice import Service, ServiceSettings, amqp, http, scheduler
+from aio_microservice.amqp import AmqpExtension, AmqpExtensionSettings, TestAmqpBroker
+from aio_microservice.executor import (
+    ExecutorExtension,
+    ExecutorExtensionSettings,
+    ExecutorSettings,
+)
+from aio_microservice.http import TestHttpClient
+from aio_microservice.prometheus import PrometheusExtension, PrometheusExtensionSettings
+from aio_microservice.scheduler import SchedulerExtension
+
+
+class ProcessSettings(ServiceSettings, AmqpExtensionSettings, ExecutorExtensionSettings): ...
+
+
+# defined on module-level, as the process executor has to pickle the handler
+class ProcessService(Service[ProcessSettings], AmqpExtension, ExecutorExtension):
+    @staticmethod  # type: ignore[type-var]
+    @amqp.subscriber(queue="test-subscriber-queue", executor="process")
+    @amqp.publisher(queue="test-publisher-queue")
+    def handle_test(message: int) -> int:
+        return message * os.getpid()
+
+
+async def test_executor_process_amqp_subscriber() -> None:
+    settings = ProcessSettings(executor=ExecutorSettings(max_processes=1))
+    service = ProcessService(settings=settings)
+
+    async with TestAmqpBroker(service) as amqp_broker, TestHttpClient(service):
+        await amqp_broker.publish(queue="test-subscriber-queue", message="2")
+
+        published_messages = amqp_broker.get_published_messages(queue="test-publisher-queue")
+        assert len(published_messages) == 1
+        assert published_messages[0] % 2 == 0
+        assert published_messages[0] != 2 * os.getpid()
+
+        assert service.executor.queue_wait["process"].count == 1
+
+
+async def test_executor_thread_amqp_subscriber() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings, ExecutorExtensionSettings): ...
+
+    class TestService(Service[TestSettings], AmqpExtension, ExecutorExtension):
+        def __init__(self, settings: TestSettings | None = None) -> None:
+            super().__init__(settings=settings)
+            self.thread_names: list[str] = []
+
+        @amqp.subscriber(queue="test-subscriber-queue", executor="thread")
+        def handle_test(self, message: str) -> None:
+            self.thread_names.append(threading.current_thread().name)
+
+    service = TestService()
+
+    async with TestAmqpBroker(service) as amqp_broker:
+        await amqp_broker.publish(queue="test-subscriber-queue", message="TEST")
+
+    assert len(service.thread_names) == 1
+    assert service.thread_names[0].startswith("executor")
+
+    queue_wait = service.executor.queue_wait["thread"]
+    assert queue_wait.count == 1
+    assert 0 <= queue_wait.max_seconds <= queue_wait.total_seconds
+
+    await service.executor.shutdown()
+
+
+async def test_executor_thread_scheduler() -> None:
+    class TestSettings(ServiceSettings, ExecutorExtensionSettings): ...
+
+    class TestService(Service[TestSettings], SchedulerExtension, ExecutorExtension):
+        def __init__(self, settings: TestSettings | None = None) -> None:
+            super().__init__(settings=settings)
+            self.thread_names: list[str] = []
+            self.scheduler.add_cron(fn=self.do_job, second="*", executor="thread")
+            self.scheduler.add_crontab(fn=self.do_job, expression="* * * * *", executor="thread")
+
+        @scheduler.interval(seconds=1, executor="thread")
+        def do_every_second(self) -> None:
+            self.thread_names.append(threading.current_thread().name)
+
+        def do_job(self) -> None: ...
+
+    service = TestService()
+    async with TestHttpClient(service=service):
+        await asyncio.sleep(0.5)
+
+    assert len(service.thread_names) == 1
+    assert service.thread_names[0].startswith("executor")
+
+
+async def test_executor_queue_wait_metric() -> None:
+    class TestSettings(
+        ServiceSettings,
+        AmqpExtensionSettings,
+        ExecutorExtensionSettings,
+        PrometheusExtensionSettings,
+    ): ...
+
+    class TestService(Service[TestSettings], AmqpExtension, ExecutorExtension, PrometheusExtension):
+        @amqp.subscriber(queue="test-subscriber-queue", executor="thread")
+        def handle_test(self, message: str) -> None: ...
+
+    service = TestService()
+
+    async with TestAmqpBroker(service) as amqp_broker, TestHttpClient(service) as http_client:
+        await amqp_broker.publish(queue="test-subscriber-queue", message="TEST")
+
+        response = await http_client.get("/metrics")
+        assert response.status_code == http.status_codes.HTTP_200_OK
+        assert (
+            'executor_queue_wait_seconds_count{app_name="test-service",executor="thread"} 1.0'
+            in response.text.splitlines()
+        )
+
+
+def test_executor_invalid() -> None:
+    class TestSettings(ServiceSettings, AmqpExtensionSettings, ExecutorExtensionSettings): ...
+
+    class TestServiceWithoutExtension(Service[TestSettings], AmqpExtension):
+        @amqp.subscriber(queue="test-subscriber-queue", executor="thread")
+        def handle_test(self, message: str) -> None: ...
+
+    class TestServiceWithAsyncHandler(Service[TestSettings], AmqpExtension, ExecutorExtension):
+        @amqp.subscriber(queue="test-subscriber-queue", executor="thread")
+        async def handle_test(self, message: str) -> None: ...
+
+    class TestServiceWithBoundMethod(Service[TestSettings], AmqpExtension, ExecutorExtension):
+        @amqp.subscriber(queue="test-subscriber-queue", executor="process")
+        def handle_test(self, message: str) -> None: ...
+
+    class TestServiceWithMixedExecutors(Service[TestSettings], AmqpExtension, ExecutorExtension):
+        @amqp.subscriber(queue="test-thread-queue", executor="thread")
+        @amqp.subscriber(queue="test-process-queue", executor="process")
+        def handle_test(self, message: str) -> None: ...
+
+    with pytest.raises(TypeError, match="requires the ExecutorExtension"):
+        TestServiceWithoutExtension()
+    with pytest.raises(ValueError, match="Only synchronous functions"):
+        TestServiceWithAsyncHandler()
+    with pytest.raises(ValueError, match="can not run bound method"):
+        TestServiceWithBoundMethod()
+    with pytest.raises(ValueError, match="must use the same executor"):
+        TestServiceWithMixedExecutors()
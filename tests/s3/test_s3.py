@@ -1,13 +1,25 @@
+from __future__ import annotations
+
+import asyncio
 import io
+import time
 import uuid
+from typing import TYPE_CHECKING, Any
 
 import pytest
+from botocore.exceptions import ClientError
+from loguru import logger
 from pydantic import SecretStr
 from testcontainers_on_whales.minio import MinioContainer
 
 from aio_microservice import Service, ServiceSettings, http, startup_hook
 from aio_microservice.http import TestHttpClient
-from aio_microservice.s3 import S3Extension, S3ExtensionSettings, S3Settings
+from aio_microservice.s3 import S3Extension, S3ExtensionSettings, S3Settings, TestS3Backend
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from pytest_mock import MockerFixture
 
 
 async def test_s3_client() -> None:
@@ -91,6 +103,7 @@ async def test_s3_readiness_probe() -> None:
             endpoint_url=container.get_connection_url(),
             access_key_id=container.username,
             secret_access_key=SecretStr(container.password),
+            readiness_cache_ttl=0,
         ),
     )
 
@@ -106,3 +119,338 @@ async def test_s3_readiness_probe() -> None:
 
         assert response_running.status_code == http.status_codes.HTTP_200_OK
         assert response_stopped.status_code == http.status_codes.HTTP_503_SERVICE_UNAVAILABLE
+
+
+async def test_s3_iter_objects() -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings):
+        bucket_name: str = "test-bucket"
+
+    class TestService(Service[TestSettings], S3Extension):
+        @startup_hook
+        async def create_s3_bucket(self) -> None:
+            self.s3.client.create_bucket(Bucket=self.settings.bucket_name)
+            for prefix in ("a", "b"):
+                for index in range(5):
+                    self.s3.client.put_object(
+                        Bucket=self.settings.bucket_name,
+                        Key=f"{prefix}/{index}.txt",
+                        Body=b"TEST-CONTENT",
+                    )
+
+    settings = TestSettings(
+        s3=S3Settings(
+            endpoint_url="http://localhost:12345",
+            access_key_id="somerandomid",
+            secret_access_key=SecretStr("somerandomsecret"),
+        ),
+    )
+
+    service = TestService(settings=settings)
+
+    async with TestS3Backend(service), TestHttpClient(service=service):
+        object_keys = [
+            obj["Key"]
+            async for obj in service.s3.iter_objects(
+                bucket=service.settings.bucket_name,
+                prefix="a/",
+                page_size=2,
+            )
+        ]
+        assert object_keys == [f"a/{index}.txt" for index in range(5)]
+
+        object_keys = [
+            obj["Key"]
+            async for obj in service.s3.iter_objects_parallel(
+                bucket=service.settings.bucket_name,
+                prefixes=["a/", "b/", "c/"],
+                page_size=2,
+            )
+        ]
+        assert sorted(object_keys) == [
+            f"{prefix}/{index}.txt" for prefix in ("a", "b") for index in range(5)
+        ]
+
+        missing_bucket_objects = service.s3.iter_objects_parallel(
+            bucket="missing-bucket",
+            prefixes=["a/"],
+        )
+        with pytest.raises(ClientError):
+            await missing_bucket_objects.__anext__()
+
+
+async def test_s3_iter_objects_parallel_failure() -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings): ...
+
+    class TestService(Service[TestSettings], S3Extension): ...
+
+    settings = TestSettings(
+        s3=S3Settings(endpoint_url="http://localhost:1", access_key_id="", secret_access_key=""),
+    )
+    service = TestService(settings=settings)
+    listing = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def iter_object_pages(bucket: str, prefix: str, page_size: int) -> Any:  # noqa: ANN401
+        if prefix == "failing/":
+            await listing.wait()
+            raise ValueError(prefix)
+        try:
+            yield [{"Key": f"{prefix}0.txt"}]
+            listing.set()
+            await asyncio.Event().wait()
+        finally:
+            cancelled.set()
+
+    service.s3._iter_object_pages = iter_object_pages  # type: ignore[method-assign]
+    objects = service.s3.iter_objects_parallel(bucket="test", prefixes=["failing/", "slow/"])
+    assert await objects.__anext__() == {"Key": "slow/0.txt"}
+    # the failure surfaces without waiting for the other prefixes
+    with pytest.raises(ValueError, match="failing/"):
+        await asyncio.wait_for(objects.__anext__(), timeout=1)
+    assert cancelled.is_set()
+
+
+async def test_s3_bulk_operations() -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings):
+        bucket_name: str = "test-bucket"
+
+    class TestService(Service[TestSettings], S3Extension):
+        @startup_hook
+        async def create_s3_bucket(self) -> None:
+            self.s3.client.create_bucket(Bucket=self.settings.bucket_name)
+            for index in range(10):
+                self.s3.client.put_object(
+                    Bucket=self.settings.bucket_name,
+                    Key=f"{index}.txt",
+                    Body=b"TEST-CONTENT",
+                )
+
+    settings = TestSettings(
+        s3=S3Settings(
+            endpoint_url="http://localhost:12345",
+            access_key_id="somerandomid",
+            secret_access_key=SecretStr("somerandomsecret"),
+        ),
+    )
+
+    service = TestService(settings=settings)
+    bucket_name = service.settings.bucket_name
+    keys = [f"{index}.txt" for index in range(10)]
+
+    async def async_keys() -> AsyncIterator[str]:
+        for key in keys:
+            # the keys arrive like from an asynchronous source
+            await asyncio.sleep(0)
+            yield key
+
+    async with TestS3Backend(service), TestHttpClient(service=service):
+        head_results = [
+            result
+            async for result in service.s3.bulk_head_objects(
+                bucket=bucket_name,
+                keys=[*keys, "missing.txt"],
+                batch_size=3,
+                max_concurrency=2,
+            )
+        ]
+        assert len(head_results) == 4
+        head_succeeded = {k: v for r in head_results for k, v in r.succeeded.items()}
+        assert sorted(head_succeeded) == sorted(keys)
+        assert all(v["ContentLength"] == len(b"TEST-CONTENT") for v in head_succeeded.values())
+        head_errors = [e for r in head_results for e in r.errors]
+        assert [e.key for e in head_errors] == ["missing.txt"]
+        assert head_errors[0].code == "404"
+
+        tag_results = [
+            result
+            async for result in service.s3.bulk_put_object_tagging(
+                bucket=bucket_name,
+                keys=[keys[0], "missing.txt"],
+                tags={"state": "expired"},
+            )
+        ]
+        assert list(tag_results[0].succeeded) == [keys[0]]
+        assert [e.key for e in tag_results[0].errors] == ["missing.txt"]
+        response_get_tagging = service.s3.client.get_object_tagging(
+            Bucket=bucket_name,
+            Key=keys[0],
+        )
+        assert response_get_tagging["TagSet"] == [{"Key": "state", "Value": "expired"}]
+
+        delete_results = [
+            result
+            async for result in service.s3.bulk_delete_objects(
+                bucket=bucket_name,
+                keys=async_keys(),
+                batch_size=5,
+            )
+        ]
+        assert len(delete_results) == 2
+        assert sorted(k for r in delete_results for k in r.succeeded) == sorted(keys)
+        assert not [e for r in delete_results for e in r.errors]
+        assert [obj["Key"] async for obj in service.s3.iter_objects(bucket=bucket_name)] == []
+
+        delete_results = [
+            result
+            async for result in service.s3.bulk_delete_objects(
+                bucket="missing-bucket",
+                keys=keys,
+            )
+        ]
+        assert len(delete_results) == 1
+        assert not delete_results[0].succeeded
+        assert [e.code for e in delete_results[0].errors] == ["NoSuchBucket"] * len(keys)
+
+        with pytest.raises(ValueError, match="batch_size"):
+            await service.s3.bulk_delete_objects(
+                bucket=bucket_name,
+                keys=keys,
+                batch_size=1001,
+            ).__anext__()
+
+
+def test_s3_presigned_url_cache(mocker: MockerFixture) -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings): ...
+
+    class TestService(Service[TestSettings], S3Extension): ...
+
+    settings = TestSettings(
+        s3=S3Settings(
+            endpoint_url="http://localhost:12345",
+            access_key_id="somerandomid",
+            secret_access_key=SecretStr("somerandomsecret"),
+            presigned_url_cache_size=1,
+            presigned_url_min_remaining_validity=60,
+        ),
+    )
+
+    service = TestService(settings=settings)
+    generate_presigned_url_spy = mocker.spy(service.s3.client, "generate_presigned_url")
+
+    params = {"Bucket": "test-bucket", "Key": "test.txt"}
+    url = service.s3.generate_presigned_url("get_object", params=params)
+    assert service.s3.generate_presigned_url("get_object", params=params) == url
+    assert generate_presigned_url_spy.call_count == 1
+
+    # a different method is cached separately and evicts the least recently used entry
+    service.s3.generate_presigned_url("put_object", params=params)
+    assert generate_presigned_url_spy.call_count == 2
+    assert len(service.s3.presigned_url_cache) == 1
+    service.s3.generate_presigned_url("get_object", params=params)
+    assert generate_presigned_url_spy.call_count == 3
+
+    # urls with less remaining validity than required are not reused
+    service.s3.generate_presigned_url("get_object", params=params, expires_in=30)
+    service.s3.generate_presigned_url("get_object", params=params, expires_in=30)
+    assert generate_presigned_url_spy.call_count == 5
+
+    service.s3.presigned_url_cache.clear()
+    service.s3.generate_presigned_url("get_object", params=params)
+    assert generate_presigned_url_spy.call_count == 6
+
+
+def test_s3_presigned_url_cache_disabled(mocker: MockerFixture) -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings): ...
+
+    class TestService(Service[TestSettings], S3Extension): ...
+
+    settings = TestSettings(
+        s3=S3Settings(
+            endpoint_url="http://localhost:12345",
+            access_key_id="somerandomid",
+            secret_access_key=SecretStr("somerandomsecret"),
+            presigned_url_cache_size=0,
+        ),
+    )
+
+    service = TestService(settings=settings)
+    generate_presigned_url_spy = mocker.spy(service.s3.client, "generate_presigned_url")
+
+    params = {"Bucket": "test-bucket", "Key": "test.txt"}
+    service.s3.generate_presigned_url("get_object", params=params)
+    service.s3.generate_presigned_url("get_object", params=params)
+    assert generate_presigned_url_spy.call_count == 2
+
+
+async def test_s3_readiness_probe_bucket() -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings): ...
+
+    class TestService(Service[TestSettings], S3Extension): ...
+
+    with MinioContainer() as container:
+        container.wait_ready(timeout=120)
+
+        settings = TestSettings(
+            s3=S3Settings(
+                endpoint_url=container.get_connection_url(),
+                access_key_id=container.username,
+                secret_access_key=SecretStr(container.password),
+                readiness_bucket="test-bucket",
+                readiness_cache_ttl=60,
+            ),
+        )
+
+        service = TestService(settings=settings)
+
+        async with TestHttpClient(service=service) as http_client:
+            response_missing_bucket = await http_client.get("/readiness")
+            assert response_missing_bucket.status_code == (
+                http.status_codes.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+            service.s3.client.create_bucket(Bucket="test-bucket")
+
+            # the result is cached until the ttl passed
+            response_cached = await http_client.get("/readiness")
+            assert response_cached.status_code == http.status_codes.HTTP_503_SERVICE_UNAVAILABLE
+
+            service.s3._connection_check_result = None
+
+            response_existing_bucket = await http_client.get("/readiness")
+            assert response_existing_bucket.status_code == http.status_codes.HTTP_200_OK
+
+
+async def test_s3_readiness_probe_timeout(
+    mocker: MockerFixture,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings): ...
+
+    class TestService(Service[TestSettings], S3Extension): ...
+
+    settings = TestSettings(
+        s3=S3Settings(
+            endpoint_url="http://localhost:12345",
+            access_key_id="somerandomid",
+            secret_access_key=SecretStr("somerandomsecret"),
+            readiness_bucket="test-bucket",
+            readiness_timeout=0.1,
+            readiness_cache_ttl=0,
+        ),
+    )
+
+    service = TestService(settings=settings)
+
+    def stuck_head_bucket(**_: str) -> None:
+        time.sleep(0.5)
+
+    head_bucket = mocker.patch.object(
+        service.s3._boto3_s3_probe_client,
+        "head_bucket",
+        side_effect=stuck_head_bucket,
+    )
+
+    started_at = time.monotonic()
+    assert await service.s3.check_connection() is False
+    assert time.monotonic() - started_at < 0.5
+    # the log sink of caplog is enqueued
+    await logger.complete()
+    assert "Timed out verifying connection" in caplog.text
+    # the hanging check is awaited again instead of taking another worker
+    assert await service.s3.check_connection() is False
+    assert head_bucket.call_count == 1
+    assert service.s3._boto3_s3_probe_client.meta.config.read_timeout == 0.1  # type: ignore[attr-defined]
+
+    # shutting down the executor is idempotent
+    service.s3.shutdown_executor()
+    service.s3.shutdown_executor()
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import io
+import time
+from typing import TYPE_CHECKING, cast
+
+import pytest
+from botocore.exceptions import ClientError, OperationNotPageableError
+from pydantic import SecretStr
+
+from aio_microservice import Service, ServiceSettings, http, startup_hook
+from aio_microservice.http import TestHttpClient
+from aio_microservice.s3 import (
+    InMemoryS3Client,
+    S3Extension,
+    S3ExtensionSettings,
+    S3Settings,
+    TestS3Backend,
+)
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+
+def error_code(exc_info: pytest.ExceptionInfo[ClientError]) -> str:
+    return exc_info.value.response["Error"]["Code"]
+
+
+async def test_s3_test_backend_service() -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings):
+        bucket_name: str = "test-bucket"
+
+    class TestService(Service[TestSettings], S3Extension):
+        @startup_hook
+        async def create_s3_bucket(self) -> None:
+            self.s3.client.create_bucket(Bucket=self.settings.bucket_name)
+
+        @http.post(path="/test-upload")
+        async def post_upload(self, content: str) -> str:
+            self.s3.client.upload_fileobj(
+                Fileobj=io.BytesIO(content.encode()),
+                Bucket=self.settings.bucket_name,
+                Key="test.txt",
+            )
+            return "test.txt"
+
+    settings = TestSettings(
+        s3=S3Settings(
+            endpoint_url="http://localhost:12345",
+            access_key_id="somerandomid",
+            secret_access_key=SecretStr("somerandomsecret"),
+        ),
+    )
+
+    service = TestService(settings=settings)
+    original_client = service.s3.client
+
+    async with TestS3Backend(service) as s3_backend, TestHttpClient(service) as http_client:
+        # the backend stands in for the boto3 client
+        assert service.s3.client is cast("S3Client", s3_backend)
+
+        response_post = await http_client.post("/test-upload?content=TEST-CONTENT")
+        assert response_post.status_code == http.status_codes.HTTP_201_CREATED
+
+        response_readiness = await http_client.get("/readiness")
+        assert response_readiness.status_code == http.status_codes.HTTP_200_OK
+
+        response_get = s3_backend.get_object(Bucket="test-bucket", Key="test.txt")
+        assert response_get["Body"].read() == b"TEST-CONTENT"
+
+    assert service.s3.client is original_client
+
+
+def test_s3_test_backend_buckets() -> None:
+    client = InMemoryS3Client()
+
+    client.create_bucket(Bucket="test-bucket")
+    with pytest.raises(ClientError) as exc_info:
+        client.create_bucket(Bucket="test-bucket")
+    assert error_code(exc_info) == "BucketAlreadyOwnedByYou"
+
+    client.head_bucket(Bucket="test-bucket")
+    with pytest.raises(ClientError) as exc_info:
+        client.head_bucket(Bucket="missing-bucket")
+    assert error_code(exc_info) == "404"
+
+    assert client.list_buckets()["Buckets"] == [{"Name": "test-bucket"}]
+
+    client.put_object(Bucket="test-bucket", Key="test.txt", Body=b"TEST")
+    with pytest.raises(ClientError) as exc_info:
+        client.delete_bucket(Bucket="test-bucket")
+    assert error_code(exc_info) == "BucketNotEmpty"
+
+    client.delete_object(Bucket="test-bucket", Key="test.txt")
+    client.delete_bucket(Bucket="test-bucket")
+    assert client.list_buckets()["Buckets"] == []
+
+    with pytest.raises(ClientError) as exc_info:
+        client.put_object(Bucket="missing-bucket", Key="test.txt", Body=b"TEST")
+    assert error_code(exc_info) == "NoSuchBucket"
+
+
+def test_s3_test_backend_objects() -> None:
+    client = InMemoryS3Client()
+    client.create_bucket(Bucket="test-bucket")
+
+    client.put_object(
+        Bucket="test-bucket",
+        Key="test.txt",
+        Body="0123456789",
+        ContentType="text/plain",
+        Metadata={"owner": "test"},
+    )
+
+    response_head = client.head_object(Bucket="test-bucket", Key="test.txt")
+    assert response_head["ContentLength"] == 10
+    assert response_head["ContentType"] == "text/plain"
+    assert response_head["Metadata"] == {"owner": "test"}
+
+    with pytest.raises(ClientError) as exc_info:
+        client.head_object(Bucket="test-bucket", Key="missing.txt")
+    assert error_code(exc_info) == "404"
+    with pytest.raises(ClientError) as exc_info:
+        client.get_object(Bucket="test-bucket", Key="missing.txt")
+    assert error_code(exc_info) == "NoSuchKey"
+
+    response_get = client.get_object(Bucket="test-bucket", Key="test.txt")
+    assert response_get["Body"].read() == b"0123456789"
+    assert response_get["ETag"] == response_head["ETag"]
+
+    response_range = client.get_object(Bucket="test-bucket", Key="test.txt", Range="bytes=2-4")
+    assert response_range["Body"].read() == b"234"
+    assert response_range["ContentLength"] == 3
+    assert response_range["ContentRange"] == "bytes 2-4/10"
+    response_range = client.get_object(Bucket="test-bucket", Key="test.txt", Range="bytes=7-")
+    assert response_range["Body"].read() == b"789"
+    response_range = client.get_object(Bucket="test-bucket", Key="test.txt", Range="bytes=-2")
+    assert response_range["Body"].read() == b"89"
+    response_range = client.get_object(Bucket="test-bucket", Key="test.txt", Range="bytes=8-20")
+    assert response_range["Body"].read() == b"89"
+    for invalid_range in ("bytes=20-", "bytes=-", "items=0-1"):
+        with pytest.raises(ClientError) as exc_info:
+            client.get_object(Bucket="test-bucket", Key="test.txt", Range=invalid_range)
+        assert error_code(exc_info) == "InvalidRange"
+
+    download = io.BytesIO()
+    client.download_fileobj(Bucket="test-bucket", Key="test.txt", Fileobj=download)
+    assert download.getvalue() == b"0123456789"
+
+    client.put_object_tagging(
+        Bucket="test-bucket",
+        Key="test.txt",
+        Tagging={"TagSet": [{"Key": "state", "Value": "expired"}]},
+    )
+    response_tagging = client.get_object_tagging(Bucket="test-bucket", Key="test.txt")
+    assert response_tagging["TagSet"] == [{"Key": "state", "Value": "expired"}]
+
+    response_delete = client.delete_objects(
+        Bucket="test-bucket",
+        Delete={"Objects": [{"Key": "test.txt"}, {"Key": "missing.txt"}]},
+    )
+    assert response_delete["Deleted"] == [{"Key": "test.txt"}, {"Key": "missing.txt"}]
+    assert "Contents" not in client.list_objects_v2(Bucket="test-bucket")
+
+
+def test_s3_test_backend_list_objects() -> None:
+    client = InMemoryS3Client()
+    client.create_bucket(Bucket="test-bucket")
+    keys = ["a/1.txt", "a/2.txt", "a/b/3.txt", "a/b/4.txt", "c.txt"]
+    for key in keys:
+        client.put_object(Bucket="test-bucket", Key=key, Body=b"TEST")
+
+    response_list = client.list_objects_v2(Bucket="test-bucket", Prefix="a/", Delimiter="/")
+    assert [c["Key"] for c in response_list["Contents"]] == ["a/1.txt", "a/2.txt"]
+    assert response_list["CommonPrefixes"] == [{"Prefix": "a/b/"}]
+
+    response_list = client.list_objects_v2(Bucket="test-bucket", StartAfter="a/b/3.txt")
+    assert [c["Key"] for c in response_list["Contents"]] == ["a/b/4.txt", "c.txt"]
+
+    paginator = client.get_paginator("list_objects_v2")
+    pages = list(paginator.paginate(Bucket="test-bucket", PaginationConfig={"PageSize": 3}))
+    assert [[c["Key"] for c in page["Contents"]] for page in pages] == [keys[:3], keys[3:]]
+
+    assert client.can_paginate("list_objects_v2")
+    assert not client.can_paginate("list_buckets")
+    with pytest.raises(OperationNotPageableError):
+        client.get_paginator("list_buckets")
+
+
+def test_s3_test_backend_multipart_upload() -> None:
+    client = InMemoryS3Client()
+    client.create_bucket(Bucket="test-bucket")
+
+    upload_id = client.create_multipart_upload(Bucket="test-bucket", Key="test.bin")["UploadId"]
+    parts = [
+        {
+            "PartNumber": number,
+            "ETag": client.upload_part(
+                Bucket="test-bucket",
+                Key="test.bin",
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=io.BytesIO(content),
+            )["ETag"],
+        }
+        for number, content in ((1, b"PART-1"), (2, b"PART-2"))
+    ]
+
+    with pytest.raises(ClientError) as exc_info:
+        client.complete_multipart_upload(
+            Bucket="test-bucket",
+            Key="test.bin",
+            UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": 3, "ETag": parts[0]["ETag"]}]},
+        )
+    assert error_code(exc_info) == "InvalidPart"
+
+    response_complete = client.complete_multipart_upload(
+        Bucket="test-bucket",
+        Key="test.bin",
+        UploadId=upload_id,
+        MultipartUpload={"Parts": parts},
+    )
+    assert response_complete["ETag"].endswith('-2"')
+    response_get = client.get_object(Bucket="test-bucket", Key="test.bin")
+    assert response_get["Body"].read() == b"PART-1PART-2"
+
+    upload_id = client.create_multipart_upload(Bucket="test-bucket", Key="test.bin")["UploadId"]
+    client.abort_multipart_upload(Bucket="test-bucket", Key="test.bin", UploadId=upload_id)
+    with pytest.raises(ClientError) as exc_info:
+        client.upload_part(
+            Bucket="test-bucket",
+            Key="test.bin",
+            UploadId=upload_id,
+            PartNumber=1,
+            Body=b"PART-1",
+        )
+    assert error_code(exc_info) == "NoSuchUpload"
+
+
+def test_s3_test_backend_presigned_url() -> None:
+    client = InMemoryS3Client()
+
+    url = client.generate_presigned_url(
+        ClientMethod="get_object",
+        Params={"Bucket": "test-bucket", "Key": "test.txt"},
+        ExpiresIn=60,
+    )
+    assert url.startswith("memory://test-bucket/test.txt?method=get_object&expires=60")
+
+
+async def test_s3_test_backend_latency() -> None:
+    class TestSettings(ServiceSettings, S3ExtensionSettings): ...
+
+    class TestService(Service[TestSettings], S3Extension): ...
+
+    settings = TestSettings(
+        s3=S3Settings(
+            endpoint_url="http://localhost:12345",
+            access_key_id="somerandomid",
+            secret_access_key=SecretStr("somerandomsecret"),
+        ),
+    )
+
+    service = TestService(settings=settings)
+
+    with TestS3Backend(service, latency=0.05) as s3_backend:
+        s3_backend.create_bucket(Bucket="test-bucket")
+
+        started_at = time.monotonic()
+        assert await service.s3.check_connection() is True
+        assert time.monotonic() - started_at >= 0.05
+
+    service.s3.shutdown_executor()